@@ -1,49 +1,40 @@
 import requests
-import holidays
 from datetime import datetime, time
+from zoneinfo import ZoneInfo
 import yfinance as yf
 import logging
 from decimal import Decimal
 import pandas as pd
 import json
+from core.calendar.trading_calendar import NYSE_TZ, get_calendar
 
 logger = logging.getLogger("agents.common.utils")
 
 def is_public_holiday():
-    us_holidays = holidays.US()  # Use IN() for India, or combine both if needed
-    today = datetime.now().date()
-    return today in us_holidays
+    """Whether today is an NYSE holiday (a weekday without a session)."""
+    today = datetime.now(ZoneInfo(NYSE_TZ)).date()
+    return today.weekday() < 5 and not get_calendar("NYSE").is_trading_day(today)
 
 def is_weekend_or_holiday():
-    today = datetime.now().date()
-    return today.weekday() >= 5 or is_public_holiday()
+    today = datetime.now(ZoneInfo(NYSE_TZ)).date()
+    return not get_calendar("NYSE").is_trading_day(today)
 
-def is_market_open():
-    now = datetime.now().time()
-    market_open = time(9, 15)  # Example: 9:15 AM
-    market_close = time(16, 15)  # Example: 4:15 PM
-    return market_open <= now <= market_close
+def is_market_open(grace_minutes=15):
+    """
+    Whether the NYSE regular session is open.
 
-# def get_usd_to_eur_rate():
-#     response = requests.get("https://api.exchangerate.host/latest?base=USD&symbols=EUR")
-#     rate = response.json()["rates"]["EUR"]
-#     return rate
+    Stays true for `grace_minutes` after the close so that the fetch running at
+    the close still collects the session's last bars.
+    """
+    now = pd.Timestamp.now(tz="UTC")
+    calendar = get_calendar("NYSE")
+    return calendar.is_open(now) or calendar.is_open(now - pd.Timedelta(minutes=grace_minutes))
 
 def get_usd_to_eur_rate():
-    """Fetch the current USD to EUR exchange rate."""
-    try:
-        ticker = yf.Ticker("EUR=X")  # USD/EUR exchange rate
-        df = ticker.history(period="1d", interval="1d")
-        if not df.empty:
-            exchange_rate = df["Close"].iloc[-1]  
-            logger.info("Fetched USD to EUR exchange rate: %.4f", exchange_rate)
-            return exchange_rate
-        else:
-            logger.error("Failed to fetch USD to EUR exchange rate. Defaulting to 1.0.")
-            return 1.0  # Default to no conversion if rate is unavailable
-    except Exception as e:
-        logger.error("Error fetching USD to EUR exchange rate: %s", str(e))
-        return 1.0  # Default to no conversion if an error occurs
+    """Return the latest USD to EUR exchange rate from the shared FX service."""
+    from core.config.config_loader import load_settings
+    from core.fx.fx_service import get_fx_service
+    return get_fx_service(load_settings()).rate("USD", "EUR")
 
 def convert_decimals(obj):
     if isinstance(obj, list):
@@ -3,11 +3,14 @@ import asyncio
 import json
 import uuid
 from sqlalchemy.sql import text
-from sqlalchemy.ext.asyncio import create_async_engine
 
 from datetime import datetime, timezone
-from core.redis_bus.redis_stream import RedisStream
+from core.redis_bus.bus import get_bus
+from core.observability.log_pipeline import sampled
+from core.observability import tracing
+from core.observability.profiler import timed
 from core.config.config_loader import load_settings
+from core.db.engine import get_async_engine
 from agents.common.utils import convert_decimals
 
 logger = logging.getLogger("agents.execution")
@@ -15,7 +18,7 @@ logger = logging.getLogger("agents.execution")
 class ExecutionAgent:
     def __init__(self, settings_path=None):
         self.settings = load_settings(settings_path)
-        self.redis_stream = RedisStream()
+        self.redis_stream = get_bus()
 
         # Input stream from PortfolioManagerAgent
         self.execution_orders_channel = self.redis_stream.get_channel("portfolio_manager")
@@ -23,10 +26,7 @@ class ExecutionAgent:
         self.execution_results_channel = self.redis_stream.get_channel("execution_results")
 
         # Database connection
-        db_cfg = self.settings["database"]
-        self.db_engine = create_async_engine(
-            f"postgresql+asyncpg://{db_cfg['user']}:{db_cfg['password']}@{db_cfg['host']}:{db_cfg['port']}/{db_cfg['db']}"
-        )
+        self.db_engine = get_async_engine(self.settings["database"])
         
         self.environment = self.settings.get("environment", "development").lower()
         
@@ -56,11 +56,12 @@ class ExecutionAgent:
         while True:
             await asyncio.sleep(1)  # Keep the agent running
 
+    @timed("execution.process_order")
     async def process_order(self, message):
         """Processes an order from the PortfolioManagerAgent."""
         async with self.semaphore: # <--- Use the semaphore
             try:
-                logger.info(f"Received order: {message}")
+                logger.info("Received order: %s", sampled(logger, message))
 
                 # Validate required fields
                 required_keys = ["ticker", "direction", "entry_price", "stop_loss", "liquidity_target", "calculated_quantity", "fvg_id","fvg_height","reason", "timeframe", "fvg_direction", "rr"]
@@ -135,8 +136,9 @@ class ExecutionAgent:
                     "signal_confidence": signal_confidence,
                 }
 
+                tracing.inject(execution_result, tracing.mark(tracing.extract(message), "execution"))
                 # Publish execution result to Redis
-                logger.info(f"Publishing execution result: {execution_result}")
+                logger.info("Publishing execution result: %s", sampled(logger, execution_result))
                 self.redis_stream.publish(self.execution_results_channel, convert_decimals(execution_result))
 
             except Exception as e:
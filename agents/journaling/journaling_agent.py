@@ -2,10 +2,11 @@ import logging
 import asyncio
 import json
 from datetime import datetime, timezone
-from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.sql import text
-from core.redis_bus.redis_stream import RedisStream
+from core.redis_bus.bus import get_bus
+from core.observability.log_pipeline import sampled
 from core.config.config_loader import load_settings
+from core.db.engine import get_async_engine
 from agents.common.utils import convert_decimals
 
 logger = logging.getLogger("agents.journaling")
@@ -13,17 +14,14 @@ logger = logging.getLogger("agents.journaling")
 class JournalingAgent:
     def __init__(self, settings_path=None):
         self.settings = load_settings(settings_path)
-        self.redis_stream = RedisStream()
+        self.redis_stream = get_bus()
 
         # Input stream from PositionTrackerAgent
         self.position_updates_channel = self.redis_stream.get_channel("position_updates")
         # Output stream for downstream agents (e.g., PerformanceAgent)
         self.journal_updates_channel = self.redis_stream.get_channel("journal_updates")
 
-        db_cfg = self.settings["database"]
-        self.db_engine = create_async_engine(
-            f"postgresql+asyncpg://{db_cfg['user']}:{db_cfg['password']}@{db_cfg['host']}:{db_cfg['port']}/{db_cfg['db']}"
-        )
+        self.db_engine = get_async_engine(self.settings["database"])
 
     async def start(self):
         logger.info("Starting Journaling Agent...")
@@ -41,7 +39,7 @@ class JournalingAgent:
     async def process_position_update(self, message):
         """Processes position updates and archives closed positions."""
         try:
-            logger.info(f"Received position update: {message}")
+            logger.info("Received position update: %s", sampled(logger, message))
 
             # Validate required fields
             required_keys = ["execution_id", "symbol", "exit_price", "pnl", "timestamp"]
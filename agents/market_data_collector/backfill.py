@@ -0,0 +1,196 @@
+import asyncio
+import itertools
+import logging
+import time
+import numpy as np
+import pandas as pd
+from prometheus_client import Counter, Gauge
+from sqlalchemy.sql import text
+from core.calendar.trading_calendar import calendar_for
+from core.db.storage_policy import ohlcv_table
+from core.observability.metrics import track_queue
+from core.ratelimit.provider_limiter import is_throttle_error
+from core.scheduler.candle_scheduler import timeframe_seconds
+
+logger = logging.getLogger("agents.data_collector.backfill")
+
+COMPLETENESS = Gauge("ohlcv_completeness_ratio", "Share of expected bars present in ohlcv_data over the lookback", ["symbol", "timeframe"])
+MISSING_BARS = Gauge("ohlcv_missing_bars", "Expected bars missing from ohlcv_data over the lookback", ["symbol", "timeframe"])
+BACKFILLED_BARS = Counter("ohlcv_backfilled_bars_total", "Bars inserted by the backfill worker", ["timeframe"])
+
+DEFAULT_BACKFILL = {
+    "enabled": True,
+    "scan_interval_minutes": 60,
+    "requests_per_minute": 20,  # Backfill's own budget, on top of the live fetches
+    "merge_gap_bars": 12,  # Gaps closer than this are fetched in one request
+    "max_queue": 1000,
+    "retry_after_hours": 24,  # Gaps whose backfill came back empty or failed are skipped this long
+}
+
+NS = 10**9
+
+
+def get_backfill_config(settings):
+    config = dict(DEFAULT_BACKFILL)
+    config.update(settings.get("backfill", {}) or {})
+    return config
+
+
+def expected_bar_timestamps(calendar, timeframe, start, end):
+    """
+    Open timestamps of every bar that should exist between start and end.
+
+    Bars are laid out from each session open (so 1h equity bars start at 9:30 ET, as
+    yfinance reports them); markets that never close use the UTC grid. Only bars that
+    have closed by `end` are returned.
+
+    Returns:
+        np.ndarray: Sorted UTC int64 nanosecond timestamps.
+    """
+    period = timeframe_seconds(timeframe) * NS
+    end_ns = pd.Timestamp(end).value
+    opens, closes = calendar.sessions_between(start, end)
+    if calendar.always_open:
+        opens = -(-opens // period) * period  # Align to the grid
+    bars = [np.arange(o, c, period, dtype=np.int64) for o, c in zip(opens, closes)]
+    bars = np.concatenate(bars) if bars else np.empty(0, dtype=np.int64)
+    return bars[(bars >= pd.Timestamp(start).value) & (bars + period <= end_ns)]
+
+
+def find_gaps(expected, actual, timeframe, merge_gap_bars=0):
+    """
+    Group the expected bars missing from `actual` into fetch ranges.
+
+    Args:
+        expected (np.ndarray): Output of expected_bar_timestamps.
+        actual (np.ndarray): Stored bar timestamps (UTC int64 ns).
+        merge_gap_bars (int): Merge ranges separated by fewer present bars than this.
+
+    Returns:
+        tuple: (ranges, missing) where ranges is a list of (start, end) UTC Timestamps
+            (end exclusive) and missing the number of missing bars.
+    """
+    period = timeframe_seconds(timeframe) * NS
+    present = np.isin(expected, actual)
+    positions = np.flatnonzero(~present)
+    if len(positions) == 0:
+        return [], 0
+    # Split wherever more than merge_gap_bars present bars sit between two missing ones
+    breaks = np.flatnonzero(np.diff(positions) > merge_gap_bars + 1)
+    firsts = np.concatenate([[positions[0]], positions[breaks + 1]])
+    lasts = np.concatenate([positions[breaks], [positions[-1]]])
+    ranges = [
+        (pd.Timestamp(expected[f], tz="UTC"), pd.Timestamp(expected[l] + period, tz="UTC"))
+        for f, l in zip(firsts, lasts)
+    ]
+    return ranges, len(positions)
+
+
+class GapScanner:
+    """Compare ohlcv_data with the bars the trading calendars say should exist."""
+
+    def __init__(self, db_engine):
+        self.db_engine = db_engine
+
+    async def stored_timestamps(self, symbols, timeframe, start):
+        """Return {symbol: sorted UTC int64 ns timestamps} stored since `start`."""
+        async with self.db_engine.connect() as conn:
+            result = await conn.execute(
+                text(f"""
+                    SELECT symbol, timestamp FROM {ohlcv_table(timeframe)}
+                    WHERE timeframe = :timeframe AND symbol = ANY(:symbols) AND timestamp >= :start
+                    ORDER BY symbol, timestamp
+                """),
+                {"timeframe": timeframe, "symbols": list(symbols), "start": start.to_pydatetime()}
+            )
+            rows = result.fetchall()
+        stored = {}
+        for symbol, group in itertools.groupby(rows, key=lambda row: row[0]):
+            stored[symbol] = pd.to_datetime([row[1] for row in group], utc=True).asi8
+        return stored
+
+    async def scan(self, symbols, timeframe, lookback_days, merge_gap_bars=0, now=None):
+        """
+        Find missing bars per symbol and publish each symbol's completeness.
+
+        Returns:
+            dict: Symbol -> list of (start, end) ranges to backfill.
+        """
+        end = pd.Timestamp.now(tz="UTC") if now is None else pd.Timestamp(now)
+        start = (end - pd.Timedelta(days=lookback_days)).floor("D")
+        stored = await self.stored_timestamps(symbols, timeframe, start)
+        gaps = {}
+        for symbol in symbols:
+            expected = expected_bar_timestamps(calendar_for(symbol), timeframe, start, end)
+            ranges, missing = find_gaps(expected, stored.get(symbol, np.empty(0, dtype=np.int64)), timeframe, merge_gap_bars)
+            COMPLETENESS.labels(symbol=symbol, timeframe=timeframe).set(1 - missing / len(expected) if len(expected) else 1.0)
+            MISSING_BARS.labels(symbol=symbol, timeframe=timeframe).set(missing)
+            if ranges:
+                gaps[symbol] = ranges
+        return gaps
+
+
+class BackfillWorker:
+    """
+    Low-priority, rate-limited worker that fetches and stores missing ranges.
+
+    Ranges are fetched one at a time, at most `requests_per_minute` per minute, and
+    only while no other request to the provider is in flight in this process. Ranges
+    that come back empty or fail are recorded in the watermark store, and the gap scan
+    skips them for `retry_after_hours`.
+    """
+
+    def __init__(self, agent, config):
+        self.agent = agent
+        self.config = config
+        self.queue = asyncio.Queue(maxsize=config["max_queue"])
+        track_queue("backfill", self.queue.qsize)
+        self._queued = set()
+        self._task = None
+
+    def enqueue(self, symbol, timeframe, start, end):
+        key = (symbol, timeframe, start, end)
+        if key in self._queued:
+            return
+        try:
+            self.queue.put_nowait(key)
+            self._queued.add(key)
+        except asyncio.QueueFull:
+            logger.warning("Backfill queue full; dropping %s %s %s-%s.", symbol, timeframe, start, end)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="backfill-worker")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        interval = 60 / self.config["requests_per_minute"]
+        while True:
+            key = await self.queue.get()
+            symbol, timeframe, start, end = key
+            started = time.monotonic()
+            try:
+                # Yield to the live fetches: the semaphore is sized for bursts and is almost never full
+                while self.agent.limiter.concurrency.in_flight > 0:
+                    await asyncio.sleep(1)
+                df = await asyncio.to_thread(self.agent.fetch_ohlcv, symbol, timeframe, None, start, end)
+                if df is not None and not df.empty:
+                    inserted = await self.agent.store_data(symbol, timeframe, df)
+                    BACKFILLED_BARS.labels(timeframe=timeframe).inc(inserted or 0)
+                    logger.info("Backfilled %s rows of '%s' data for '%s' (%s to %s).", inserted, timeframe, symbol, start, end)
+                else:
+                    logger.info("No data available to backfill '%s' %s (%s to %s).", symbol, timeframe, start, end)
+                    await self.agent.watermarks.record_fruitless_backfill(symbol, timeframe, start)
+            except Exception as e:
+                logger.error("Backfill of '%s' %s (%s to %s) failed: %s", symbol, timeframe, start, end, str(e))
+                if not is_throttle_error(e):  # Throttled ranges are worth retrying on the next scan
+                    await self.agent.watermarks.record_fruitless_backfill(symbol, timeframe, start)
+            finally:
+                self._queued.discard(key)
+                self.queue.task_done()
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
@@ -1,18 +1,29 @@
 import logging
 import pandas as pd
 import yfinance as yf
-from sqlalchemy.ext.asyncio import create_async_engine
-from core.redis_bus.redis_stream import RedisStream
+from core.redis_bus.bus import get_bus
+from core.observability.log_pipeline import sampled
+from core.observability import tracing
+from core.observability.profiler import timed
+from core.scheduler.candle_scheduler import timeframe_seconds
+from core.redis_bus.bar_payload import attach_bars, get_bar_payload_config
+from core.redis_bus.bus_monitor import start_bus_monitor
 from core.config.config_loader import load_settings
+from core.db.engine import get_async_engine
+from core.db.storage_policy import ohlcv_table
+from core.fx.fx_service import get_fx_service
+from core.ratelimit.provider_limiter import get_limiter, is_throttle_error, yf_history
+from agents.market_data_collector.backfill import BackfillWorker, GapScanner, get_backfill_config
+from agents.market_data_collector.watermarks import WatermarkStore
+from agents.market_data_collector.streaming import StreamingIngestor, WebSocketTickProvider, get_streaming_config
 import json
 import asyncio
 from tenacity import retry, stop_after_attempt, wait_exponential
-from prometheus_client import Counter, Histogram, start_http_server
+from prometheus_client import Counter, Histogram
 from asyncio import Semaphore
 from sqlalchemy.sql import text
 from datetime import datetime, time
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-import agents.common.utils as common
+import core.calendar.trading_calendar as trading_calendar
 
 # Initialize logger
 logger = logging.getLogger("agents.data_collector")
@@ -31,7 +42,7 @@ class DataCollectorAgent:
             self.settings = load_settings()
 
         # Initialize Redis Streams
-        self.redis_stream = RedisStream()
+        self.redis_stream = get_bus()
         self.filtered_assets_channel = self.redis_stream.get_channel("market_research")  # Fetch the channel for filtered assets
         self.raw_data_channel = self.redis_stream.get_channel("data_collector")  # Fetch the channel for publishing raw data
 
@@ -39,12 +50,7 @@ class DataCollectorAgent:
             raise ValueError("Redis channel for 'data_collector' is not defined in settings.yaml.")
 
         # Initialize database connection
-        db_config = self.settings["database"]
-        self.db_engine = create_async_engine(
-            f"postgresql+asyncpg://{db_config['user']}:{db_config['password']}@{db_config['host']}:{db_config['port']}/{db_config['db']}",
-            pool_size=10,
-            max_overflow=5
-        )
+        self.db_engine = get_async_engine(self.settings["database"])
 
         # Load timeframes and history settings
         self.timeframes = self.settings["timeframes"]
@@ -56,15 +62,32 @@ class DataCollectorAgent:
         # Track failed assets
         self.failed_assets = []
 
-        # Start Prometheus metrics server
-        start_http_server(8000)
+        # Bars carried in data events, so consumers skip the DB round trip
+        self.bar_payload = get_bar_payload_config(self.settings)
+
+        # Last-fetched timestamps, read and written once per fetch cycle
+        self.watermarks = WatermarkStore(self.redis_stream.redis, self.db_engine)
 
         self._semaphore = None  # Placeholder
         self._loop = None  # Track the loop this agent is tied to
         
-        # Exchange rate for usd/eur
-        self.exchange_rate = common.get_usd_to_eur_rate()
+        # Shared Yahoo rate limit and adaptive concurrency (core/ratelimit)
+        self.limiter = get_limiter("yahoo", self.settings)
+
+        # Gap detection and backfill
+        self.backfill_config = get_backfill_config(self.settings)
+        self.gap_scanner = GapScanner(self.db_engine)
+        self.backfill = BackfillWorker(self, self.backfill_config)
+
+        # Exchange rates (cached in Redis, refreshed in the background)
+        self.fx = get_fx_service(self.settings)
 
+        # Ingestion mode: "poll" fetches on candle closes, "stream" aggregates a live trade feed
+        self.ingestion_mode = (self.settings.get("ingestion", {}) or {}).get("mode", "poll")
+        self.stream_task = None
+
+        # Consumer-group health of the streams; publishes wait while the data channel's consumers are behind
+        self.bus_monitor = None
 
     @property
     def semaphore(self):
@@ -90,7 +113,7 @@ class DataCollectorAgent:
         """Process the filtered assets message."""
         self.failed_assets = []
         try:
-            logger.info("Received message on stream '%s': %s", self.filtered_assets_channel, message)
+            logger.info("Received message on stream '%s': %s", self.filtered_assets_channel, sampled(logger, message))
             filtered_assets = json.loads(message.get("filtered_assets", "[]"))
             if not filtered_assets:
                 logger.warning("No filtered assets found in the message.")
@@ -100,10 +123,7 @@ class DataCollectorAgent:
             self.filtered_assets = filtered_assets
 
             # Fetch and store OHLCV data for all assets concurrently with a semaphore
-            ltf_tasks = [asyncio.create_task(self.process_ohlcv(asset, "ltf")) for asset in filtered_assets]
-            htf_tasks = [asyncio.create_task(self.process_ohlcv(asset, "htf")) for asset in filtered_assets]
-
-            await asyncio.gather(*ltf_tasks, *htf_tasks)
+            await self.run_fetch_cycle(filtered_assets, ["ltf", "htf"])
 
             if self.failed_assets:
                 logger.warning("🚫 The following assets failed to fetch data:")
@@ -112,22 +132,45 @@ class DataCollectorAgent:
             else:
                 logger.info("✅ All assets successfully fetched for both timeframes.")
 
-            logger.info("Processed filtered assets: %s", filtered_assets)
+            logger.info("Processed %d filtered assets.", len(filtered_assets))
         except Exception as e:
             logger.error("Error processing filtered assets: %s", str(e))
 
-    async def process_ohlcv(self, asset, timeframe_key):
-        """Fetch and store OHLCV data for a given asset and timeframe."""
+    async def run_fetch_cycle(self, assets, timeframe_keys):
+        """
+        Fetch and store the given timeframes ("ltf", "htf") for the given assets concurrently.
+
+        Watermarks are read for the whole cycle in one Redis call before the fetches
+        and written back in one call after them.
+        """
+        jobs = [(asset, timeframe_key) for timeframe_key in timeframe_keys for asset in assets]
+        watermarks = await self.watermarks.get_many((asset, self.timeframes[key]) for asset, key in jobs)
+        results = await asyncio.gather(*[
+            asyncio.create_task(self.process_ohlcv(asset, key, watermarks.get((asset, self.timeframes[key]))))
+            for asset, key in jobs
+        ])
+        await self.watermarks.set_many({
+            (asset, self.timeframes[key]): last for (asset, key), last in zip(jobs, results) if last is not None
+        })
+
+    @timed("data_collector.process_ohlcv")
+    async def process_ohlcv(self, asset, timeframe_key, last_fetched=None):
+        """
+        Fetch and store OHLCV data for a given asset and timeframe.
+
+        Returns:
+            The timestamp of the newest stored bar (the new watermark), or None.
+        """
+        # Before taking a slot: a congested bus must not hold the other fetches back
+        await self.wait_for_bus_capacity()
         async with self.semaphore:
             try:
                 timeframe = self.timeframes[timeframe_key]
                 lookback_days = self.history[f"{timeframe_key}_lookback_days"]
 
-                # Get the last fetched timestamp
-                last_fetched = await self.get_last_fetched_timestamp(asset, timeframe)
-
                 logger.info("Fetching %s data for asset '%s' after %s...", timeframe_key, asset, last_fetched)
-                df = self.fetch_ohlcv(asset, timeframe, lookback_days, last_fetched)
+                # yfinance blocks; run it in a thread so the other fetches proceed
+                df = await asyncio.to_thread(self.fetch_ohlcv, asset, timeframe, lookback_days, last_fetched)
                 if df is None or df.empty:
                     logger.warning("❌ No data fetched for asset '%s' (%s).", asset, timeframe)
                     self.failed_assets.append((asset, timeframe))
@@ -143,40 +186,51 @@ class DataCollectorAgent:
                         logger.warning("⚠️ Very few rows (%d) for asset '%s' (%s). Might be incomplete.", len(df), asset, timeframe)
 
                     await self.publish_raw_data_event(asset, timeframe, df)
-                    await self.update_last_fetched_timestamp(asset, timeframe, str(df["timestamp"].iloc[-1]))
                     PROCESSED_ASSETS.inc()
+                    return df["timestamp"].iloc[-1]
                 else:
                     logger.error("⚠️ No data returned for asset '%s' (%s).", asset, timeframe)
 
             except Exception as e:
                 logger.error("Error processing OHLCV data for asset '%s': %s", asset, str(e))
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10), reraise=True)
     @FETCH_DURATION.time()
-    def fetch_ohlcv(self, asset, timeframe, lookback_days, last_fetched=None):
-        """Fetch OHLCV data using yfinance."""
+    def fetch_ohlcv(self, asset, timeframe, lookback_days, last_fetched=None, end=None):
+        """
+        Fetch OHLCV data using yfinance (the [last_fetched, end) range when `end` is given).
+
+        Throttle responses are raised so that @retry tries again once the limiter's
+        pause has passed; other errors are logged and return None.
+        """
         try:
             ticker = yf.Ticker(asset)
-            # rate = common.get_usd_to_eur_rate()
-            if last_fetched:
+            if last_fetched and end:
+                # Fetch an exact range (backfill)
+                logger.info("Fetching '%s' data for asset '%s' from %s to %s...", timeframe, asset, last_fetched, end)
+                with self.limiter.request():
+                    df = yf_history(ticker, start=last_fetched, end=end, interval=timeframe)
+            elif last_fetched:
                 # Fetch data starting from the last fetched timestamp
                 start_date = last_fetched.strftime("%Y-%m-%d")
                 logger.info("Fetching data for asset '%s' from %s for timeframe '%s'...", asset, start_date, timeframe)
-                df = ticker.history(start=start_date, interval=timeframe)
+                with self.limiter.request():
+                    df = yf_history(ticker, start=start_date, interval=timeframe)
             else:
                 # Fetch the entire lookback period
                 logger.info("Fetching %d days of '%s' data for asset '%s'...", lookback_days, timeframe, asset)
-                df = ticker.history(period=f"{lookback_days}d", interval=timeframe)
+                with self.limiter.request():
+                    df = yf_history(ticker, period=f"{lookback_days}d", interval=timeframe)
 
             if df.empty:
                 logger.warning("No data found for asset '%s' with timeframe '%s'.", asset, timeframe)
                 return None
             
-            # Reset the index and rename columns
+            # Reset the index and rename columns (intraday bars are indexed by Datetime, daily ones by Date)
             df.reset_index(inplace=True)
-            df.rename(columns={"Datetime": "timestamp", "Open": "open", "High": "high", "Low": "low", "Close": "close", "Volume": "volume"}, inplace=True)
-            df[["open", "high", "low", "close"]] *= self.exchange_rate
-            df = df[["timestamp", "open", "high", "low", "close", "volume"]]
+            df.rename(columns={"Datetime": "timestamp", "Date": "timestamp", "Open": "open", "High": "high", "Low": "low", "Close": "close", "Volume": "volume"}, inplace=True)
+            df = df[["timestamp", "open", "high", "low", "close", "volume"]].copy()
+            self.fx.convert(df)  # Rate of each bar's day, not one rate for the whole window
             df["symbol"] = asset
             df["timeframe"] = timeframe
 
@@ -184,6 +238,9 @@ class DataCollectorAgent:
             return df
         except Exception as e:
             FETCH_ERRORS.inc()
+            if is_throttle_error(e):
+                logger.warning("Yahoo throttled the '%s' fetch for asset '%s': %s", timeframe, asset, str(e))
+                raise
             logger.error("Error fetching OHLCV data for asset '%s': %s", asset, str(e))
             return None
 
@@ -193,8 +250,8 @@ class DataCollectorAgent:
                 inserted = 0
                 for _, row in df.iterrows():
                     result = await conn.execute(
-                        text("""
-                            INSERT INTO ohlcv_data (symbol, timeframe, timestamp, open, high, low, close, volume)
+                        text(f"""
+                            INSERT INTO {ohlcv_table(timeframe)} (symbol, timeframe, timestamp, open, high, low, close, volume)
                             VALUES (:symbol, :timeframe, :timestamp, :open, :high, :low, :close, :volume)
                             ON CONFLICT (symbol, timestamp, timeframe) DO NOTHING
                         """),
@@ -212,12 +269,18 @@ class DataCollectorAgent:
                     if result.rowcount == 1:
                         inserted += 1
             logger.info("Inserted %d rows of '%s' data for asset '%s'.", inserted, timeframe, asset)
+            return inserted
         except Exception as e:
             logger.error("Error storing OHLCV data for asset '%s': %s", asset, str(e))
             raise # Re-raise the exception for further handling
 
+    async def wait_for_bus_capacity(self):
+        """Hold back while consumers of the data channel are behind (core/redis_bus/bus_monitor.py)."""
+        if self.bus_monitor is not None:
+            await self.bus_monitor.wait_for_capacity(self.raw_data_channel)
+
     async def publish_raw_data_event(self, asset, timeframe, df):
-        """Publish a raw data event to the Redis Stream."""
+        """Publish a raw data event to the Redis Stream (callers wait_for_bus_capacity() first)."""
         try:
             if not self.raw_data_channel:
                 raise ValueError("Redis channel for 'data_collector' is not defined.")
@@ -230,42 +293,17 @@ class DataCollectorAgent:
                 "new_data": "true",  # Convert boolean to string
                 "range": f"[{start_time}, {end_time}]"  # Convert list to string
             }
+            summary = dict(message)
+            # Trace from the close of the newest bar through to the tracked position
+            bar_close = pd.Timestamp(df["timestamp"].iloc[-1]).timestamp() + timeframe_seconds(timeframe)
+            tracing.inject(message, tracing.mark(tracing.new_trace(bar_close), "ingest"))
+            attach_bars(message, df, self.redis_stream.redis, self.bar_payload)
             self.redis_stream.publish(self.raw_data_channel, message)
-            logger.info("Published raw data event to stream '%s': %s", self.raw_data_channel, message)
+            logger.info("Published raw data event to stream '%s': %s (%d bars%s)", self.raw_data_channel, summary, len(df),
+                        " inline" if "bars" in message else " by reference" if "bars_ref" in message else "")
         except Exception as e:
             logger.error("Error publishing raw data event for asset '%s': %s", asset, str(e))
 
-    async def get_last_fetched_timestamp(self, asset, timeframe):
-        """Retrieve the last fetched timestamp for a given asset and timeframe from Redis."""
-        try:
-            key = f"last_fetched:{asset}:{timeframe}"
-            timestamp = self.redis_stream.redis.get(key)
-            if timestamp:
-                logger.info("Last fetched timestamp for asset '%s' with timeframe '%s': %s", asset, timeframe, timestamp)
-                return datetime.fromisoformat(timestamp)
-            else:
-                logger.warning("No previous data found for asset '%s' with timeframe '%s'. Fetching from the beginning of the lookback period.", asset, timeframe)
-                return None
-        except Exception as e:
-            logger.error("Error retrieving last fetched timestamp for asset '%s' with timeframe '%s': %s", asset, timeframe, str(e))
-            return None
-
-    async def update_last_fetched_timestamp(self, asset, timeframe, timestamp):
-        """Update the last fetched timestamp for a given asset and timeframe in Redis."""
-        try:
-            # Ensure timestamp is a datetime object
-            if isinstance(timestamp, str):
-                timestamp = datetime.fromisoformat(timestamp)
-            elif not isinstance(timestamp, datetime):
-                raise ValueError("Invalid timestamp format. Must be a datetime object or ISO 8601 string.")
-
-            key = f"last_fetched:{asset}:{timeframe}"
-            self.redis_stream.redis.set(key, timestamp.isoformat(), ex=86400)
-            logger.info("Updated last fetched timestamp for asset '%s' with timeframe '%s': %s", asset, timeframe, timestamp)
-        except Exception as e:
-            logger.error("Error updating last fetched timestamp for asset '%s' with timeframe '%s': %s", asset, timeframe, str(e))
-            raise  # Re-raise the exception for further handling
-
     async def start(self):
         """Start the Data Collector Agent."""
         logger.info("Starting the Data Collector Agent...")
@@ -273,7 +311,9 @@ class DataCollectorAgent:
         # Initialize the semaphore in the correct event loop
         # self._semaphore = asyncio.Semaphore(5)  # Limit to 5 concurrent tasks
         self._loop = asyncio.get_running_loop()
-        self._semaphore = asyncio.Semaphore(5)
+        # Upper bound on in-flight asset tasks; the limiter adapts the upstream concurrency below it
+        self._semaphore = asyncio.Semaphore(self.limiter.concurrency.max_limit)
+        self.bus_monitor = start_bus_monitor(self.settings)
 
         # Subscribe to the filtered assets channel
         await self.subscribe_to_filtered_assets()
@@ -288,16 +328,22 @@ class DataCollectorAgent:
         logger.info("Performing initial data fetch...")
         await self.fetch_live_data()
 
-        # Schedule periodic fetching of LTF and HTF data
-        scheduler = AsyncIOScheduler()
-        htf_interval = self.history["htf_interval_minutes"]  # Use interval from settings
-        ltf_interval = self.history["ltf_interval_minutes"]  # Use interval from settings
+        # Backfill whatever is missing from the lookback window, at low priority
+        if self.backfill_config["enabled"]:
+            self.backfill.start()
+            await self.scan_for_gaps()
 
-        scheduler.add_job(self.fetch_htf_data, "interval", minutes=htf_interval, id="htf_fetch_job")
-        scheduler.add_job(self.fetch_ltf_data, "interval", minutes=ltf_interval, id="ltf_fetch_job")
+        if self.ingestion_mode == "stream":
+            self.start_streaming()
+        # In poll mode, fetches are scheduled on candle closes by core/scheduler (see main.py)
 
-        scheduler.start()
-        logger.info("Scheduled LTF and HTF data fetching jobs.")
+    def start_streaming(self):
+        """Ingest bars from the live trade feed; the polling history above covers what came before."""
+        config = get_streaming_config(self.settings)
+        provider = WebSocketTickProvider(config["url"], config["reconnect_max_seconds"], config["currency"])
+        ingestor = StreamingIngestor(self, provider, config)
+        logger.info("Streaming %d assets from %s...", len(self.filtered_assets), config["url"])
+        self.stream_task = asyncio.create_task(ingestor.run(list(self.filtered_assets)), name="stream-ingestor")
 
     async def fetch_live_data(self):
         """Fetch live data for all tracked assets periodically."""
@@ -305,48 +351,53 @@ class DataCollectorAgent:
             logger.warning("No filtered assets to fetch live data for.")
             return
 
-        logger.info("Fetching live data for tracked assets: %s", self.filtered_assets)
+        logger.info("Fetching live data for %d tracked assets.", len(self.filtered_assets))
 
-        # Fetch HTF data
-        htf_tasks = [asyncio.create_task(self.process_ohlcv(asset, "htf")) for asset in self.filtered_assets]
-        await asyncio.gather(*htf_tasks)
-        
-        # Fetch LTF data
-        ltf_tasks = [asyncio.create_task(self.process_ohlcv(asset, "ltf")) for asset in self.filtered_assets]
-        await asyncio.gather(*ltf_tasks)
+        # Fetch HTF data, then LTF data
+        await self.run_fetch_cycle(self.filtered_assets, ["htf"])
+        await self.run_fetch_cycle(self.filtered_assets, ["ltf"])
 
         logger.info("✅ Finished fetching data for %d assets. Check logs for assets with missing or partial data.", len(self.filtered_assets))
 
 
-    async def fetch_ltf_data(self):
-        """Fetch LTF data for all tracked assets."""
-        if common.is_weekend_or_holiday():
-            # Fetch only crypto data
-            assets = [asset for asset in self.filtered_assets if asset.endswith("-USD")]
-        elif common.is_market_open():
-            # Fetch stock data during market hours
-            assets = [asset for asset in self.filtered_assets if not asset.endswith("-USD")]
-        else:
-            logger.info("Market is closed. Skipping LTF data fetch.")
+    async def scan_for_gaps(self):
+        """Find missing bars for every tracked asset and timeframe and queue their backfill."""
+        if not self.filtered_assets:
             return
-
-        logger.info("Fetching LTF data for tracked assets...")
-        tasks = [asyncio.create_task(self.process_ohlcv(asset, "ltf")) for asset in assets]
-        await asyncio.gather(*tasks)
-
-
-    async def fetch_htf_data(self):
-        """Fetch HTF data for all tracked assets."""
-        if common.is_weekend_or_holiday():
-            # Fetch only crypto data
-            assets = [asset for asset in self.filtered_assets if asset.endswith("-USD")]
-        elif common.is_market_open():
-            # Fetch stock data during market hours
-            assets = [asset for asset in self.filtered_assets if not asset.endswith("-USD")]
-        else:
-            logger.info("Market is closed. Skipping HTF data fetch.")
+        # Gaps Yahoo had nothing for (halts, missing history) wait out the cooldown
+        cooling_down = await self.watermarks.backfill_cooldowns(self.backfill_config["retry_after_hours"] * 3600)
+        for timeframe_key, timeframe in self.timeframes.items():
+            gaps = await self.gap_scanner.scan(
+                self.filtered_assets, timeframe, self.history[f"{timeframe_key}_lookback_days"],
+                merge_gap_bars=self.backfill_config["merge_gap_bars"],
+            )
+            queued = skipped = 0
+            for asset, ranges in gaps.items():
+                for start, end in ranges:
+                    if self.watermarks.backfill_field(asset, timeframe, start) in cooling_down:
+                        skipped += 1
+                        continue
+                    self.backfill.enqueue(asset, timeframe, start.to_pydatetime(), end.to_pydatetime())
+                    queued += 1
+            logger.info("Gap scan (%s): %d assets with gaps, %d ranges queued for backfill, %d cooling down.",
+                        timeframe, len(gaps), queued, skipped)
+
+    async def stop(self):
+        if self.stream_task is not None:
+            self.stream_task.cancel()
+            await asyncio.gather(self.stream_task, return_exceptions=True)
+            self.stream_task = None
+        await self.backfill.stop()
+
+    async def fetch_timeframe(self, timeframe_key, asset_class):
+        """
+        Fetch one timeframe ("ltf" or "htf") for the tracked assets of one asset class.
+
+        Called by the scheduler on every candle close while the asset class's market is open.
+        """
+        assets = [asset for asset in self.filtered_assets if trading_calendar.asset_class(asset) == asset_class]
+        if not assets:
             return
 
-        logger.info("Fetching HTF data for tracked assets...")
-        tasks = [asyncio.create_task(self.process_ohlcv(asset, "htf")) for asset in assets]
-        await asyncio.gather(*tasks)
\ No newline at end of file
+        logger.info("Fetching %s data for %d %s assets...", timeframe_key.upper(), len(assets), asset_class)
+        await self.run_fetch_cycle(assets, [timeframe_key])
@@ -0,0 +1,139 @@
+"""
+Local WebSocket feed that replays stored candles as trades.
+
+Stand-in for a live market-data WebSocket in development and tests: it speaks the
+TickProvider message format (agents/market_data_collector/streaming.py), so the
+streaming ingestion mode can be exercised end to end without a vendor account.
+
+    python -m agents.market_data_collector.replay_server --timeframe 5m --days 1 --speed 60
+"""
+import argparse
+import asyncio
+import json
+import logging
+import pandas as pd
+from sqlalchemy.sql import text
+from core.db.storage_policy import ohlcv_table
+from core.scheduler.candle_scheduler import timeframe_seconds
+
+logger = logging.getLogger("agents.data_collector.replay_server")
+
+MS = 1000
+
+
+def candle_ticks(candle, period_ms):
+    """
+    Four trades reproducing a candle (open, high, low, close), spread over its period.
+
+    Args:
+        candle: Row with symbol, timestamp, open, high, low, close, volume.
+        period_ms (int): Candle length in milliseconds.
+    """
+    start = pd.Timestamp(candle["timestamp"]).value // 10**6
+    size = float(candle["volume"]) / 4
+    offsets = (0, period_ms // 4, period_ms // 2, period_ms - 1)
+    prices = (candle["open"], candle["high"], candle["low"], candle["close"])
+    return [
+        {"type": "trade", "symbol": candle["symbol"], "t": start + offset, "price": float(price), "size": size}
+        for offset, price in zip(offsets, prices)
+    ]
+
+
+class ReplayServer:
+    """
+    Serve OHLCV candles to each subscriber as trades, in timestamp order.
+
+    The currency of the prices is announced first, so that subscribers do not
+    convert stored (already converted) bars again. After each candle period a
+    heartbeat carries the feed clock to the period's end, so subscribers close the
+    candle without waiting for the next trade. An "end" message follows the last
+    candle.
+    """
+
+    def __init__(self, candles, timeframe, currency=None, speed=0.0, host="localhost", port=8765):
+        """
+        Args:
+            candles (pd.DataFrame): symbol, timestamp, open, high, low, close, volume.
+            timeframe (str): Timeframe of the candles ("5m", "1h", ...).
+            currency (str): Currency of the candles' prices (None: not announced).
+            speed (float): Replay speed as a multiple of real time; 0 replays as fast as possible.
+        """
+        self.candles = candles.sort_values(["timestamp", "symbol"]).reset_index(drop=True)
+        self.period_ms = timeframe_seconds(timeframe) * MS
+        self.currency = currency
+        self.speed = speed
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def handler(self, websocket):
+        request = json.loads(await websocket.recv())
+        symbols = set(request.get("symbols", []))
+        candles = self.candles[self.candles["symbol"].isin(symbols)] if symbols else self.candles
+        logger.info("Replaying %d candles of %d symbols.", len(candles), candles["symbol"].nunique())
+        if self.currency:
+            await websocket.send(json.dumps({"type": "info", "currency": self.currency}))
+        for timestamp, group in candles.groupby("timestamp", sort=True):
+            ticks = [tick for _, candle in group.iterrows() for tick in candle_ticks(candle, self.period_ms)]
+            for tick in sorted(ticks, key=lambda tick: tick["t"]):
+                await websocket.send(json.dumps(tick))
+            if self.speed:
+                await asyncio.sleep(self.period_ms / MS / self.speed)
+            heartbeat = pd.Timestamp(timestamp).value // 10**6 + self.period_ms
+            await websocket.send(json.dumps({"type": "heartbeat", "t": heartbeat}))
+        await websocket.send(json.dumps({"type": "end"}))
+
+    async def start(self):
+        import websockets
+
+        self._server = await websockets.serve(self.handler, self.host, self.port)
+        logger.info("Replay feed listening on ws://%s:%d", self.host, self.port)
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+def load_candles(engine, timeframe, days, symbols=None):
+    """Read the last `days` of one timeframe from its OHLCV hypertable."""
+    query = f"""
+        SELECT symbol, timestamp, open, high, low, close, volume FROM {ohlcv_table(timeframe)}
+        WHERE timeframe = :timeframe AND timestamp >= NOW() - make_interval(days => :days)
+    """
+    params = {"timeframe": timeframe, "days": days}
+    if symbols:
+        query += " AND symbol = ANY(:symbols)"
+        params["symbols"] = list(symbols)
+    with engine.connect() as conn:
+        return pd.read_sql(text(query), conn, params=params)
+
+
+async def serve(args):
+    from core.config.config_loader import load_settings
+    from core.db.engine import get_sync_engine
+    from core.fx.fx_service import get_fx_config
+
+    settings = load_settings()
+    candles = load_candles(get_sync_engine(settings["database"]), args.timeframe, args.days, args.symbols)
+    # Stored bars were converted on the way in
+    currency = get_fx_config(settings)["target_currency"]
+    server = await ReplayServer(candles, args.timeframe, currency, speed=args.speed, host=args.host, port=args.port).start()
+    try:
+        await asyncio.Future()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--timeframe", default="5m")
+    parser.add_argument("--days", type=int, default=1)
+    parser.add_argument("--symbols", nargs="*")
+    parser.add_argument("--speed", type=float, default=60.0, help="Multiple of real time; 0 for as fast as possible")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    asyncio.run(serve(parser.parse_args()))
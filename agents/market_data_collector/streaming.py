@@ -0,0 +1,259 @@
+import asyncio
+import heapq
+import json
+import logging
+import time
+import pandas as pd
+from prometheus_client import Counter, Histogram
+from sqlalchemy.sql import text
+from core.calendar.trading_calendar import calendar_for
+from core.db.storage_policy import ohlcv_table
+from core.observability.metrics import track_queue
+from core.scheduler.candle_scheduler import timeframe_seconds
+
+logger = logging.getLogger("agents.data_collector.streaming")
+
+TICKS = Counter("stream_ticks_total", "Ticks received from the streaming provider")
+BARS_CLOSED = Counter("stream_bars_closed_total", "Candles closed by the stream aggregator", ["timeframe"])
+BAR_CLOSE_LAG = Histogram(
+    "stream_bar_close_lag_seconds", "Wall time between a candle's close and its bar-close event",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+
+DEFAULT_STREAMING = {
+    "url": "ws://localhost:8765",
+    "batch_interval_ms": 250,  # Closed bars are written together at most this often
+    "reconnect_max_seconds": 30,
+    "currency": None,  # Currency of the feed's prices (default: fx.source_currency); a replay feed announces its own
+}
+
+MS = 1000
+
+
+def get_streaming_config(settings):
+    config = dict(DEFAULT_STREAMING)
+    config.update((settings.get("ingestion", {}) or {}).get("stream", {}) or {})
+    return config
+
+
+class TickProvider:
+    """
+    Source of real-time trades.
+
+    stream() yields dicts: {"type": "trade", "symbol", "t" (epoch ms), "price", "size"}
+    or {"type": "heartbeat", "t"}. Heartbeats carry the feed's clock so that candles
+    close on time even when a symbol has no trades.
+
+    `currency` is the currency of the prices; None means fx.source_currency.
+    """
+
+    currency = None
+
+    async def stream(self, symbols):
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+
+class WebSocketTickProvider(TickProvider):
+    """
+    Trades from a WebSocket feed speaking the TickProvider message format.
+
+    Reconnects with backoff whenever the connection drops, cleanly or not. The feed
+    may also send {"type": "info", "currency"} (recorded as the provider's currency)
+    and {"type": "end"}, after which the stream finishes (a replay that ran out).
+    """
+
+    def __init__(self, url, reconnect_max_seconds=30, currency=None):
+        self.url = url
+        self.reconnect_max_seconds = reconnect_max_seconds
+        self.currency = currency
+
+    async def stream(self, symbols):
+        import websockets  # Only needed in streaming mode
+
+        backoff = 1
+        while True:
+            try:
+                async with websockets.connect(self.url) as ws:
+                    await ws.send(json.dumps({"action": "subscribe", "symbols": list(symbols)}))
+                    logger.info("Subscribed to %d symbols on %s.", len(symbols), self.url)
+                    backoff = 1
+                    async for raw in ws:
+                        message = json.loads(raw)
+                        if message.get("type") == "info":
+                            self.currency = message.get("currency", self.currency)
+                        elif message.get("type") == "end":
+                            logger.info("Stream on %s ended.", self.url)
+                            return
+                        else:
+                            yield message
+                reason = "closed by the feed"
+            except (OSError, websockets.WebSocketException) as e:
+                reason = str(e)
+            logger.warning("Stream connection to %s lost (%s); reconnecting in %ss.", self.url, reason, backoff)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.reconnect_max_seconds)
+
+
+class CandleAggregator:
+    """
+    Build candles from trades, per symbol and timeframe, in memory.
+
+    Candles are laid out like the bars yfinance returns and the gap scan expects:
+    from each session open of the symbol's trading calendar (1h equity bars start
+    at 9:30 ET and the last one ends at the close), or on the UTC grid for markets
+    that never close. Trades outside a session are ignored. Candles close when the
+    feed's clock (event time) passes their end: on a later trade or on a heartbeat.
+    """
+
+    def __init__(self, timeframes):
+        self.periods = {timeframe: timeframe_seconds(timeframe) * MS for timeframe in timeframes}
+        self.candles = {}  # (symbol, timeframe) -> candle dict
+        self.closing = []  # Heap of (end, symbol, timeframe), one per open candle
+        self.sessions = {}  # symbol -> (open, close) ms of its session in progress
+        self.clock = 0  # Latest feed time seen (epoch ms)
+
+    def session(self, symbol, t):
+        """(open, close) ms of the session trading at `t`, (None, None) for an always-open market, or None."""
+        cached = self.sessions.get(symbol)
+        if cached is not None and (cached[0] is None or cached[0] <= t < cached[1]):
+            return cached
+        calendar = calendar_for(symbol)
+        if calendar.always_open:
+            session = (None, None)
+        else:
+            at = pd.Timestamp(t, unit="ms", tz="UTC")
+            opens, closes = calendar.sessions_between(at, at + pd.Timedelta(milliseconds=1))
+            if len(opens) == 0:
+                return None
+            session = (int(opens[0]) // 10**6, int(closes[0]) // 10**6)
+        self.sessions[symbol] = session
+        return session
+
+    def add_trade(self, symbol, t, price, size):
+        """Add a trade; return the candles it closed."""
+        closed = self.advance(t)
+        session = self.session(symbol, t)
+        if session is None:
+            return closed  # Outside regular trading hours
+        session_open, session_close = session
+        for timeframe, period in self.periods.items():
+            if session_open is None:
+                start = t // period * period
+                end = start + period
+            else:
+                start = session_open + (t - session_open) // period * period
+                end = min(start + period, session_close)
+            key = (symbol, timeframe)
+            candle = self.candles.get(key)
+            if candle is None:
+                if end <= self.clock:
+                    continue  # Late trade for a candle that already closed
+                self.candles[key] = {
+                    "symbol": symbol, "timeframe": timeframe, "start": start, "end": end,
+                    "open": price, "high": price, "low": price, "close": price, "volume": size,
+                }
+                heapq.heappush(self.closing, (end, symbol, timeframe))
+            elif start == candle["start"]:
+                candle["high"] = max(candle["high"], price)
+                candle["low"] = min(candle["low"], price)
+                candle["close"] = price
+                candle["volume"] += size
+            # Trades older than the open candle (late or out of order) are dropped
+        return closed
+
+    def advance(self, t):
+        """Move the feed clock to `t` and return the candles that ended by then."""
+        self.clock = max(self.clock, t)
+        closed = []
+        while self.closing and self.closing[0][0] <= self.clock:
+            _, symbol, timeframe = heapq.heappop(self.closing)
+            closed.append(self.candles.pop((symbol, timeframe)))
+        return closed
+
+
+class StreamingIngestor:
+    """
+    Streaming ingestion mode of the DataCollectorAgent.
+
+    Trades are aggregated into the configured timeframes. Closed candles are
+    written in micro-batches (one INSERT per batch) and a bar-close event is
+    published for each right after its batch commits.
+    """
+
+    def __init__(self, agent, provider, config):
+        self.agent = agent
+        self.provider = provider
+        self.config = config
+        self.aggregator = CandleAggregator(agent.timeframes.values())
+        self._pending = asyncio.Queue()
+        track_queue("stream_bars", self._pending.qsize)
+
+    async def run(self, symbols):
+        """Consume the feed until it ends or the task is cancelled."""
+        writer = asyncio.create_task(self._write_batches(), name="stream-writer")
+        try:
+            async for message in self.provider.stream(symbols):
+                if message.get("type") == "trade":
+                    TICKS.inc()
+                    closed = self.aggregator.add_trade(message["symbol"], int(message["t"]), float(message["price"]), float(message.get("size", 0)))
+                else:
+                    closed = self.aggregator.advance(int(message["t"]))
+                for candle in closed:
+                    self._pending.put_nowait(candle)
+            await self._pending.join()  # Write what the feed closed before it ended
+        finally:
+            writer.cancel()
+            await asyncio.gather(writer, return_exceptions=True)
+
+    async def _write_batches(self):
+        interval = self.config["batch_interval_ms"] / MS
+        while True:
+            batch = [await self._pending.get()]
+            await asyncio.sleep(interval)  # Let the other symbols' candles for this close arrive
+            while not self._pending.empty():
+                batch.append(self._pending.get_nowait())
+            try:
+                await self.write(batch)
+            except Exception as e:
+                logger.error("Failed to write %d streamed bars: %s", len(batch), str(e))
+            finally:
+                for _ in batch:
+                    self._pending.task_done()
+
+    def to_frame(self, candles):
+        df = pd.DataFrame({
+            "symbol": [c["symbol"] for c in candles],
+            "timeframe": [c["timeframe"] for c in candles],
+            "timestamp": pd.to_datetime([c["start"] for c in candles], unit="ms", utc=True),
+            **{column: [float(c[column]) for c in candles] for column in ("open", "high", "low", "close", "volume")},
+        })
+        # No-op when the feed is already in the target currency (a replay of stored bars)
+        return self.agent.fx.convert(df, base=self.provider.currency)
+
+    async def write(self, candles):
+        """Store a batch of closed candles (bars already stored are kept) and publish their bar-close events."""
+        df = self.to_frame(candles)
+        async with self.agent.db_engine.begin() as conn:
+            for timeframe, rows in df.groupby("timeframe", sort=False):
+                await conn.execute(
+                    text(f"""
+                        INSERT INTO {ohlcv_table(timeframe)} (symbol, timeframe, timestamp, open, high, low, close, volume)
+                        VALUES (:symbol, :timeframe, :timestamp, :open, :high, :low, :close, :volume)
+                        ON CONFLICT (symbol, timestamp, timeframe) DO NOTHING
+                    """),
+                    [{**row, "timestamp": row["timestamp"].to_pydatetime()} for row in rows.to_dict("records")]
+                )
+        now_ms = time.time() * MS
+        ends = {}
+        for c in candles:
+            ends[(c["symbol"], c["timeframe"])] = max(c["end"], ends.get((c["symbol"], c["timeframe"]), 0))
+        watermarks = {}
+        for (symbol, timeframe), bars in df.groupby(["symbol", "timeframe"], sort=False):
+            await self.agent.wait_for_bus_capacity()
+            await self.agent.publish_raw_data_event(symbol, timeframe, bars.reset_index(drop=True))
+            watermarks[(symbol, timeframe)] = bars["timestamp"].iloc[-1]
+            BARS_CLOSED.labels(timeframe=timeframe).inc(len(bars))
+            BAR_CLOSE_LAG.observe(max(0.0, (now_ms - ends[(symbol, timeframe)]) / MS))
+        await self.agent.watermarks.set_many(watermarks)
+        logger.info("Stored and published %d streamed bars.", len(candles))
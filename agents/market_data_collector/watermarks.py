@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+import pandas as pd
+import redis
+from sqlalchemy.sql import text
+from core.db.storage_policy import ohlcv_table
+
+logger = logging.getLogger("agents.data_collector.watermarks")
+
+REDIS_KEY = "last_fetched"  # Hash: "{symbol}:{timeframe}" -> ISO timestamp of the last stored bar
+BACKFILL_KEY = "backfill_attempts"  # Hash: "{symbol}:{timeframe}:{start}" -> epoch seconds of the last fruitless backfill
+
+
+class WatermarkStore:
+    """
+    Last-fetched timestamps of every (symbol, timeframe), read and written once per
+    fetch cycle.
+
+    Watermarks live in one Redis hash without expiry, so a restart resumes where the
+    previous run stopped. Pairs missing from the hash (first run, lost Redis data)
+    fall back to the newest bar stored in the OHLCV hypertables, in one query per cycle.
+
+    A second hash remembers gaps whose backfill came back empty or failed (halts,
+    history Yahoo does not have), so the gap scan can leave them alone for a while.
+    """
+
+    def __init__(self, redis_client, db_engine, key=REDIS_KEY, backfill_key=BACKFILL_KEY):
+        self.redis = redis_client
+        self.db_engine = db_engine
+        self.key = key
+        self.backfill_key = backfill_key
+
+    @staticmethod
+    def field(symbol, timeframe):
+        return f"{symbol}:{timeframe}"
+
+    async def get_many(self, pairs):
+        """
+        Args:
+            pairs (list): (symbol, timeframe) tuples.
+
+        Returns:
+            dict: (symbol, timeframe) -> datetime of the last stored bar, or None.
+        """
+        pairs = list(dict.fromkeys(pairs))
+        if not pairs:
+            return {}
+        try:
+            values = await asyncio.to_thread(self.redis.hmget, self.key, [self.field(*pair) for pair in pairs])
+        except redis.RedisError as e:
+            logger.warning("Watermark hash unavailable (%s); reading watermarks from the database.", e)
+            values = [None] * len(pairs)
+        watermarks = {pair: datetime.fromisoformat(value) if value else None for pair, value in zip(pairs, values)}
+
+        missing = [pair for pair, value in watermarks.items() if value is None]
+        if missing:
+            stored = await self.stored_watermarks(missing)
+            watermarks.update(stored)
+            logger.info("Watermarks: %d from Redis, %d from the database, %d new.",
+                        len(pairs) - len(missing), len(stored), len(missing) - len(stored))
+        return watermarks
+
+    async def stored_watermarks(self, pairs):
+        """Return {(symbol, timeframe): newest stored timestamp} for the pairs that have bars."""
+        tables = sorted({ohlcv_table(timeframe) for _, timeframe in pairs})
+        query = " UNION ALL ".join(
+            f"""
+                SELECT symbol, timeframe, MAX(timestamp) FROM {table}
+                WHERE symbol = ANY(:symbols) AND timeframe = ANY(:timeframes)
+                GROUP BY symbol, timeframe
+            """
+            for table in tables
+        )
+        try:
+            async with self.db_engine.connect() as conn:
+                result = await conn.execute(
+                    text(query),
+                    {"symbols": list({s for s, _ in pairs}), "timeframes": list({tf for _, tf in pairs})}
+                )
+                rows = result.fetchall()
+        except Exception as e:
+            logger.error("Error reading stored watermarks: %s", str(e))
+            return {}
+        wanted = set(pairs)
+        return {(symbol, timeframe): ts for symbol, timeframe, ts in rows if (symbol, timeframe) in wanted and ts is not None}
+
+    async def set_many(self, watermarks):
+        """
+        Store the watermarks of a cycle in one round trip.
+
+        Args:
+            watermarks (dict): (symbol, timeframe) -> datetime, ISO string or pd.Timestamp.
+        """
+        if not watermarks:
+            return
+        mapping = {self.field(*pair): pd.Timestamp(ts).isoformat() for pair, ts in watermarks.items()}
+        try:
+            await asyncio.to_thread(self.redis.hset, self.key, mapping=mapping)
+            logger.info("Updated %d last-fetched watermarks.", len(mapping))
+        except redis.RedisError as e:
+            # Not fatal: the next cycle falls back to ohlcv_data
+            logger.error("Error updating last-fetched watermarks: %s", str(e))
+
+    @staticmethod
+    def backfill_field(symbol, timeframe, start):
+        return f"{symbol}:{timeframe}:{pd.Timestamp(start).isoformat()}"
+
+    async def record_fruitless_backfill(self, symbol, timeframe, start):
+        """Remember that the gap starting at `start` could not be backfilled just now."""
+        try:
+            await asyncio.to_thread(self.redis.hset, self.backfill_key, self.backfill_field(symbol, timeframe, start), int(time.time()))
+        except redis.RedisError as e:
+            logger.error("Error recording backfill attempt: %s", str(e))
+
+    async def backfill_cooldowns(self, cooldown_seconds):
+        """
+        Gaps whose last backfill came back empty or failed less than `cooldown_seconds` ago.
+
+        Older records are deleted in the same pass.
+
+        Returns:
+            set: backfill_field() of each gap to skip.
+        """
+        try:
+            attempts = await asyncio.to_thread(self.redis.hgetall, self.backfill_key)
+            cutoff = time.time() - cooldown_seconds
+            expired = [field for field, at in attempts.items() if float(at) < cutoff]
+            if expired:
+                await asyncio.to_thread(self.redis.hdel, self.backfill_key, *expired)
+        except redis.RedisError as e:
+            logger.error("Error reading backfill attempts: %s", str(e))
+            return set()
+        return set(attempts) - set(expired)
@@ -0,0 +1,136 @@
+import logging
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+from sqlalchemy.sql import text
+
+logger = logging.getLogger("agents.market_research.bar_cache")
+
+TABLE = "research_daily_bars"
+BAR_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+DEFAULT_BAR_CACHE = {
+    "enabled": True,
+    "lookback_days": 30,  # Window handed to the screener
+    "refresh_after_minutes": 60,  # A symbol fetched more recently than this is not fetched again
+    "retention_days": 90,  # Cached bars older than this are deleted
+}
+
+
+def get_bar_cache_config(settings):
+    """Return the agents.market_research.bar_cache settings, filled in with defaults."""
+    config = dict(DEFAULT_BAR_CACHE)
+    config.update(settings["agents"]["market_research"].get("bar_cache", {}) or {})
+    return config
+
+
+class DailyBarCache:
+    """
+    Persistent cache of raw daily bars per symbol in the research_daily_bars table.
+
+    Staleness policy, per symbol:
+      - no cached bars, or the newest is older than the lookback window: download the full window;
+      - fetched less than `refresh_after_minutes` ago: use the cache as is;
+      - otherwise: download from the newest cached day onwards. That day is fetched
+        again because it may have been an unfinished session; its row is overwritten.
+    """
+
+    def __init__(self, db_engine, config):
+        self.db_engine = db_engine
+        self.config = config
+
+    def watermarks(self, symbols):
+        """Return {symbol: (newest bar timestamp, last fetch time)} for the cached symbols."""
+        with self.db_engine.connect() as conn:
+            rows = conn.execute(
+                text(f"""
+                    SELECT symbol, MAX(timestamp), MAX(fetched_at)
+                    FROM {TABLE}
+                    WHERE symbol = ANY(:symbols)
+                    GROUP BY symbol
+                """),
+                {"symbols": list(symbols)}
+            ).fetchall()
+        return {symbol: (last_bar, fetched_at) for symbol, last_bar, fetched_at in rows}
+
+    def plan(self, watermark, now=None):
+        """
+        Decide what to download for one symbol.
+
+        Returns:
+            dict or None: Keyword arguments for the download ({"period": ...} or
+                {"start": ...}), or None when the cached bars are fresh enough.
+        """
+        now = now or datetime.now(timezone.utc)
+        lookback = timedelta(days=self.config["lookback_days"])
+        if watermark is None or watermark[0] < now - lookback:
+            return {"period": f"{self.config['lookback_days']}d"}
+        last_bar, fetched_at = watermark
+        if now - fetched_at < timedelta(minutes=self.config["refresh_after_minutes"]):
+            return None
+        return {"start": last_bar.date().isoformat()}
+
+    def store(self, symbol, df):
+        """Upsert downloaded bars (columns as in BAR_COLUMNS) for a symbol."""
+        rows = [
+            {"symbol": symbol, "timestamp": ts.to_pydatetime(), "open": o, "high": h, "low": l, "close": c, "volume": v}
+            for ts, o, h, l, c, v in zip(
+                pd.to_datetime(df["timestamp"], utc=True), df["open"], df["high"], df["low"], df["close"], df["volume"]
+            )
+        ]
+        if not rows:
+            return
+        with self.db_engine.begin() as conn:
+            conn.execute(
+                text(f"""
+                    INSERT INTO {TABLE} (symbol, timestamp, open, high, low, close, volume, fetched_at)
+                    VALUES (:symbol, :timestamp, :open, :high, :low, :close, :volume, NOW())
+                    ON CONFLICT (symbol, timestamp) DO UPDATE SET
+                        open = EXCLUDED.open, high = EXCLUDED.high, low = EXCLUDED.low,
+                        close = EXCLUDED.close, volume = EXCLUDED.volume, fetched_at = EXCLUDED.fetched_at
+                """),
+                rows
+            )
+
+    def touch(self, symbol):
+        """Record a fetch that returned no new bars, so the symbol counts as fresh."""
+        with self.db_engine.begin() as conn:
+            conn.execute(
+                text(f"""
+                    UPDATE {TABLE} SET fetched_at = NOW()
+                    WHERE symbol = :symbol
+                      AND timestamp = (SELECT MAX(timestamp) FROM {TABLE} WHERE symbol = :symbol)
+                """),
+                {"symbol": symbol}
+            )
+
+    def load(self, symbols):
+        """
+        Read the lookback window for every symbol in one query.
+
+        Returns:
+            dict: Symbol -> DataFrame with BAR_COLUMNS, oldest bar first.
+        """
+        with self.db_engine.connect() as conn:
+            rows = conn.execute(
+                text(f"""
+                    SELECT symbol, timestamp, open, high, low, close, volume
+                    FROM {TABLE}
+                    WHERE symbol = ANY(:symbols)
+                      AND timestamp >= NOW() - make_interval(days => :days)
+                    ORDER BY symbol, timestamp
+                """),
+                {"symbols": list(symbols), "days": int(self.config["lookback_days"])}
+            ).fetchall()
+        if not rows:
+            return {}
+        frame = pd.DataFrame(rows, columns=["symbol"] + BAR_COLUMNS)
+        return {symbol: bars.drop(columns="symbol").reset_index(drop=True) for symbol, bars in frame.groupby("symbol", sort=False)}
+
+    def prune(self):
+        """Delete bars older than the retention period."""
+        with self.db_engine.begin() as conn:
+            result = conn.execute(
+                text(f"DELETE FROM {TABLE} WHERE timestamp < NOW() - make_interval(days => :days)"),
+                {"days": int(self.config["retention_days"])}
+            )
+        logger.info("Pruned %d cached daily bars older than %d days.", result.rowcount, self.config["retention_days"])
@@ -1,17 +1,24 @@
 import logging
 import pandas as pd
 import requests
-from core.redis_bus.redis_stream import RedisStream
+from core.redis_bus.bus import get_bus
 from core.config.config_loader import load_settings
-from sqlalchemy import create_engine
+from core.db.engine import get_sync_engine
+from core.fx.fx_service import get_fx_service
+from core.ratelimit.provider_limiter import get_limiter, yf_history
 import os
 import json
 import yfinance as yf
 import time
+from concurrent.futures import ThreadPoolExecutor
 import agents.common.utils as common
+from agents.market_research.bar_cache import DailyBarCache, get_bar_cache_config
+from agents.market_research.screener import DEFAULT_FILTERS, build_screening_panel, screen_panel
 # Initialize logger
 logger = logging.getLogger("agents.market_research")
 
+DEFAULT_FETCH_WORKERS = 16  # yfinance calls are I/O bound; keep the pool small enough not to get throttled
+
 class MarketResearchAgent:
     def __init__(self, settings_path=None):
         # Load settings
@@ -21,16 +28,16 @@ class MarketResearchAgent:
             self.settings = load_settings()
 
         # Initialize Redis Streams
-        self.redis_stream = RedisStream()
+        self.redis_stream = get_bus()
         self.ticker_updates_channel = self.redis_stream.get_channel("ticker_updater")  # Subscribe to ticker_updates_channel
         self.market_research_signals_channel = self.redis_stream.get_channel("market_research")  # Publish to market_research_signals
 
         # Initialize database connection
-        db_config = self.settings["database"]
-        self.db_engine = create_engine(
-            f"postgresql://{db_config['user']}:{db_config['password']}@{db_config['host']}:{db_config['port']}/{db_config['db']}"
-        )
-        self.exchange_rate = common.get_usd_to_eur_rate()
+        self.db_engine = get_sync_engine(self.settings["database"])
+        bar_cache_config = get_bar_cache_config(self.settings)
+        self.bar_cache = DailyBarCache(self.db_engine, bar_cache_config) if bar_cache_config["enabled"] else None
+        self.fx = get_fx_service(self.settings)
+        self.limiter = get_limiter("yahoo", self.settings)  # Shared with the other agents and processes
         
 
     def subscribe_to_ticker_updates(self):
@@ -66,48 +73,148 @@ class MarketResearchAgent:
             logger.error("Failed to load tickers from file: %s", str(e))
             return []
 
-    def fetch_ohlcv(self, asset, convert_to_eur=True):
-        """Fetch OHLCV data for a given asset using yfinance."""
-        try:
-            logger.debug("Fetching OHLCV data for ticker: %s", asset)
-            ticker = yf.Ticker(asset)
-            df = ticker.history(period="30d", interval="1d")  # Fetch 30 days of daily data
+    def download_bars(self, asset, period="30d", start=None):
+        """
+        Download raw (USD) daily bars for an asset using yfinance.
+
+        Args:
+            asset (str): Ticker symbol.
+            period (str): History to download, e.g. "30d". Falls back to "1d" when empty.
+            start (str): Download from this date (YYYY-MM-DD) instead of a period; no fallback.
+
+        Returns:
+            pd.DataFrame or None: Bars with timestamp, open, high, low, close and volume.
+        """
+        logger.debug("Fetching OHLCV data for ticker: %s", asset)
+        ticker = yf.Ticker(asset)
+        if start:
+            with self.limiter.request():
+                df = yf_history(ticker, start=start, interval="1d")
+            if df.empty:
+                return None
+        else:
+            with self.limiter.request():
+                df = yf_history(ticker, period=period, interval="1d")
 
             # If no data is returned, try fetching 1 day of data
             if df.empty:
-                logger.warning("No data found for asset '%s' with 30d period. Trying 1d period...", asset)
-                df = ticker.history(period="1d", interval="1d")
+                logger.warning("No data found for asset '%s' with %s period. Trying 1d period...", asset, period)
+                with self.limiter.request():
+                    df = yf_history(ticker, period="1d", interval="1d")
 
             # If still no data, log and return None
             if df.empty:
                 logger.warning("No data found for asset '%s' after trying 1d period.", asset)
                 return None
 
-            # Format the DataFrame
-            logger.debug("Raw OHLCV data for %s: %s", asset, df)
-            df.reset_index(inplace=True)
-            df.rename(columns={"Date": "timestamp", "Open": "open", "High": "high", "Low": "low", "Close": "close", "Volume": "volume"}, inplace=True)
-            df = df[["timestamp", "open", "high", "low", "close", "volume"]]
+        # Format the DataFrame
+        logger.debug("Raw OHLCV data for %s: %s", asset, df)
+        df.reset_index(inplace=True)
+        df.rename(columns={"Date": "timestamp", "Open": "open", "High": "high", "Low": "low", "Close": "close", "Volume": "volume"}, inplace=True)
+        return df[["timestamp", "open", "high", "low", "close", "volume"]]
 
-            # Convert prices to EUR if required
-            if convert_to_eur:
-                df.loc[:, ["open", "high", "low", "close"]] = df[["open", "high", "low", "close"]] * self.exchange_rate
-                logger.info("Converted prices for %s to EUR using exchange rate: %.4f", asset, self.exchange_rate)
+    def prepare_bars(self, asset, df, convert_to_eur=True):
+        """Convert raw bars to EUR (at each bar's daily rate) if required and add daily returns."""
+        df = df.copy()
+        if convert_to_eur:
+            self.fx.convert(df)
+            logger.debug("Converted prices for %s to %s.", asset, self.fx.config["target_currency"])
 
-            # Calculate daily returns
-            df["daily_returns"] = (df["close"] - df["open"]) / df["open"]
+        # Calculate daily returns
+        df["daily_returns"] = (df["close"] - df["open"]) / df["open"]
+        return df
 
+    def fetch_ohlcv(self, asset, convert_to_eur=True):
+        """Fetch 30 days of OHLCV data for a given asset using yfinance."""
+        try:
+            df = self.download_bars(asset)
+            if df is None:
+                return None
             logger.info("Fetched OHLCV data for asset: %s", asset)
-            return df
+            return self.prepare_bars(asset, df, convert_to_eur)
         except Exception as e:
             logger.error("Error fetching OHLCV for asset '%s': %s", asset, str(e))
             return None
 
+    def top_up_bars(self, asset, watermark):
+        """
+        Bring the cached daily bars of one asset up to date.
+
+        Returns:
+            int: Number of bars downloaded (0 when the cache was fresh or the download failed).
+        """
+        plan = self.bar_cache.plan(watermark)
+        if plan is None:
+            return 0
+        try:
+            df = self.download_bars(asset, **plan)
+            if df is None:
+                if "start" in plan:
+                    self.bar_cache.touch(asset)  # No new session yet; don't ask again until it goes stale
+                return 0
+            self.bar_cache.store(asset, df)
+            return len(df)
+        except Exception as e:
+            logger.error("Error refreshing cached bars for asset '%s': %s", asset, str(e))
+            return 0
+
+    def fetch_universe(self, assets):
+        """
+        Fetch OHLCV data for every asset once, concurrently.
+
+        Duplicate tickers are fetched a single time. With the daily-bar cache enabled
+        only the bars missing from research_daily_bars are downloaded (see
+        DailyBarCache); otherwise the full window is downloaded with the 30d -> 1d
+        fallback of fetch_ohlcv. Assets without data are left out.
+
+        Returns:
+            dict: Asset -> OHLCV DataFrame, in the order of `assets`.
+        """
+        unique_assets = list(dict.fromkeys(assets))
+        if not unique_assets:
+            return {}
+        start = time.perf_counter()
+        if self.bar_cache is not None:
+            try:
+                ohlcv_data = self._fetch_universe_cached(unique_assets)
+                logger.info(
+                    "Loaded OHLCV data for %d/%d assets in %.1fs.",
+                    len(ohlcv_data), len(unique_assets), time.perf_counter() - start
+                )
+                return ohlcv_data
+            except Exception as e:
+                logger.error("Daily-bar cache unavailable, downloading the full window: %s", str(e))
+
+        with self._fetch_pool(len(unique_assets)) as pool:
+            results = pool.map(self.fetch_ohlcv, unique_assets)
+            ohlcv_data = {asset: df for asset, df in zip(unique_assets, results) if df is not None}
+        logger.info(
+            "Fetched OHLCV data for %d/%d assets in %.1fs.",
+            len(ohlcv_data), len(unique_assets), time.perf_counter() - start
+        )
+        return ohlcv_data
+
+    def _fetch_pool(self, n_assets):
+        max_workers = self.settings["agents"]["market_research"].get("fetch_workers", DEFAULT_FETCH_WORKERS)
+        return ThreadPoolExecutor(max_workers=min(max_workers, n_assets), thread_name_prefix="ohlcv-fetch")
+
+    def _fetch_universe_cached(self, unique_assets):
+        watermarks = self.bar_cache.watermarks(unique_assets)
+        with self._fetch_pool(len(unique_assets)) as pool:
+            downloaded = list(pool.map(lambda asset: self.top_up_bars(asset, watermarks.get(asset)), unique_assets))
+        logger.info(
+            "Downloaded %d daily bars for %d assets (%d served from cache).",
+            sum(downloaded), sum(1 for n in downloaded if n), sum(1 for n in downloaded if not n)
+        )
+        self.bar_cache.prune()
+        cached = self.bar_cache.load(unique_assets)
+        return {asset: self.prepare_bars(asset, cached[asset]) for asset in unique_assets if asset in cached}
+
     # def get_usd_to_eur_rate(self):
     #     """Fetch the current USD to EUR exchange rate."""
     #     try:
     #         ticker = yf.Ticker("EUR=X")  # USD/EUR exchange rate
-    #         df = ticker.history(period="1d", interval="1d")
+    #         df = yf_history(ticker, period="1d", interval="1d")
     #         if not df.empty:
     #             exchange_rate = df["Close"].iloc[-1]  
     #             logger.info("Fetched USD to EUR exchange rate: %.4f", exchange_rate)
@@ -119,62 +226,34 @@ class MarketResearchAgent:
     #         logger.error("Error fetching USD to EUR exchange rate: %s", str(e))
     #         return 1.0  # Default to no conversion if an error occurs
     
-    def filter_assets(self, ohlcv_data, coin50, sp500):
-        """Apply filters to identify assets with unmitigated FVGs and imbalance."""
-        filtered_assets = []
-        config = self.settings["agents"]["market_research"]
+    def screen_assets(self, ohlcv_data, coin50):
+        """
+        Score the whole universe on one symbols x days panel.
 
-        # Extract thresholds from the configuration
-        volume_threshold_stocks = config["volume_threshold"]["stocks"]
-        volume_threshold_crypto = config["volume_threshold"]["crypto"]
-        volatility_threshold = config["volatility_threshold"]
-        # price_change_threshold = config["price_change_threshold"]  # Commented out for now
-        # min_price_stocks = config["min_price"]["stocks"]  # Commented out for now
-        # min_price_crypto = config["min_price"]["crypto"]  # Commented out for now
-
-        for asset, df in ohlcv_data.items():
-            if len(df) < 5:  # Ensure there are enough data points for the rolling window
-                logger.warning("Insufficient data for asset '%s'. Skipping...", asset)
-                continue
-
-            try:
-                # Calculate average volume (Liquidity Filter)
-                avg_volume = df["volume"].tail(5).mean()
-                is_liquid = (
-                    avg_volume > volume_threshold_crypto
-                    if asset in coin50
-                    else avg_volume > volume_threshold_stocks
-                )
-
-                # Calculate daily returns and volatility (Volatility Filter)
-                volatility = df["daily_returns"].tail(14).std()
-                is_volatile = volatility > volatility_threshold
-                # Calculate recent price movement (Momentum Filter) - Commented out for now
-                # recent_change = (df["price"].iloc[-1] - df["price"].iloc[-5]) / df["price"].iloc[-5]
-                # has_momentum = abs(recent_change) > price_change_threshold
-
-                # Check minimum price (Price Filter) - Commented out for now
-                # last_price = df["price"].iloc[-1]
-                # is_valid_price = (
-                #     last_price > min_price_crypto
-                #     if asset in self.settings["tickers"]["coin50"]
-                #     else last_price > min_price_stocks
-                # )
-
-                # Apply only liquidity and volatility filters for now
-                # print(f"{asset}: Vol={avg_volume:.0f}, Volatility={volatility:.4f}")
-                logger.info(
-                    "Asset: %s, Avg Volume: %.0f, Volatility: %.4f",
-                    asset, avg_volume, volatility
-                )
+        Returns:
+            pd.DataFrame: Per-asset metrics, filter results, score and pass/fail, best score first.
+        """
+        config = self.settings["agents"]["market_research"]
+        symbols, panel = build_screening_panel(ohlcv_data)
+        skipped = len(ohlcv_data) - len(symbols)
+        if skipped:
+            logger.warning("Insufficient data for %d assets. Skipping them...", skipped)
+        screen = screen_panel(symbols, panel, coin50, config)
+        logger.debug("Screening results:\n%s", screen)
+        return screen
 
-                # Apply only liquidity and volatility filters for now
-                if is_liquid and is_volatile:
-                    filtered_assets.append(asset)
-            except Exception as e:
-                logger.error("Error filtering asset '%s': %s", asset, str(e))
+    def filter_assets(self, ohlcv_data, coin50, sp500):
+        """
+        Apply the liquidity and volatility filters (plus momentum and minimum price
+        when enabled in agents.market_research.filters).
 
-        logger.info("Filtered %d assets based on liquidity and volatility criteria.", len(filtered_assets))
+        Returns:
+            list: Assets that passed, ranked by screening score (best first).
+        """
+        screen = self.screen_assets(ohlcv_data, coin50)
+        filtered_assets = screen.index[screen["passed"].to_numpy()].tolist()
+        logger.info("Filtered %d assets based on %s criteria.", len(filtered_assets),
+                    " and ".join(self.settings["agents"]["market_research"].get("filters", DEFAULT_FILTERS)))
         return filtered_assets
 
     def store_data(self, asset, df):
@@ -189,10 +268,7 @@ class MarketResearchAgent:
         coin50 = [ticker for ticker in assets if ticker.endswith("-USD")]
         sp500 = [ticker for ticker in assets if not ticker.endswith("-USD")]
 
-        ohlcv_data = {
-            asset: self.fetch_ohlcv(asset) for asset in assets
-            if self.fetch_ohlcv(asset) is not None  # Skip assets with missing data
-        }
+        ohlcv_data = self.fetch_universe(assets)  # Skips assets with missing data
         filtered_assets = self.filter_assets(ohlcv_data, coin50, sp500)
         
         # Publish the filtered assets as a list to the market_research_signals stream
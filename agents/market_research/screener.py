@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+LIQUIDITY_WINDOW = 5  # Days averaged for the liquidity filter
+VOLATILITY_WINDOW = 14  # Days of daily returns for the volatility filter
+MOMENTUM_WINDOW = 5  # Price change measured over the last 5 closes
+DEFAULT_FILTERS = ["liquidity", "volatility"]
+SCREEN_COLUMNS = [
+    "is_crypto", "avg_volume", "volatility", "recent_change", "last_price",
+    "is_liquid", "is_volatile", "has_momentum", "is_valid_price", "score", "passed",
+]
+
+
+def build_screening_panel(ohlcv_data, days=VOLATILITY_WINDOW, min_days=LIQUIDITY_WINDOW):
+    """
+    Stack the last `days` rows of every asset into symbols x days arrays.
+
+    Rows are right-aligned (the latest bar is always the last column) and padded
+    with NaN on the left for assets with a shorter history. Assets with fewer than
+    `min_days` rows are left out.
+
+    Returns:
+        tuple: (symbols, panel) where panel maps "volume", "daily_returns" and "close"
+            to float64 arrays of shape (len(symbols), days).
+    """
+    symbols = [asset for asset, df in ohlcv_data.items() if df is not None and len(df) >= min_days]
+    panel = {}
+    for column in ("volume", "daily_returns", "close"):
+        values = np.full((len(symbols), days), np.nan)
+        for row, asset in enumerate(symbols):
+            tail = ohlcv_data[asset][column].to_numpy(dtype=np.float64)[-days:]
+            values[row, days - len(tail):] = tail
+        panel[column] = values
+    return symbols, panel
+
+
+def _percentile_rank(values):
+    """Cross-sectional percentile rank in [0, 1]; NaN ranks lowest."""
+    return pd.Series(values).rank(pct=True, na_option="top").to_numpy()
+
+
+def screen_panel(symbols, panel, crypto, config):
+    """
+    Apply every screening filter across the whole universe at once.
+
+    Args:
+        symbols (list): Row labels of the panel.
+        panel (dict): Output of build_screening_panel.
+        crypto (iterable): Symbols screened with the crypto thresholds.
+        config (dict): The agents.market_research section of settings.yaml.
+
+    Returns:
+        pd.DataFrame: One row per symbol with the raw metrics, one boolean per filter,
+            a ranking score in [0, 1] and `passed` (all filters in config["filters"]),
+            sorted by score, best first.
+    """
+    if not symbols:
+        return pd.DataFrame(columns=SCREEN_COLUMNS)
+
+    volume, returns, close = panel["volume"], panel["daily_returns"], panel["close"]
+    is_crypto = np.isin(np.asarray(symbols, dtype=object), list(crypto))
+
+    avg_volume = np.nanmean(volume[:, -LIQUIDITY_WINDOW:], axis=1)
+    volatility = np.nanstd(returns[:, -VOLATILITY_WINDOW:], axis=1, ddof=1)
+    reference = close[:, -MOMENTUM_WINDOW]
+    last_price = close[:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        recent_change = (last_price - reference) / reference
+
+    volume_threshold = np.where(is_crypto, config["volume_threshold"]["crypto"], config["volume_threshold"]["stocks"])
+    min_price = config.get("min_price", {})
+    price_threshold = np.where(is_crypto, min_price.get("crypto", 0.0), min_price.get("stocks", 0.0))
+    checks = {
+        "liquidity": avg_volume > volume_threshold,
+        "volatility": volatility > config["volatility_threshold"],
+        "momentum": np.abs(recent_change) > config.get("price_change_threshold", 0.0),
+        "min_price": last_price > price_threshold,
+    }
+    passed = np.logical_and.reduce([checks[name] for name in config.get("filters", DEFAULT_FILTERS)])
+
+    # Equal-weight blend of how liquid, volatile and fast-moving an asset is relative to the universe
+    score = (
+        _percentile_rank(avg_volume / volume_threshold)
+        + _percentile_rank(volatility)
+        + _percentile_rank(np.abs(recent_change))
+    ) / 3
+
+    screen = pd.DataFrame({
+        "is_crypto": is_crypto,
+        "avg_volume": avg_volume,
+        "volatility": volatility,
+        "recent_change": recent_change,
+        "last_price": last_price,
+        "is_liquid": checks["liquidity"],
+        "is_volatile": checks["volatility"],
+        "has_momentum": checks["momentum"],
+        "is_valid_price": checks["min_price"],
+        "score": score,
+        "passed": passed,
+    }, index=pd.Index(symbols, name="asset"))
+    return screen.sort_values("score", ascending=False, kind="stable")
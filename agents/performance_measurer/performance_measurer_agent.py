@@ -1,25 +1,22 @@
 import logging
 import asyncio
 from datetime import datetime, timedelta, timezone
-from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.sql import text
-from core.redis_bus.redis_stream import RedisStream
+from core.redis_bus.bus import get_bus
 from core.config.config_loader import load_settings
+from core.db.engine import get_async_engine
 
 logger = logging.getLogger("agents.performance_measurer")
 
 class PerformanceMeasurerAgent:
     def __init__(self, settings_path=None):
         self.settings = load_settings(settings_path)
-        self.redis_stream = RedisStream()
+        self.redis_stream = get_bus()
 
         # Output stream for notifications or downstream agents
         self.performance_updates_channel = self.redis_stream.get_channel("performance_updates")
 
-        db_cfg = self.settings["database"]
-        self.db_engine = create_async_engine(
-            f"postgresql+asyncpg://{db_cfg['user']}:{db_cfg['password']}@{db_cfg['host']}:{db_cfg['port']}/{db_cfg['db']}"
-        )
+        self.db_engine = get_async_engine(self.settings["database"])
 
     async def start(self):
         logger.info("Starting Performance Measurer Agent...")
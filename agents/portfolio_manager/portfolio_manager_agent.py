@@ -5,8 +5,11 @@ from decimal import Decimal, ROUND_DOWN, InvalidOperation
 from datetime import datetime, timezone
 
 from core.config.config_loader import load_settings
-from core.redis_bus.redis_stream import RedisStream
-from sqlalchemy.ext.asyncio import create_async_engine
+from core.db.engine import get_async_engine
+from core.redis_bus.bus import get_bus
+from core.observability.log_pipeline import sampled
+from core.observability import tracing
+from core.observability.profiler import timed
 from sqlalchemy.sql import text
 from agents.common.utils import convert_decimals # Assuming you might need this
 
@@ -15,17 +18,14 @@ logger = logging.getLogger("agents.portfolio_manager")
 class PortfolioManagerAgent:
     def __init__(self, settings_path=None):
         self.settings = load_settings(settings_path)
-        self.redis_stream = RedisStream()
+        self.redis_stream = get_bus()
 
         # Input stream from Technical Analysis
         self.signal_channel = self.redis_stream.get_channel("technical_analysis")
         # Output stream for Execution Agent
         self.execution_channel = self.redis_stream.get_channel("portfolio_manager") # New channel
 
-        db_cfg = self.settings["database"]
-        self.db_engine = create_async_engine(
-            f"postgresql+asyncpg://{db_cfg['user']}:{db_cfg['password']}@{db_cfg['host']}:{db_cfg['port']}/{db_cfg['db']}"
-        )
+        self.db_engine = get_async_engine(self.settings["database"])
 
         # --- Load Portfolio and Environment Settings ---
         portfolio_cfg = self.settings.get("portfolio", {})
@@ -67,12 +67,13 @@ class PortfolioManagerAgent:
         while True:
             await asyncio.sleep(1) # Keep alive
 
+    @timed("pm.process_signal")
     async def process_signal(self, message):
         """Processes a new trade signal, calculates size, and forwards to execution."""
         async with self.semaphore: # <--- Use the semaphore
             try:
                 signal = message # Assuming message is already a dict
-                logger.info(f"Received trade signal: {signal}")
+                logger.info("Received trade signal: %s", sampled(logger, signal))
                 # Fetch data from db for all the signals that have been persisted in the technical_analysis_signals table only then will there be an id
                 # --- Basic Validation ---
                 required_keys = ["ticker", "direction", "entry_price", "stop_loss", "liquidity_target", "fvg_id","fvg_height","reason", "timeframe", "fvg_direction", "rr"]
@@ -159,7 +160,8 @@ class PortfolioManagerAgent:
                 await self.update_signal_status_in_db(signal_db_id, "sent_to_execution")
 
                 # --- Publish to Execution Agent ---
-                logger.info(f"Forwarding order to execution channel '{self.execution_channel}': {execution_order}")
+                logger.info("Forwarding order to execution channel '%s': %s", self.execution_channel, sampled(logger, execution_order))
+                tracing.inject(execution_order, tracing.mark(tracing.extract(signal), "pm"))
                 # Ensure JSON serializable (convert_decimals handles Decimal, datetime etc.)
                 self.redis_stream.publish(self.execution_channel, convert_decimals(execution_order))
 
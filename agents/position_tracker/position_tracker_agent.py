@@ -3,10 +3,14 @@ import asyncio
 import json
 from datetime import datetime, timezone
 from decimal import Decimal
-from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.sql import text
-from core.redis_bus.redis_stream import RedisStream
+from core.redis_bus.bus import get_bus
+from core.observability.log_pipeline import sampled
+from core.observability import tracing
+from core.redis_bus.bar_payload import read_bars
 from core.config.config_loader import load_settings
+from core.db.engine import get_async_engine
+from core.db.storage_policy import ohlcv_tables
 from agents.common.utils import convert_decimals
 
 logger = logging.getLogger("agents.position_tracker")
@@ -14,17 +18,17 @@ logger = logging.getLogger("agents.position_tracker")
 class PositionTrackerAgent:
     def __init__(self, settings_path=None):
         self.settings = load_settings(settings_path)
-        self.redis_stream = RedisStream()
+        self.redis_stream = get_bus()
 
         # Input stream from ExecutionAgent
         self.execution_results_channel = self.redis_stream.get_channel("execution_results")
         # Output stream for JournalingAgent or other downstream agents
         self.position_updates_channel = self.redis_stream.get_channel("position_updates")
+        # Bars from the DataCollectorAgent keep the latest prices in memory
+        self.data_channel = self.redis_stream.get_channel("data_collector")
+        self.latest_prices = {}  # ticker -> (bar timestamp, close)
 
-        db_cfg = self.settings["database"]
-        self.db_engine = create_async_engine(
-            f"postgresql+asyncpg://{db_cfg['user']}:{db_cfg['password']}@{db_cfg['host']}:{db_cfg['port']}/{db_cfg['db']}"
-        )
+        self.db_engine = get_async_engine(self.settings["database"])
 
     async def start(self):
         logger.info("Starting Position Tracker Agent...")
@@ -35,6 +39,12 @@ class PositionTrackerAgent:
             consumer_name="position_tracker_consumer"
         )
         logger.info(f"Subscribed to Redis stream: {self.execution_results_channel}")
+        self.redis_stream.subscribe(
+            self.data_channel,
+            self.process_bar_event,
+            consumer_group="position_tracker_prices_group",
+            consumer_name="position_tracker_prices_consumer"
+        )
 
         # Start monitoring open positions
         asyncio.create_task(self.monitor_positions())
@@ -45,7 +55,7 @@ class PositionTrackerAgent:
     async def process_execution_result(self, message):
         """Processes execution results and tracks positions."""
         try:
-            logger.info(f"Received execution result: {message}")
+            logger.info("Received execution result: %s", sampled(logger, message))
 
             # Validate required fields
             required_keys = ["execution_id", "symbol", "status", "fill_price", "position_size", "direction", "stop_loss", "take_profit"]
@@ -71,6 +81,7 @@ class PositionTrackerAgent:
             await self.insert_position(
                 execution_id, symbol, direction, fill_price, position_size, stop_loss, take_profit
             )
+            tracing.mark(tracing.extract(message), "tracking")  # Last stage: also observes bar close -> tracked
 
         except Exception as e:
             logger.exception(f"Error processing execution result: {message} - {e}")
@@ -199,17 +210,29 @@ class PositionTrackerAgent:
         except Exception as e:
             logger.exception(f"Error closing position {position}: {e}")
 
+    async def process_bar_event(self, message):
+        """Keep the latest close of each ticker from the bars carried by data events."""
+        bars = read_bars(message, self.redis_stream.redis)
+        if bars is None or bars.empty:
+            return
+        timestamp, close = bars["timestamp"].iloc[-1], bars["close"].iloc[-1]
+        current = self.latest_prices.get(message["ticker"])
+        if current is None or timestamp >= current[0]:
+            self.latest_prices[message["ticker"]] = (timestamp, close)
+
     async def get_latest_price(self, ticker):
-        """Fetches the latest price for a given ticker."""
+        """Fetches the latest price for a given ticker (from the bar events when available)."""
+        if ticker in self.latest_prices:
+            return Decimal(str(self.latest_prices[ticker][1]))
         try:
             async with self.db_engine.connect() as conn:
+                # Newest bar of any timeframe, whichever hypertable holds it
+                latest = " UNION ALL ".join(
+                    f"(SELECT close, timestamp FROM {table} WHERE symbol = :ticker ORDER BY timestamp DESC LIMIT 1)"
+                    for table in ohlcv_tables()
+                )
                 result = await conn.execute(
-                    text("""
-                        SELECT close FROM ohlcv_data
-                        WHERE symbol = :ticker
-                        ORDER BY timestamp DESC
-                        LIMIT 1
-                    """),
+                    text(f"SELECT close FROM ({latest}) latest ORDER BY timestamp DESC LIMIT 1"),
                     {"ticker": ticker}
                 )
                 row = result.fetchone()
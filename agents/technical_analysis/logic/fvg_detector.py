@@ -8,7 +8,9 @@ except ImportError:
 import logging # Added logging
 
 logger = logging.getLogger(__name__) # Use logger for warnings/errors
+from core.observability.profiler import timed
 
+@timed("ta.detect_fvgs")
 def detect_significant_fvgs_atr(df, symbol, timeframe, atr_period=14, atr_multiplier=0.8, min_pct_price=0.003):
     """
     Detect Fair Value Gaps (FVGs) filtering by ATR and minimum percentage of price.
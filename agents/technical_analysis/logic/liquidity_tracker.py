@@ -29,9 +29,11 @@ import pandas as pd
 import numpy as np
 from .msb_detector import detect_swing_points # Reuse swing point logic
 import logging
+from core.observability.profiler import timed
 
 logger = logging.getLogger(__name__)
 
+@timed("ta.detect_liquidity")
 def detect_liquidity_swing(df, symbol, timeframe, swing_order=5, tolerance_factor=0.001):
     """
     Detect liquidity pools based on significant swing points and equal highs/lows.
@@ -54,6 +54,7 @@ import pandas as pd
 import numpy as np
 from scipy.signal import find_peaks
 import logging
+from core.observability.profiler import timed
 
 logger = logging.getLogger(__name__)
 
@@ -86,6 +87,7 @@ def detect_swing_points(df, order=5, col='close'):
         return pd.Index([])
 
 
+@timed("ta.detect_msbs")
 def detect_msbs_swing(df, symbol, timeframe, swing_order=5):
     """
     Detect Market Structure Breaks (MSBs) based on significant swing points.
@@ -7,11 +7,15 @@ import numpy as np
 import pandas as pd
 
 from core.config.config_loader import load_settings
-from core.redis_bus.redis_stream import RedisStream
-from sqlalchemy.ext.asyncio import create_async_engine
+from core.db.engine import get_async_engine
+from core.redis_bus.bus import get_bus
+from core.observability.log_pipeline import sampled
+from core.observability import tracing
+from core.observability.profiler import timed
+from core.redis_bus.bar_payload import read_bars
 from sqlalchemy.sql import text
 from agents.common.utils import convert_decimals, db_fvg_to_logic_fvg
-from agents.technical_analysis.utils.data_loader import load_ohlcv_window
+from agents.technical_analysis.utils.window_cache import OHLCVWindowCache, get_window_cache_config
 from agents.technical_analysis.logic.fvg_detector import detect_significant_fvgs_atr
 from agents.technical_analysis.logic.msb_detector import detect_msbs_swing
 from agents.technical_analysis.logic.liquidity_tracker import detect_liquidity_swing
@@ -22,15 +26,14 @@ logger = logging.getLogger("agents.technical_analysis")
 class TechnicalAnalysisAgent:
     def __init__(self, settings_path=None):
         self.settings = load_settings(settings_path)
-        self.redis_stream = RedisStream()
+        self.redis_stream = get_bus()
         self.data_channel = self.redis_stream.get_channel("data_collector")
         self.signal_channel = self.redis_stream.get_channel("technical_analysis")
-        db_cfg = self.settings["database"]
-        self.db_engine = create_async_engine(
-            f"postgresql+asyncpg://{db_cfg['user']}:{db_cfg['password']}@{db_cfg['host']}:{db_cfg['port']}/{db_cfg['db']}"
-        )
+        self.db_engine = get_async_engine(self.settings["database"])
         self.timeframes = self.settings["timeframes"]
         self.history = self.settings["history"]
+        # Kept current by the bars carried in data events
+        self.windows = OHLCVWindowCache(self.db_engine, **get_window_cache_config(self.settings))
         self._semaphore = None  # Placeholder
         self._loop = None  # Track the loop this agent is tied to
         # self.
@@ -62,11 +65,18 @@ class TechnicalAnalysisAgent:
         while True:
             await asyncio.sleep(1)
 
-    async def _load_and_prepare_data(self, ticker):
+    async def _load_window(self, ticker, timeframe, lookback_days, event_timeframe, new_bars):
+        """Window of the event's timeframe updated with its bars (reloaded when it has none); other timeframes from the cache."""
+        if timeframe != event_timeframe:
+            return await self.windows.get(ticker, timeframe, lookback_days)
+        return await self.windows.get(ticker, timeframe, lookback_days, new_bars=new_bars, refresh=new_bars is None)
+
+    @timed("ta.load_and_prepare")
+    async def _load_and_prepare_data(self, ticker, event_timeframe=None, new_bars=None):
         """Loads HTF/LTF data and detects base features (FVG, Liquidity, MSB)."""
         htf = self.timeframes["htf"]
         htf_lookback = self.history["htf_lookback_days"]
-        htf_df = await load_ohlcv_window(self.db_engine, ticker, htf, htf_lookback)
+        htf_df = await self._load_window(ticker, htf, htf_lookback, event_timeframe, new_bars)
         if htf_df is None or htf_df.empty:
             logger.warning(f"[{ticker}] No HTF data loaded.")
             return None, None, None, None
@@ -77,7 +87,7 @@ class TechnicalAnalysisAgent:
 
         ltf = self.timeframes["ltf"]
         ltf_lookback = self.history["ltf_lookback_days"]
-        ltf_df = await load_ohlcv_window(self.db_engine, ticker, ltf, ltf_lookback)
+        ltf_df = await self._load_window(ticker, ltf, ltf_lookback, event_timeframe, new_bars)
         if ltf_df is None or ltf_df.empty:
             logger.warning(f"[{ticker}] No LTF data loaded.")
             return htf_df, None, None, None # Return htf_df just in case
@@ -222,14 +232,17 @@ class TechnicalAnalysisAgent:
             return entry_price - adjusted_distance
 
     # --- Main Orchestration Method ---
+    @timed("ta.process_new_data")
     async def process_new_data(self, message):
         """Orchestrates the technical analysis process."""
         try:
-            logger.info("Received new data event: %s", message)
+            logger.info("Received new data event: %s", sampled(logger, {k: v for k, v in message.items() if k != "bars"}))
             ticker = message["ticker"]
+            trace = tracing.extract(message)
+            new_bars = read_bars(message, self.redis_stream.redis)  # None: re-query the database
 
             # Step 1: Load data and detect base features
-            htf_df, ltf_df, valid_liquidity, msbs, _ = await self._load_and_prepare_data(ticker)
+            htf_df, ltf_df, valid_liquidity, msbs, _ = await self._load_and_prepare_data(ticker, message.get("timeframe"), new_bars)
             if ltf_df is None or ltf_df.empty:
                 return # Exit if essential data is missing
 
@@ -326,11 +339,12 @@ class TechnicalAnalysisAgent:
                             signal["signal_id"] = persisted_signal_id
 
                             # Ensure data is JSON serializable for Redis
+                            tracing.inject(signal, tracing.mark(trace, "ta"))
                             self.redis_stream.publish(self.signal_channel, convert_decimals(signal))
                             # Update FVG status in DB
                             await self.update_fvg_status(fvg["id"], "filled", ltf_df["timestamp"].iloc[idx], confluences, confirming_msb)
 
-                            logger.info(f"[{ticker}] Published trade signal (ID: {persisted_signal_id}) for FVG {fvg['id']}: {signal}")
+                            logger.info("[%s] Published trade signal (ID: %s) for FVG %s: %s", ticker, persisted_signal_id, fvg["id"], sampled(logger, signal))
                             logger.info(f"[{ticker}] FVG {fvg['id']} processed successfully. Signal emitted.") # Use fvg['id']
                             processed_signal = True
                             break # ---> IMPORTANT: Break from inner loop (LTF candles) after finding the FIRST valid signal for this FVG
@@ -423,8 +437,8 @@ class TechnicalAnalysisAgent:
                 {"symbol": symbol, "timeframe": timeframe}
             )
             rows = result.mappings().all()
-            # Convert SQLAlchemy Row objects to dicts
-            return [db_fvg_to_logic_fvg(convert_decimals(row)) for row in rows]
+            # Levels are DOUBLE PRECISION, so rows map straight onto the logic FVG dicts
+            return [db_fvg_to_logic_fvg(row) for row in rows]
 
     async def update_fvg_status(self, fvg_id, status, inversion_time, confluences, msb):
         async with self.db_engine.begin() as conn:
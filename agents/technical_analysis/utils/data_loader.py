@@ -1,6 +1,27 @@
+import numpy as np
 import pandas as pd
 from sqlalchemy.sql import text
 from agents.common.utils import convert_decimals, db_fvg_to_logic_fvg
+from core.db.storage_policy import ohlcv_table
+
+OHLCV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+def decode_ohlcv_rows(rows):
+    """
+    Decode (timestamp, open, high, low, close, volume) rows into column arrays.
+
+    Prices are decoded straight into float64 arrays. DOUBLE PRECISION columns arrive
+    as Python floats; legacy NUMERIC columns (Decimal) are converted in the same pass.
+
+    Returns:
+        dict: Column name -> NumPy array (timestamps as a UTC DatetimeIndex).
+    """
+    columns = list(zip(*rows))
+    decoded = {"timestamp": pd.to_datetime(list(columns[0]), utc=True)}
+    for name, values in zip(PRICE_COLUMNS, columns[1:]):
+        decoded[name] = np.fromiter(values, dtype=np.float64, count=len(values))
+    return decoded
 
 async def load_ohlcv_window(db_engine, symbol, timeframe, lookback_days):
     """Load a window of OHLCV data for a symbol/timeframe from TimescaleDB."""
@@ -10,7 +31,7 @@ async def load_ohlcv_window(db_engine, symbol, timeframe, lookback_days):
         result = await conn.execute(
             text(f"""
                 SELECT timestamp, open, high, low, close, volume
-                FROM ohlcv_data
+                FROM {ohlcv_table(timeframe)}
                 WHERE symbol = :symbol AND timeframe = :timeframe
                   AND timestamp >= NOW() - INTERVAL '{interval_str}'
                 ORDER BY timestamp ASC
@@ -20,8 +41,4 @@ async def load_ohlcv_window(db_engine, symbol, timeframe, lookback_days):
         rows = result.fetchall()
         if not rows:
             return None
-        df = pd.DataFrame(rows, columns=["timestamp", "open", "high", "low", "close", "volume"])
-        for col in ["open", "high", "low", "close", "volume"]:
-            if col in df.columns:
-                df[col] = df[col].astype(float)
-        return df
\ No newline at end of file
+        return pd.DataFrame(decode_ohlcv_rows(rows), columns=OHLCV_COLUMNS)
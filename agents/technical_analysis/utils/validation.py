@@ -1,6 +1,9 @@
 import pandas as pd
 from datetime import time
+from functools import lru_cache
 import logging
+from core.calendar.trading_calendar import TradingCalendar, daily_window_sessions, get_calendar
+from core.observability.profiler import timed
 
 logger = logging.getLogger(__name__)
 
@@ -11,16 +14,25 @@ def is_volume_spike(df, idx, spike_factor=2.0, window=20):
     avg_vol = df["volume"].iloc[idx-window:idx].mean()
     return df["volume"].iloc[idx] > avg_vol * spike_factor
 
+def session_mask(timestamps, sessions=None):
+    """
+    Vectorized session check: True for each timestamp inside a valid session (e.g., London/NY).
+
+    Args:
+        timestamps: Array-like of timestamps (naive values are taken as UTC).
+        sessions (tuple): (start, end) UTC time windows; defaults to London 08:00-11:00
+            and NY 13:30-16:00 UTC.
+    """
+    calendar = get_calendar("KILLZONES") if sessions is None else _window_calendar(tuple(map(tuple, sessions)))
+    return calendar.session_mask(timestamps)
+
+@lru_cache(maxsize=16)
+def _window_calendar(sessions):
+    return TradingCalendar("custom", daily_window_sessions(sessions), include_close=True)
+
 def is_session_time(ts, sessions=None):
     """Check if the timestamp falls within a valid session (e.g., London/NY)."""
-    # Default: London 08:00-11:00 UTC, NY 13:30-16:00 UTC
-    if sessions is None:
-        sessions = [
-            (time(8, 0), time(11, 0)),   # London
-            (time(13, 30), time(16, 0)), # NY
-        ]
-    t = ts.time()
-    return any(start <= t <= end for start, end in sessions)
+    return bool(session_mask([ts], sessions)[0])
 
 # def is_order_block_nearby(df, idx, direction, ob_window=10):
 #     """Stub: Check if an order block is nearby (optional, can be expanded)."""
@@ -95,6 +107,7 @@ def find_order_block(df, msb_candle_idx, msb_direction, lookback=15):
 
 
 # Modified validate_signal to use the new OB detection
+@timed("ta.validate_signal")
 def validate_signal(fvg, msb, df, idx): # Removed unused 'liquidity' argument
     """
     Validate if a trade signal meets confluence criteria.
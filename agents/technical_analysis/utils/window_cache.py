@@ -0,0 +1,82 @@
+import logging
+import time
+import pandas as pd
+from agents.technical_analysis.utils.data_loader import load_ohlcv_window
+from core.scheduler.candle_scheduler import timeframe_seconds
+
+logger = logging.getLogger("agents.technical_analysis.window_cache")
+
+DEFAULT_WINDOW_CACHE = {
+    # A window not loaded or extended for this long is reloaded: replicas of the agent each see
+    # only part of the data events, and the timeframe of an event is the only one it extends
+    "max_age_seconds": 300,
+}
+
+
+def get_window_cache_config(settings):
+    config = dict(DEFAULT_WINDOW_CACHE)
+    config.update(settings.get("window_cache", {}) or {})
+    return config
+
+
+class OHLCVWindowCache:
+    """
+    In-memory lookback windows per (symbol, timeframe).
+
+    Windows are loaded from TimescaleDB once, then kept current with the bars
+    carried by data events (core/redis_bus/bar_payload.py). A window is reloaded
+    when an event has no bars, its bars do not continue the cached window, or the window
+    was last loaded or extended more than max_age_seconds ago (None: never). Bars already
+    in the window win over pushed ones, like the ON CONFLICT DO NOTHING of the writers.
+    """
+
+    def __init__(self, db_engine, max_age_seconds=DEFAULT_WINDOW_CACHE["max_age_seconds"]):
+        self.db_engine = db_engine
+        self.max_age_seconds = max_age_seconds
+        self.windows = {}
+        self.updated_at = {}  # (symbol, timeframe) -> monotonic time the window was last loaded or extended
+
+    async def get(self, symbol, timeframe, lookback_days, new_bars=None, refresh=False):
+        """
+        Return the window of a symbol and timeframe (a copy; None when there is no data).
+
+        Args:
+            new_bars (pd.DataFrame): Bars just published for this symbol and timeframe.
+            refresh (bool): Reload from the database even when the window is cached.
+        """
+        key = (symbol, timeframe)
+        cached = self.windows.get(key)
+        if cached is not None and not refresh and not self._expired(key) and (
+                new_bars is None or self._continues(cached, new_bars, timeframe)):
+            if new_bars is None:
+                return cached.copy()
+            window = self._merge(cached, new_bars, lookback_days)
+        else:
+            window = await load_ohlcv_window(self.db_engine, symbol, timeframe, lookback_days)
+            if window is None:
+                self.windows.pop(key, None)
+                self.updated_at.pop(key, None)
+                return None
+        self.windows[key] = window
+        self.updated_at[key] = time.monotonic()
+        return window.copy()
+
+    def _expired(self, key):
+        if self.max_age_seconds is None:
+            return False
+        return time.monotonic() - self.updated_at.get(key, float("-inf")) > self.max_age_seconds
+
+    @staticmethod
+    def _continues(window, new_bars, timeframe):
+        """Whether the new bars start no later than the bar after the window's last one."""
+        if window.empty or new_bars.empty:
+            return not window.empty
+        next_bar = window["timestamp"].iloc[-1] + pd.Timedelta(seconds=timeframe_seconds(timeframe))
+        return new_bars["timestamp"].iloc[0] <= next_bar
+
+    @staticmethod
+    def _merge(window, new_bars, lookback_days):
+        merged = pd.concat([window, new_bars[window.columns]], ignore_index=True)
+        merged = merged.drop_duplicates("timestamp", keep="first").sort_values("timestamp")
+        start = pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=lookback_days)
+        return merged[merged["timestamp"] >= start].reset_index(drop=True)
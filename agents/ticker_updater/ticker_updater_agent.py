@@ -6,7 +6,8 @@ import yfinance as yf
 import pandas as pd
 from io import StringIO
 from core.config.config_loader import load_settings
-from core.redis_bus.redis_stream import RedisStream
+from core.redis_bus.bus import get_bus
+from core.ratelimit.provider_limiter import get_limiter
 
 # Initialize logger
 logger = logging.getLogger("agents.ticker_updater")
@@ -14,8 +15,9 @@ logger = logging.getLogger("agents.ticker_updater")
 class TickerUpdaterAgent:
     def __init__(self, output_path=None):
         settings = load_settings()
+        self.settings = settings
         self.output_path = output_path or settings["tickers"]["file_path"]
-        self.redis_stream = RedisStream()  # Initialize Redis Streams
+        self.redis_stream = get_bus()  # Initialize Redis Streams
         self.channel = self.redis_stream.get_channel("ticker_updater")  # Fetch stream name from settings.yaml
         logger.info("Initialized TickerUpdaterAgent with stream '%s'.", self.channel)
         
@@ -23,8 +25,9 @@ class TickerUpdaterAgent:
         """Fetch the S&P500 ticker list from Wikipedia."""
         try:
             url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-            response = requests.get(url)
-            response.raise_for_status()
+            with get_limiter("wikipedia", self.settings).request():
+                response = requests.get(url)
+                response.raise_for_status()
             tables = pd.read_html(StringIO(response.text))  # Wrap in StringIO
             sp500_table = tables[0]  # The first table contains the S&P500 tickers
             tickers = sp500_table["Symbol"].tolist()
@@ -39,8 +42,9 @@ class TickerUpdaterAgent:
         try:
             url = "https://api.coingecko.com/api/v3/coins/markets"
             params = {"vs_currency": "eur", "order": "volume_desc", "per_page": 50, "page": 1}
-            response = requests.get(url, params=params)
-            response.raise_for_status()
+            with get_limiter("coingecko", self.settings).request():
+                response = requests.get(url, params=params)
+                response.raise_for_status()  # Inside the limiter so a 429 pauses the bucket
 
             data = response.json()
             # Append "-USD" to each symbol
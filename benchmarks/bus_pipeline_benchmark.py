@@ -0,0 +1,114 @@
+"""
+Run messages through the agents' pipeline of streams on each bus backend and compare.
+
+Usage:
+    python -m benchmarks.bus_pipeline_benchmark [--messages 2000] [--work-ms 0] [--backends memory redis]
+        [--host localhost --port 6379 --db 15]
+
+Four consumer groups mirror the pipeline, data event -> technical analysis -> portfolio
+manager -> execution -> position tracker: each one handles a message (optionally
+sleeping --work-ms, like an agent waiting on its database) and publishes the next one.
+All data events are published at once; the report has the messages/s through the whole
+pipeline and the latency from the data event to the tracker per backend, plus the speedup
+of the in-process backend. The redis backend needs a local Redis; its streams are
+deleted afterwards.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+import uuid
+import redis
+from core.redis_bus.memory_bus import InMemoryBroker, InMemoryBus
+from core.redis_bus.redis_stream import RedisStream
+
+# (consumer group, stream read, stream written; None ends the pipeline)
+STAGES = [
+    ("ta_group", "data_collector_channel", "technical_analysis_signals"),
+    ("pm_group", "technical_analysis_signals", "portfolio_manager_signals"),
+    ("execution_group", "portfolio_manager_signals", "execution_results_channel"),
+    ("position_tracker_group", "execution_results_channel", None),
+]
+
+
+def make_bus(backend, args):
+    if backend == "memory":
+        return InMemoryBus({}, broker=InMemoryBroker())
+    return RedisStream(host=args.host, port=args.port, db=args.db)
+
+
+async def run_pipeline(backend, args):
+    bus = make_bus(backend, args)
+    prefix = f"bench:pipeline:{uuid.uuid4().hex[:8]}:"
+    latencies = []
+    done = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def handler(next_stream):
+        async def handle(message):
+            if args.work_ms:
+                await asyncio.sleep(args.work_ms / 1000)
+            if next_stream is not None:
+                bus.publish(prefix + next_stream, message)
+                return
+            latencies.append(time.time() - float(message["sent_at"]))
+            if len(latencies) >= args.messages:
+                loop.call_soon_threadsafe(done.set)
+        handle.__name__ = f"handle_{next_stream or 'tracked'}"
+        return handle
+
+    for group, source, target in STAGES:
+        bus.subscribe(prefix + source, handler(target), consumer_group=group, consumer_name=f"{group}_bench")
+    await asyncio.sleep(0.2)  # Let the Redis listener threads start
+
+    started = time.perf_counter()
+    for i in range(args.messages):
+        bus.publish(prefix + STAGES[0][1], {"ticker": f"SYM{i % 50}", "timeframe": "5m", "sent_at": repr(time.time())})
+    try:
+        await asyncio.wait_for(done.wait(), args.timeout)
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.perf_counter() - started
+    await bus.drain(timeout=5)
+    if backend == "redis":
+        bus.redis.delete(*(prefix + stream for _, stream, _ in STAGES))
+
+    ordered = sorted(latencies)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3) if ordered else None
+    return {
+        "delivered": len(latencies),
+        "seconds": round(elapsed, 3),
+        "messages_per_sec": round(len(latencies) / elapsed, 1),
+        "latency_ms": {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99), "max": pick(1.0)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--work-ms", type=float, default=0, help="Time each stage spends per message (asyncio.sleep).")
+    parser.add_argument("--backends", nargs="+", choices=["memory", "redis"], default=["memory", "redis"])
+    parser.add_argument("--timeout", type=float, default=300, help="Give up on a backend after this many seconds.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--db", type=int, default=15)
+    parser.add_argument("--verbose", action="store_true", help="Keep the bus's per-message logging (off by default).")
+    args = parser.parse_args()
+    if not args.verbose:
+        logging.disable(logging.INFO)
+
+    report = {"messages": args.messages, "stages": len(STAGES), "work_ms": args.work_ms, "backends": {}}
+    for backend in args.backends:
+        try:
+            report["backends"][backend] = asyncio.run(run_pipeline(backend, args))
+        except redis.ConnectionError as e:
+            report["backends"][backend] = {"error": str(e)}
+    results = report["backends"]
+    if results.get("memory", {}).get("messages_per_sec") and results.get("redis", {}).get("messages_per_sec"):
+        report["memory_speedup"] = round(results["memory"]["messages_per_sec"] / results["redis"]["messages_per_sec"], 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
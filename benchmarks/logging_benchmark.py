@@ -0,0 +1,102 @@
+"""
+Measure the per-message logging cost an agent pays on its own thread.
+
+Usage:
+    python -m benchmarks.logging_benchmark [--messages 5000] [--sample-every 100]
+
+"sync" is the previous setup: StreamHandler and FileHandler on the calling thread,
+each stream message logged in full at INFO with an f-string. "queued" is
+core/observability/log_pipeline.py: a QueueHandler in front of the same handlers
+(JSON file output) and sampled message bodies. Output goes to temporary files.
+"""
+import argparse
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import tempfile
+import time
+from core.observability.log_pipeline import DroppingQueueHandler, JsonFormatter, PayloadSampler, _RoutingListener, sampled
+
+DETAILED = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+def make_message():
+    """A trade signal shaped like the ones on technical_analysis_signals (~3 KB as a string)."""
+    msbs = [
+        {"timestamp": f"2024-03-05T10:{i:02d}:00+00:00", "direction": "bearish", "broken_level": 101.25 + i, "swing_order": 5}
+        for i in range(25)
+    ]
+    return {
+        "ticker": "AAPL", "timeframe": "5m", "direction": "BEARISH", "fvg_id": 1234, "entry_price": 101.5,
+        "stop_loss": 102.75, "liquidity_target": 98.5, "rr": 2.4, "reason": "Inverse FVG + MSB + killzone",
+        "signal_generated_at": "2024-03-05T10:30:00+00:00", "msbs": msbs,
+    }
+
+
+def make_handlers(directory, formatter):
+    console = logging.StreamHandler(open(os.path.join(directory, "console.log"), "w"))
+    console.setFormatter(logging.Formatter(DETAILED))
+    file = logging.FileHandler(os.path.join(directory, "system.log"))
+    file.setFormatter(formatter)
+    return [console, file]
+
+
+def run_sync(messages, message, directory):
+    logger = logging.getLogger("benchmarks.logging.sync")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handlers = make_handlers(directory, logging.Formatter(DETAILED))
+    for handler in handlers:
+        logger.addHandler(handler)
+    started = time.perf_counter()
+    for _ in range(messages):
+        logger.info(f"Received trade signal: {message}")
+    elapsed = time.perf_counter() - started
+    for handler in handlers:
+        handler.close()
+    return {"caller_us_per_message": elapsed / messages * 1e6, "total_us_per_message": elapsed / messages * 1e6}
+
+
+def run_queued(messages, message, directory, sample_every):
+    logger = logging.getLogger("benchmarks.logging.queued")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handlers = make_handlers(directory, JsonFormatter())
+    records = queue.Queue(maxsize=messages + 1)
+    logger.addHandler(DroppingQueueHandler(records, 0))
+    listener = _RoutingListener(records, {0: handlers})
+    listener.start()
+    sampler = PayloadSampler(sample_every)
+    started = time.perf_counter()
+    for _ in range(messages):
+        logger.info("Received trade signal: %s", sampled(logger, message, sampler))
+    caller = time.perf_counter() - started
+    listener.stop()  # Waits for the writer to drain the queue
+    total = time.perf_counter() - started
+    for handler in handlers:
+        handler.close()
+    return {"caller_us_per_message": caller / messages * 1e6, "total_us_per_message": total / messages * 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--sample-every", type=int, default=100)
+    args = parser.parse_args()
+
+    message = make_message()
+    report = {"messages": args.messages, "message_chars": len(str(message)), "sample_every": args.sample_every}
+    with tempfile.TemporaryDirectory() as directory:
+        report["sync"] = run_sync(args.messages, message, directory)
+        report["sync"]["log_bytes"] = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory))
+    with tempfile.TemporaryDirectory() as directory:
+        report["queued"] = run_queued(args.messages, message, directory, args.sample_every)
+        report["queued"]["log_bytes"] = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory))
+    report["caller_speedup"] = report["sync"]["caller_us_per_message"] / report["queued"]["caller_us_per_message"]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
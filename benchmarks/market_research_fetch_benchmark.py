@@ -0,0 +1,80 @@
+"""
+Wall-clock time of the MarketResearchAgent universe fetch: the old sequential
+loop (two fetch_ohlcv calls per asset) against the concurrent, de-duplicated
+fetch_universe.
+
+Usage:
+    python -m benchmarks.market_research_fetch_benchmark [--workers 4 16 32] [--latency 0.3] [--live]
+
+By default fetch_ohlcv is replaced by a sleep of --latency seconds per call, so
+the run needs no network. With --live the real yfinance requests are made for the
+tickers in tickers.json (slow; yfinance may throttle).
+"""
+import argparse
+import json
+import logging
+import time
+from contextlib import nullcontext
+from unittest.mock import patch
+import pandas as pd
+from agents.market_research.market_research_agent import MarketResearchAgent
+from core.fx.fx_service import StaticFXService
+
+logger = logging.getLogger("benchmarks.market_research_fetch")
+
+
+def sequential_fetch(agent, assets):
+    """The previous MarketResearchAgent.run loop."""
+    return {
+        asset: agent.fetch_ohlcv(asset) for asset in assets
+        if agent.fetch_ohlcv(asset) is not None
+    }
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return round(time.perf_counter() - start, 2), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[4, 16, 32], help="Thread pool sizes to try.")
+    parser.add_argument("--latency", type=float, default=0.3, help="Simulated seconds per yfinance request.")
+    parser.add_argument("--assets", type=int, default=550, help="Universe size in simulated mode.")
+    parser.add_argument("--live", action="store_true", help="Make real yfinance requests for tickers.json.")
+    parser.add_argument("--skip-sequential", action="store_true", help="Do not time the old sequential loop.")
+    args = parser.parse_args()
+
+    with patch("agents.market_research.market_research_agent.get_bus"), \
+         patch("agents.market_research.market_research_agent.get_fx_service", return_value=StaticFXService({"USD/EUR": 1.0})):
+        agent = MarketResearchAgent()
+    agent.bar_cache = None  # Time the downloads themselves, not the research_daily_bars cache
+
+    if args.live:
+        assets = agent.fetch_assets()
+        fetch = None
+    else:
+        assets = [f"SYM{i}" for i in range(args.assets)]
+        frame = pd.DataFrame({"open": [1.0] * 30, "close": [1.0] * 30, "volume": [1.0] * 30})
+
+        def fetch(asset, convert_to_eur=True):
+            time.sleep(args.latency)
+            return frame
+
+    report = {"assets": len(assets), "live": args.live, "runs": []}
+    with patch.object(agent, "fetch_ohlcv", fetch) if fetch else nullcontext():
+        if not args.skip_sequential:
+            seconds, result = timed(sequential_fetch, agent, assets)
+            report["runs"].append({"method": "sequential", "seconds": seconds, "fetched": len(result)})
+        for workers in args.workers:
+            agent.settings["agents"]["market_research"]["fetch_workers"] = workers
+            seconds, result = timed(agent.fetch_universe, assets)
+            report["runs"].append({"method": "fetch_universe", "workers": workers, "seconds": seconds, "fetched": len(result)})
+            logger.info("fetch_universe with %d workers: %.2fs", workers, seconds)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
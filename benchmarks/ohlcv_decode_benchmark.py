@@ -0,0 +1,104 @@
+"""
+Compare OHLCV decode time for NUMERIC (Decimal) rows against DOUBLE PRECISION (float) rows.
+
+Usage:
+    python -m benchmarks.ohlcv_decode_benchmark [--rows 2016 50000] [--repeat 20] [--db]
+
+The decode part runs on synthetic rows and needs no database. With --db the
+per-value on-disk size of NUMERIC and float8 is sampled from ohlcv_data.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import logging
+import numpy as np
+import pandas as pd
+from sqlalchemy.sql import text
+from core.config.config_loader import load_settings
+from core.db.engine import get_async_engine, dispose_engines
+from agents.technical_analysis.utils.data_loader import OHLCV_COLUMNS, decode_ohlcv_rows
+
+logger = logging.getLogger("benchmarks.ohlcv_decode")
+
+
+def make_rows(n, as_decimal):
+    """Build n synthetic rows shaped like the ohlcv_data result set."""
+    rng = np.random.default_rng(42)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    cast = (lambda v: Decimal(repr(float(v)))) if as_decimal else float
+    return [
+        (start + timedelta(minutes=5 * i), cast(c + 0.1), cast(c + 0.5), cast(c - 0.5), cast(c), cast(1000 + i))
+        for i, c in enumerate(close)
+    ]
+
+
+def legacy_decode(rows):
+    """The previous load_ohlcv_window decode: object DataFrame, then astype(float) per column."""
+    df = pd.DataFrame(rows, columns=OHLCV_COLUMNS)
+    for col in ["open", "high", "low", "close", "volume"]:
+        df[col] = df[col].astype(float)
+    return df
+
+
+def fast_decode(rows):
+    return pd.DataFrame(decode_ohlcv_rows(rows), columns=OHLCV_COLUMNS)
+
+
+def time_ms(func, rows, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(rows)
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+async def measure_column_sizes():
+    """Average bytes per value when a sample of ohlcv_data prices is stored as NUMERIC vs float8."""
+    settings = load_settings()
+    db_engine = get_async_engine(settings["database"])
+    try:
+        async with db_engine.connect() as conn:
+            result = await conn.execute(text("""
+                SELECT AVG(pg_column_size(close::NUMERIC)) AS numeric_bytes,
+                       AVG(pg_column_size(close::DOUBLE PRECISION)) AS float8_bytes,
+                       AVG(pg_column_size(volume::NUMERIC)) AS numeric_volume_bytes,
+                       AVG(pg_column_size(volume::DOUBLE PRECISION)) AS float8_volume_bytes
+                FROM (SELECT close, volume FROM ohlcv_data LIMIT 100000) sample
+            """))
+            return {k: round(float(v), 2) if v is not None else None for k, v in result.mappings().one().items()}
+    finally:
+        await dispose_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[2016, 8640, 50000], help="Result-set sizes to decode.")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--db", action="store_true", help="Also sample on-disk value sizes from ohlcv_data.")
+    args = parser.parse_args()
+
+    report = {"decode": []}
+    for n in args.rows:
+        numeric_rows = make_rows(n, as_decimal=True)
+        float_rows = make_rows(n, as_decimal=False)
+        report["decode"].append({
+            "rows": n,
+            "numeric_legacy_ms": time_ms(legacy_decode, numeric_rows, args.repeat),
+            "numeric_fast_ms": time_ms(fast_decode, numeric_rows, args.repeat),
+            "float8_legacy_ms": time_ms(legacy_decode, float_rows, args.repeat),
+            "float8_fast_ms": time_ms(fast_decode, float_rows, args.repeat),
+        })
+    if args.db:
+        report["column_bytes"] = asyncio.run(measure_column_sizes())
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,142 @@
+"""
+Measure OHLCV hypertable disk size and read latency before and after applying the storage policy.
+
+Usage:
+    python -m benchmarks.ohlcv_storage_benchmark [--apply] [--symbols 20] [--repeat 5]
+
+Without --apply only the current state is measured. With --apply the policy from
+settings.yaml is applied, eligible chunks are compressed right away, and the
+measurements are repeated so both runs can be compared.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import logging
+from sqlalchemy.sql import text
+from core.config.config_loader import load_settings
+from core.db.engine import get_async_engine, dispose_engines
+from core.db.storage_policy import HYPERTABLE, ohlcv_tables, get_ohlcv_policy, apply_ohlcv_storage_policy, compress_eligible_chunks
+from agents.technical_analysis.utils.data_loader import load_ohlcv_window
+
+logger = logging.getLogger("benchmarks.ohlcv_storage")
+
+
+async def measure_size(db_engine):
+    """Return on-disk size (bytes) and chunk counts, summed over the OHLCV hypertables."""
+    total = {}
+    async with db_engine.connect() as conn:
+        for table in ohlcv_tables():
+            result = await conn.execute(
+                text("SELECT table_bytes, index_bytes, toast_bytes, total_bytes FROM hypertable_detailed_size(:table)"),
+                {"table": table}
+            )
+            size = dict(result.mappings().one())
+            result = await conn.execute(
+                text("""
+                    SELECT COUNT(*) AS chunks, COUNT(*) FILTER (WHERE is_compressed) AS compressed_chunks
+                    FROM timescaledb_information.chunks WHERE hypertable_name = :table
+                """),
+                {"table": table}
+            )
+            size.update(dict(result.mappings().one()))
+            for k, v in size.items():
+                total[k] = total.get(k, 0) + int(v or 0)
+    return total
+
+
+async def time_query(coro_factory, repeat):
+    """Run a query `repeat` times and return latency stats in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await coro_factory()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+async def measure_latency(db_engine, settings, symbols, repeat):
+    """Time the read paths the agents use against the hypertable."""
+    timeframes = settings["timeframes"]
+    history = settings["history"]
+
+    async def ltf_windows():
+        for symbol in symbols:
+            await load_ohlcv_window(db_engine, symbol, timeframes["ltf"], history["ltf_lookback_days"])
+
+    async def htf_windows():
+        for symbol in symbols:
+            await load_ohlcv_window(db_engine, symbol, timeframes["htf"], history["htf_lookback_days"])
+
+    async def full_scan():
+        async with db_engine.connect() as conn:
+            for table in ohlcv_tables():
+                await conn.execute(text(f"SELECT symbol, timeframe, COUNT(*), MAX(close) FROM {table} GROUP BY symbol, timeframe"))
+
+    return {
+        "ltf_window_per_symbol": await time_query(ltf_windows, repeat),
+        "htf_window_per_symbol": await time_query(htf_windows, repeat),
+        "full_history_aggregate": await time_query(full_scan, repeat),
+    }
+
+
+async def run(args):
+    settings = load_settings()
+    db_engine = get_async_engine(settings["database"])
+    try:
+        async with db_engine.connect() as conn:
+            result = await conn.execute(
+                text(f"SELECT DISTINCT symbol FROM {HYPERTABLE} ORDER BY symbol LIMIT :limit"),
+                {"limit": args.symbols}
+            )
+            symbols = [row[0] for row in result.fetchall()]
+        if not symbols:
+            logger.error("No data in '%s'; nothing to benchmark.", HYPERTABLE)
+            return None
+
+        report = {"symbols": len(symbols), "repeat": args.repeat}
+        report["before"] = {
+            "size": await measure_size(db_engine),
+            "latency": await measure_latency(db_engine, settings, symbols, args.repeat),
+        }
+        if args.apply:
+            policy = get_ohlcv_policy(settings)
+            await apply_ohlcv_storage_policy(db_engine, policy)
+            await compress_eligible_chunks(db_engine, policy)
+            report["after"] = {
+                "size": await measure_size(db_engine),
+                "latency": await measure_latency(db_engine, settings, symbols, args.repeat),
+            }
+            before, after = report["before"]["size"]["total_bytes"], report["after"]["size"]["total_bytes"]
+            report["size_ratio"] = round(after / before, 3) if before else None
+        return report
+    finally:
+        await dispose_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apply", action="store_true", help="Apply the storage policy and measure again.")
+    parser.add_argument("--symbols", type=int, default=20, help="Number of symbols to read per latency sample.")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per query.")
+    parser.add_argument("--output", help="Write the JSON report to this file as well as stdout.")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if report is None:
+        return
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,295 @@
+"""
+Measure Redis Streams throughput, end-to-end latency and pending-list growth for the agent bus.
+
+Usage:
+    python -m benchmarks.redis_bus_benchmark [--producers 1 4] [--consumers 1 4] [--messages 20000]
+        [--payload-bytes 256 4096] [--read-count 1 50] [--publish-batch 1 50] [--maxlen 1000 0]
+        [--rate 0] [--host localhost --port 6379 --db 15] [--output report.json] [--compare previous.json]
+
+Every combination of the list options is one scenario on a fresh stream with one
+consumer group; N producer threads publish, M consumer threads read with
+XREADGROUP COUNT=--read-count and acknowledge each read with a single XACK.
+--publish-batch pipelines that many XADDs per round trip and --maxlen trims on
+every XADD as RedisStream.publish used to (0 disables trimming). Each message carries its send time,
+so latency is publish to acknowledgement. Messages trimmed before any consumer read
+them are reported as "lost"; the pending list (PEL) is sampled every 100 ms.
+
+The "redis_stream" scenario runs the agents' own path, RedisStream.publish and
+RedisStream.subscribe (one message per read, one XACK each, time-based retention
+from stream_retention in settings.yaml), with the first
+producer/consumer/payload values. Needs a local Redis; the benchmark's streams are
+deleted afterwards.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import statistics
+import subprocess
+import threading
+import time
+import uuid
+import redis
+from core.redis_bus.redis_stream import RedisStream
+
+logger = logging.getLogger("benchmarks.redis_bus")
+
+GROUP = "bench_group"
+IDLE_SECONDS = 2.0  # Consumers stop once nothing has arrived for this long after the producers finished
+
+
+class Scenario:
+    """Shared counters of one run; consumers add to them under the lock."""
+
+    def __init__(self, expected):
+        self.expected = expected
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.received = 0
+        self.ack_seconds = 0.0
+        self.ack_calls = 0
+        self.producers_done = threading.Event()
+        self.last_received_at = time.perf_counter()
+
+    def record(self, sent_at, now):
+        with self.lock:
+            self.latencies.append(now - sent_at)
+            self.received += 1
+            self.last_received_at = time.perf_counter()
+
+    def finished(self):
+        with self.lock:
+            if self.received >= self.expected:
+                return True
+            return self.producers_done.is_set() and time.perf_counter() - self.last_received_at > IDLE_SECONDS
+
+
+def make_message(payload_bytes):
+    return {"sent_at": "", "payload": "x" * payload_bytes}
+
+
+def produce(client, stream, count, payload_bytes, publish_batch, maxlen, rate):
+    """Publish `count` messages, `publish_batch` XADDs per round trip, at `rate` messages/s (0: unthrottled)."""
+    message = make_message(payload_bytes)
+    trim = {"maxlen": maxlen, "approximate": True} if maxlen else {}
+    interval = publish_batch / rate if rate else 0.0
+    next_at = time.monotonic()
+    sent = 0
+    while sent < count:
+        batch = min(publish_batch, count - sent)
+        pipe = client.pipeline(transaction=False)
+        for _ in range(batch):
+            pipe.xadd(stream, {**message, "sent_at": repr(time.time())}, **trim)
+        pipe.execute()
+        sent += batch
+        if interval:
+            next_at += interval
+            time.sleep(max(0.0, next_at - time.monotonic()))
+
+
+def consume(client, stream, name, read_count, scenario):
+    while not scenario.finished():
+        response = client.xreadgroup(GROUP, name, {stream: ">"}, count=read_count, block=100)
+        for _, entries in response or []:
+            now = time.time()
+            ids = []
+            for entry_id, data in entries:
+                ids.append(entry_id)
+                if data:
+                    scenario.record(float(data["sent_at"]), now)
+            started = time.perf_counter()
+            client.xack(stream, GROUP, *ids)
+            with scenario.lock:
+                scenario.ack_seconds += time.perf_counter() - started
+                scenario.ack_calls += 1
+
+
+def sample_pending(client, stream, samples, stop):
+    while not stop.is_set():
+        try:
+            samples.append(client.xpending(stream, GROUP)["pending"])
+        except redis.RedisError:
+            pass
+        stop.wait(0.1)
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return {
+        "p50_ms": round(pick(0.50), 3), "p90_ms": round(pick(0.90), 3), "p99_ms": round(pick(0.99), 3),
+        "max_ms": round(ordered[-1] * 1000, 3), "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+def summarize(name, params, scenario, publish_seconds, total_seconds, pending):
+    return {
+        "name": name,
+        **params,
+        "published_per_sec": round(scenario.expected / publish_seconds, 1) if publish_seconds else None,
+        "consumed_per_sec": round(scenario.received / total_seconds, 1) if total_seconds else None,
+        "latency": percentiles(scenario.latencies),
+        "ack_us_per_call": round(scenario.ack_seconds / scenario.ack_calls * 1e6, 1) if scenario.ack_calls else None,
+        "pel_max": max(pending, default=0),
+        "pel_end": pending[-1] if pending else 0,
+        "lost": scenario.expected - scenario.received,
+    }
+
+
+def run_scenario(connect, producers, consumers, messages, payload_bytes, read_count, publish_batch, maxlen, rate):
+    client = connect()
+    stream = f"bench:bus:{uuid.uuid4().hex[:8]}"
+    client.xgroup_create(stream, GROUP, id="0-0", mkstream=True)
+    per_producer = messages // producers
+    scenario = Scenario(per_producer * producers)
+    pending, stop = [], threading.Event()
+    threads = [threading.Thread(target=sample_pending, args=(connect(), stream, pending, stop), daemon=True)]
+    threads += [
+        threading.Thread(target=consume, args=(connect(), stream, f"consumer-{i}", read_count, scenario), daemon=True)
+        for i in range(consumers)
+    ]
+    writers = [
+        threading.Thread(target=produce, args=(connect(), stream, per_producer, payload_bytes, publish_batch, maxlen, rate), daemon=True)
+        for _ in range(producers)
+    ]
+    for thread in threads:
+        thread.start()
+    started = time.perf_counter()
+    for thread in writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    publish_seconds = time.perf_counter() - started
+    scenario.producers_done.set()
+    for thread in threads[1:]:
+        thread.join()
+    total_seconds = scenario.last_received_at - started
+    stop.set()
+    threads[0].join()
+    client.delete(stream)
+
+    params = {
+        "producers": producers, "consumers": consumers, "messages": scenario.expected, "payload_bytes": payload_bytes,
+        "read_count": read_count, "publish_batch": publish_batch, "maxlen": maxlen, "rate": rate,
+    }
+    name = f"p{producers}-c{consumers}-{payload_bytes}B-read{read_count}-batch{publish_batch}-maxlen{maxlen or 'none'}"
+    return summarize(name, params, scenario, publish_seconds, total_seconds, pending)
+
+
+def run_redis_stream(args, producers, consumers, payload_bytes):
+    """The agents' path: RedisStream.publish from each producer thread, one RedisStream.subscribe per consumer."""
+    bus = RedisStream(host=args.host, port=args.port, db=args.db)
+    stream = f"bench:bus:{uuid.uuid4().hex[:8]}"
+    per_producer = args.messages // producers
+    scenario = Scenario(per_producer * producers)
+    message = make_message(payload_bytes)
+    pending, stop = [], threading.Event()
+
+    def on_message(data):
+        scenario.record(float(data["sent_at"]), time.time())
+
+    def publish(count):
+        for _ in range(count):
+            bus.publish(stream, {**message, "sent_at": repr(time.time())})
+
+    for i in range(consumers):
+        bus.subscribe(stream, on_message, consumer_group=GROUP, consumer_name=f"consumer-{i}")
+    sampler = threading.Thread(target=sample_pending, args=(bus.redis, stream, pending, stop), daemon=True)
+    sampler.start()
+    writers = [threading.Thread(target=publish, args=(per_producer,), daemon=True) for _ in range(producers)]
+    started = time.perf_counter()
+    for thread in writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    publish_seconds = time.perf_counter() - started
+    scenario.producers_done.set()
+    while not scenario.finished():
+        time.sleep(0.05)
+    total_seconds = scenario.last_received_at - started
+    asyncio.run(bus.drain(timeout=5))
+    stop.set()
+    sampler.join()
+    bus.redis.delete(stream)
+
+    params = {
+        "producers": producers, "consumers": consumers, "messages": scenario.expected, "payload_bytes": payload_bytes,
+        "read_count": 1, "publish_batch": 1, "maxlen": 0, "rate": 0,
+    }
+    return summarize("redis_stream", params, scenario, publish_seconds, total_seconds, pending)
+
+
+def compare(report, previous):
+    """Current / previous consumed_per_sec and p99 latency per scenario name."""
+    before = {scenario["name"]: scenario for scenario in previous.get("scenarios", [])}
+    changes = {}
+    for scenario in report["scenarios"]:
+        old = before.get(scenario["name"])
+        if not old:
+            continue
+        change = {}
+        if old.get("consumed_per_sec") and scenario.get("consumed_per_sec"):
+            change["throughput"] = round(scenario["consumed_per_sec"] / old["consumed_per_sec"], 3)
+        if old.get("latency", {}).get("p99_ms") and scenario.get("latency", {}).get("p99_ms"):
+            change["p99_latency"] = round(scenario["latency"]["p99_ms"] / old["latency"]["p99_ms"], 3)
+        changes[scenario["name"]] = change
+    return changes
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--producers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--consumers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--messages", type=int, default=20000, help="Messages per scenario, split across the producers.")
+    parser.add_argument("--payload-bytes", type=int, nargs="+", default=[256, 4096])
+    parser.add_argument("--read-count", type=int, nargs="+", default=[1, 50])
+    parser.add_argument("--publish-batch", type=int, nargs="+", default=[1, 50])
+    parser.add_argument("--maxlen", type=int, nargs="+", default=[1000, 0], help="Approximate MAXLEN per XADD; 0 disables trimming.")
+    parser.add_argument("--rate", type=float, default=0, help="Messages/s per producer; 0 publishes as fast as possible.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--db", type=int, default=15)
+    parser.add_argument("--skip-redis-stream", action="store_true", help="Do not run the RedisStream scenario.")
+    parser.add_argument("--output", help="Write the report to this JSON file.")
+    parser.add_argument("--compare", help="A report from an earlier run to compare against.")
+    args = parser.parse_args()
+
+    connect = lambda: redis.StrictRedis(host=args.host, port=args.port, db=args.db, decode_responses=True)
+    scenarios = []
+    for producers, consumers, payload_bytes, read_count, publish_batch, maxlen in itertools.product(
+        args.producers, args.consumers, args.payload_bytes, args.read_count, args.publish_batch, args.maxlen
+    ):
+        scenarios.append(run_scenario(connect, producers, consumers, args.messages, payload_bytes, read_count, publish_batch, maxlen, args.rate))
+        logger.info("%s: %s msgs/s, p99 %s ms, lost %d", scenarios[-1]["name"], scenarios[-1]["consumed_per_sec"],
+                    scenarios[-1]["latency"].get("p99_ms"), scenarios[-1]["lost"])
+    if not args.skip_redis_stream:
+        scenarios.append(run_redis_stream(args, args.producers[0], args.consumers[0], args.payload_bytes[0]))
+
+    info = connect().info("server")
+    report = {
+        "revision": git_revision(),
+        "redis_version": info.get("redis_version"),
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "skip_redis_stream")},
+        "scenarios": scenarios,
+    }
+    if args.compare:
+        with open(args.compare) as file:
+            report["compared_to"] = {"file": args.compare, "ratio": compare(report, json.load(file))}
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
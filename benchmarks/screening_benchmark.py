@@ -0,0 +1,96 @@
+"""
+Time the universe-wide screening panel against the previous per-asset loop.
+
+Usage:
+    python -m benchmarks.screening_benchmark [--symbols 550 5000 20000] [--days 30] [--repeat 5]
+
+Runs on synthetic daily bars; needs no network or database.
+"""
+import argparse
+import json
+import statistics
+import time
+import numpy as np
+import pandas as pd
+from agents.market_research.screener import build_screening_panel, screen_panel
+
+CONFIG = {
+    "volume_threshold": {"stocks": 1000000, "crypto": 10000000},
+    "volatility_threshold": 0.02,
+    "price_change_threshold": 0.02,
+    "min_price": {"stocks": 1, "crypto": 0.05},
+    "filters": ["liquidity", "volatility", "momentum", "min_price"],
+}
+
+
+def make_universe(n, days):
+    rng = np.random.default_rng(7)
+    universe = {}
+    for i in range(n):
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+        open_ = close * (1 + rng.normal(0, 0.01, days))
+        universe[f"SYM{i}" if i % 10 else f"SYM{i}-USD"] = pd.DataFrame({
+            "open": open_, "close": close,
+            "volume": rng.lognormal(14, 1, days),
+            "daily_returns": (close - open_) / open_,
+        })
+    return universe
+
+
+def loop_screen(ohlcv_data, crypto):
+    """The previous filter_assets loop, with the momentum and min-price filters enabled."""
+    passed = []
+    for asset, df in ohlcv_data.items():
+        if len(df) < 5:
+            continue
+        is_crypto = asset in crypto
+        avg_volume = df["volume"].tail(5).mean()
+        volatility = df["daily_returns"].tail(14).std()
+        recent_change = (df["close"].iloc[-1] - df["close"].iloc[-5]) / df["close"].iloc[-5]
+        last_price = df["close"].iloc[-1]
+        if (avg_volume > CONFIG["volume_threshold"]["crypto" if is_crypto else "stocks"]
+                and volatility > CONFIG["volatility_threshold"]
+                and abs(recent_change) > CONFIG["price_change_threshold"]
+                and last_price > CONFIG["min_price"]["crypto" if is_crypto else "stocks"]):
+            passed.append(asset)
+    return passed
+
+
+def panel_screen(ohlcv_data, crypto):
+    symbols, panel = build_screening_panel(ohlcv_data)
+    return screen_panel(symbols, panel, crypto, CONFIG)
+
+
+def time_ms(func, *args, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, nargs="+", default=[550, 5000, 20000])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    report = []
+    for n in args.symbols:
+        universe = make_universe(n, args.days)
+        crypto = {asset for asset in universe if asset.endswith("-USD")}
+        symbols, panel = build_screening_panel(universe)
+        report.append({
+            "symbols": n,
+            "loop_ms": time_ms(loop_screen, universe, crypto, repeat=args.repeat),
+            "panel_build_ms": time_ms(build_screening_panel, universe, repeat=args.repeat),
+            "panel_screen_ms": time_ms(screen_panel, symbols, panel, crypto, CONFIG, repeat=args.repeat),
+            "panel_total_ms": time_ms(panel_screen, universe, crypto, repeat=args.repeat),
+        })
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Time the technical-analysis detectors and a full process_new_data pass on synthetic bars.
+
+Usage:
+    python -m benchmarks.ta_detector_benchmark [--sizes 500 2000 8640] [--repeat 5]
+        [--trend 0.05] [--gap-probability 0.02] [--output report.json] [--compare previous.json]
+
+Bars are a seeded random walk with occasional opening gaps (which is what forms
+FVGs); --trend biases each bar's drift as a fraction of its volatility. Sizes are
+LTF (5m) bars; the HTF (1h) window is the same walk aggregated 12:1. The
+process_new_data pass runs on a TechnicalAnalysisAgent whose database and Redis
+calls are replaced by in-memory ones, so it needs neither. Write a report with
+--output and pass it to --compare on a later run to see the change per timing.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import time
+import numpy as np
+import pandas as pd
+from agents.technical_analysis.logic.fvg_detector import detect_significant_fvgs_atr
+from agents.technical_analysis.logic.liquidity_tracker import detect_liquidity_swing
+from agents.technical_analysis.logic.msb_detector import detect_msbs_swing, detect_swing_points
+from agents.technical_analysis.technical_analysis_agent import TechnicalAnalysisAgent
+from agents.technical_analysis.utils.validation import validate_signal
+from agents.technical_analysis.utils.window_cache import OHLCVWindowCache
+from agents.common.utils import db_fvg_to_logic_fvg
+from core.scheduler.candle_scheduler import timeframe_seconds
+
+SYMBOL = "BENCH"
+HTF, LTF = "1h", "5m"
+
+
+def make_ohlcv(n, timeframe=LTF, trend=0.0, volatility=0.002, gap_probability=0.02, gap_size=4.0, seed=7):
+    """
+    Synthetic OHLCV bars ending at the last closed candle of `timeframe`.
+
+    Args:
+        trend (float): Drift per bar as a fraction of `volatility` (0 is a driftless walk, ±0.1 trends clearly).
+        volatility (float): Standard deviation of the log return per bar.
+        gap_probability (float): Chance a bar opens away from the previous close.
+        gap_size (float): Typical opening gap, in units of `volatility`.
+    """
+    rng = np.random.default_rng(seed)
+    gaps = np.where(rng.random(n) < gap_probability, rng.choice([-1.0, 1.0], n) * rng.exponential(gap_size, n), 0.0)
+    returns = rng.normal(trend * volatility, volatility, n)
+    log_close = np.log(100.0) + np.cumsum(gaps * volatility + returns)
+    close = np.exp(log_close)
+    open_ = np.exp(log_close - returns)
+    wick = np.abs(rng.normal(0, volatility / 2, (2, n)))
+    step = pd.Timedelta(seconds=timeframe_seconds(timeframe))
+    end = pd.Timestamp.now(tz="UTC").floor(step) - step
+    return pd.DataFrame({
+        "timestamp": pd.date_range(end=end, periods=n, freq=step),
+        "open": open_,
+        "high": np.maximum(open_, close) * (1 + wick[0]),
+        "low": np.minimum(open_, close) * (1 - wick[1]),
+        "close": close,
+        "volume": rng.lognormal(10, 0.6, n),
+    })
+
+
+def aggregate(df, factor):
+    """Combine every `factor` consecutive bars into one (e.g. 5m -> 1h with 12)."""
+    groups = np.arange(len(df)) // factor
+    return df.groupby(groups).agg(
+        timestamp=("timestamp", "first"), open=("open", "first"), high=("high", "max"),
+        low=("low", "min"), close=("close", "last"), volume=("volume", "sum"),
+    ).reset_index(drop=True)
+
+
+def time_ms(func, make_args, repeat):
+    """Median and best wall time of func(*make_args()); argument set-up is not timed."""
+    samples = []
+    for _ in range(repeat):
+        args = make_args()
+        start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(samples), 3), "min_ms": round(min(samples), 3)}
+
+
+def validation_cases(df, limit=50):
+    """(fvg, msb, df, idx) calls for validate_signal: each MSB with an FVG it confirms, inverted on the next bar."""
+    cases = []
+    for i, msb in enumerate(detect_msbs_swing(df.copy(), SYMBOL, LTF)[:limit]):
+        idx = int(df.index[df["timestamp"] == msb["timestamp"]][0])
+        fvg = {"id": i, "direction": "bearish" if msb["direction"] == "bullish" else "bullish"}
+        cases.append((fvg, msb, df, min(idx + 1, len(df) - 1)))
+    return cases
+
+
+class DryRunTechnicalAnalysisAgent(TechnicalAnalysisAgent):
+    """TechnicalAnalysisAgent with its windows pre-loaded and its database and Redis writes kept in memory."""
+
+    def __init__(self, htf_df, ltf_df):
+        self.timeframes = {"htf": HTF, "ltf": LTF}
+        self.history = {"htf_lookback_days": 36500, "ltf_lookback_days": 36500}
+        self.windows = OHLCVWindowCache(db_engine=None, max_age_seconds=None)
+        self.windows.windows = {(SYMBOL, HTF): htf_df, (SYMBOL, LTF): ltf_df}
+        self.redis_stream = self
+        self.redis = None
+        self.signal_channel = "technical_analysis_signals"
+        self.published = []
+        self.fvg_rows = {}
+        self._ids = itertools.count(1)
+
+    def publish(self, channel, message):
+        self.published.append(message)
+
+    async def persist_new_fvgs(self, symbol, timeframe, fvgs):
+        for fvg in fvgs:
+            key = (fvg["direction"], fvg["fvg_start"], fvg["fvg_end"], fvg["formed_at"])
+            if key not in self.fvg_rows:
+                self.fvg_rows[key] = {
+                    "id": next(self._ids), "symbol": symbol, "timeframe": timeframe, "direction": fvg["direction"],
+                    "high": fvg["fvg_start"], "low": fvg["fvg_end"], "formed_at": fvg["formed_at"], "status": "pending",
+                    "fvg_height": fvg.get("height"), "pct_of_price": fvg.get("pct_of_price"), "avg_height": fvg.get("avg_height"),
+                }
+
+    async def persist_liquidity(self, symbol, timeframe, liquidity):
+        pass
+
+    async def get_pending_fvgs(self, symbol, timeframe):
+        return [db_fvg_to_logic_fvg(row) for row in self.fvg_rows.values() if row["status"] == "pending"]
+
+    async def persist_signal(self, signal_data, msb_info):
+        return next(self._ids)
+
+    async def update_fvg_status(self, fvg_id, status, inversion_time, confluences, msb):
+        for row in self.fvg_rows.values():
+            if row["id"] == fvg_id:
+                row["status"] = status
+
+
+async def time_process_new_data(htf_df, ltf_df, repeat):
+    """One data event per run on a fresh agent, so every run sees the same pending FVGs."""
+    samples, signals = [], 0
+    for _ in range(repeat):
+        agent = DryRunTechnicalAnalysisAgent(htf_df.copy(), ltf_df.copy())
+        start = time.perf_counter()
+        await agent.process_new_data({"ticker": SYMBOL})  # No timeframe or bars: both windows come from the cache
+        samples.append((time.perf_counter() - start) * 1000)
+        signals = len(agent.published)
+    return {"median_ms": round(statistics.median(samples), 3), "min_ms": round(min(samples), 3), "signals": signals}
+
+
+def run_size(n, args):
+    ltf_df = make_ohlcv(n, LTF, args.trend, args.volatility, args.gap_probability, seed=args.seed)
+    htf_df = aggregate(ltf_df, timeframe_seconds(HTF) // timeframe_seconds(LTF))
+    cases = validation_cases(ltf_df)
+
+    def validate_all():
+        for case in cases:
+            validate_signal(*case)
+
+    results = {
+        "bars": n,
+        "detect_significant_fvgs_atr": time_ms(detect_significant_fvgs_atr, lambda: (ltf_df.copy(), SYMBOL, LTF), args.repeat),
+        "detect_swing_points": time_ms(detect_swing_points, lambda: (ltf_df, 5, "high"), args.repeat),
+        "detect_msbs_swing": time_ms(detect_msbs_swing, lambda: (ltf_df, SYMBOL, LTF), args.repeat),
+        "detect_liquidity_swing": time_ms(detect_liquidity_swing, lambda: (ltf_df, SYMBOL, LTF), args.repeat),
+        "validate_signal": {**time_ms(validate_all, lambda: (), args.repeat), "calls": len(cases)},
+        "process_new_data": asyncio.run(time_process_new_data(htf_df, ltf_df, args.repeat)),
+    }
+    results["detections"] = {
+        "fvgs": len(detect_significant_fvgs_atr(ltf_df.copy(), SYMBOL, LTF)),
+        "msbs": len(detect_msbs_swing(ltf_df, SYMBOL, LTF)),
+        "liquidity": len(detect_liquidity_swing(ltf_df, SYMBOL, LTF)),
+    }
+    return results
+
+
+def compare(report, previous):
+    """Current / previous median per size and timing (below 1.0 is faster); sizes missing from either are skipped."""
+    before = {run["bars"]: run for run in previous.get("runs", [])}
+    changes = {}
+    for run in report["runs"]:
+        old = before.get(run["bars"])
+        if old is None:
+            continue
+        changes[str(run["bars"])] = {
+            name: round(timing["median_ms"] / old[name]["median_ms"], 3)
+            for name, timing in run.items()
+            if isinstance(timing, dict) and "median_ms" in timing and old.get(name, {}).get("median_ms")
+        }
+    return changes
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2016, 8640], help="LTF bars per run (2016 = 7 days of 5m).")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--trend", type=float, default=0.0)
+    parser.add_argument("--volatility", type=float, default=0.002)
+    parser.add_argument("--gap-probability", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write the report to this JSON file.")
+    parser.add_argument("--compare", help="A report from an earlier run to compare against.")
+    parser.add_argument("--verbose", action="store_true", help="Keep the detectors' logging (off by default: it dominates the timings).")
+    args = parser.parse_args()
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "verbose")},
+        "runs": [run_size(n, args) for n in args.sizes],
+    }
+    if args.compare:
+        with open(args.compare) as file:
+            report["compared_to"] = {"file": args.compare, "ratio": compare(report, json.load(file))}
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2, default=str)
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
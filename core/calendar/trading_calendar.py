@@ -0,0 +1,227 @@
+import threading
+from datetime import date, time, timedelta
+import holidays
+import numpy as np
+import pandas as pd
+
+NYSE_TZ = "America/New_York"
+NYSE_OPEN = time(9, 30)
+NYSE_CLOSE = time(16, 0)
+NYSE_EARLY_CLOSE = time(13, 0)
+
+# Intraday windows used as a confluence by the technical analysis (UTC)
+DEFAULT_KILLZONES = (
+    (time(8, 0), time(11, 0)),    # London
+    (time(13, 30), time(16, 0)),  # NY
+)
+
+_calendars = {}
+_lock = threading.Lock()
+
+
+def _at(days, clock, tz):
+    """Combine a DatetimeIndex of days with a wall-clock time in `tz`; returns UTC int64 nanoseconds."""
+    offset = pd.Timedelta(hours=clock.hour, minutes=clock.minute)
+    return (days + offset).tz_localize(tz).tz_convert("UTC").asi8.copy()
+
+
+def nyse_sessions(first_day, last_day):
+    """
+    Regular NYSE sessions between two dates (inclusive).
+
+    Weekends and NYSE holidays are skipped. Early closes (13:00) on the day before
+    Independence Day, the day after Thanksgiving and Christmas Eve.
+
+    Returns:
+        tuple: (opens, closes) as sorted UTC int64 nanosecond arrays.
+    """
+    exchange_holidays = holidays.NYSE(years=range(first_day.year, last_day.year + 1))
+    days = pd.bdate_range(first_day, last_day)
+    days = days[np.array([d not in exchange_holidays for d in days.date], dtype=bool)]
+
+    opens = _at(days, NYSE_OPEN, NYSE_TZ)
+    closes = _at(days, NYSE_CLOSE, NYSE_TZ)
+    thanksgiving = {d + timedelta(days=1) for d, name in exchange_holidays.items() if "Thanksgiving" in name}
+    early = np.array([
+        (d.month, d.day) in ((7, 3), (12, 24)) or d in thanksgiving
+        for d in days.date
+    ], dtype=bool)
+    closes[early] = _at(days[early], NYSE_EARLY_CLOSE, NYSE_TZ)
+    return opens, closes
+
+
+def daily_window_sessions(windows, tz="UTC"):
+    """Build a session function with the same intraday windows every calendar day."""
+    def sessions(first_day, last_day):
+        days = pd.date_range(first_day, last_day, freq="D")
+        opens = np.column_stack([_at(days, start, tz) for start, _ in windows]).ravel()
+        closes = np.column_stack([_at(days, end, tz) for _, end in windows]).ravel()
+        order = np.argsort(opens, kind="stable")
+        return opens[order], closes[order]
+    return sessions
+
+
+class TradingCalendar:
+    """
+    Precomputed trading sessions held as sorted open/close arrays.
+
+    Sessions are built a calendar year at a time and extended on demand, so
+    "is open" and "next close" are binary searches and session_mask() checks a
+    whole array of timestamps in one pass.
+    """
+
+    def __init__(self, name, sessions=None, include_close=False):
+        """
+        Args:
+            name (str): Calendar name, e.g. "NYSE".
+            sessions (callable): (first_day, last_day) -> (opens, closes) UTC int64 ns arrays.
+                None means the market never closes (crypto).
+            include_close (bool): Whether the closing instant itself counts as open.
+        """
+        self.name = name
+        self._sessions = sessions
+        self.include_close = include_close
+        self._arrays = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))  # Swapped as one tuple
+        self._years = None  # (first, last) calendar years built
+        self._lock = threading.Lock()
+        if sessions is not None:
+            self._ensure(pd.Timestamp.now(tz="UTC").value)
+
+    @property
+    def always_open(self):
+        return self._sessions is None
+
+    @property
+    def opens(self):
+        return self._arrays[0]
+
+    @property
+    def closes(self):
+        return self._arrays[1]
+
+    def _ensure(self, first_ns, last_ns=None):
+        """Make sure the sessions cover the years of the given instants."""
+        first_year = pd.Timestamp(first_ns, tz="UTC").year
+        last_year = pd.Timestamp(last_ns if last_ns is not None else first_ns, tz="UTC").year
+        if self._years and self._years[0] <= first_year and last_year <= self._years[1]:
+            return
+        with self._lock:
+            if self._years:
+                first_year, last_year = min(first_year, self._years[0]), max(last_year, self._years[1])
+            # Pad a day on both sides so sessions crossing midnight UTC are not cut off
+            self._arrays = self._sessions(date(first_year, 1, 1) - timedelta(days=1), date(last_year, 12, 31) + timedelta(days=1))
+            self._years = (first_year, last_year)
+
+    @staticmethod
+    def _to_ns(timestamps):
+        index = pd.DatetimeIndex(pd.to_datetime(timestamps))
+        index = index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+        return index.asi8
+
+    def session_mask(self, timestamps):
+        """
+        Vectorized session check.
+
+        Args:
+            timestamps: Array-like of timestamps (naive values are taken as UTC).
+
+        Returns:
+            np.ndarray: Boolean array, True where the market is open.
+        """
+        ns = self._to_ns(timestamps)
+        if self.always_open:
+            return np.ones(len(ns), dtype=bool)
+        if len(ns) == 0:
+            return np.zeros(0, dtype=bool)
+        self._ensure(ns.min(), ns.max())
+        opens, closes = self._arrays
+        idx = np.searchsorted(opens, ns, side="right") - 1  # Last session opened at or before each instant
+        close = closes[np.clip(idx, 0, None)]
+        inside = ns <= close if self.include_close else ns < close
+        return (idx >= 0) & inside
+
+    def is_open(self, ts=None):
+        """Whether the market is open at `ts` (now by default)."""
+        ts = pd.Timestamp.now(tz="UTC") if ts is None else ts
+        return bool(self.session_mask([ts])[0])
+
+    def next_close(self, ts=None):
+        """
+        The close of the session in progress at `ts`, or of the next one.
+
+        Returns:
+            pd.Timestamp or None: UTC close time; None for a market that never closes.
+        """
+        if self.always_open:
+            return None
+        ns = self._to_ns([pd.Timestamp.now(tz="UTC") if ts is None else ts])[0]
+        self._ensure(ns, ns + 366 * 86400 * 10**9)
+        closes = self.closes
+        i = np.searchsorted(closes, ns, side="left" if self.include_close else "right")
+        return pd.Timestamp(closes[i], tz="UTC") if i < len(closes) else None
+
+    def next_open(self, ts=None):
+        """The next session open strictly after `ts` (None for a market that never closes)."""
+        if self.always_open:
+            return None
+        ns = self._to_ns([pd.Timestamp.now(tz="UTC") if ts is None else ts])[0]
+        self._ensure(ns, ns + 366 * 86400 * 10**9)
+        opens = self.opens
+        i = np.searchsorted(opens, ns, side="right")
+        return pd.Timestamp(opens[i], tz="UTC") if i < len(opens) else None
+
+    def sessions_between(self, start, end):
+        """
+        Sessions overlapping [start, end).
+
+        Returns:
+            tuple: (opens, closes) UTC int64 ns arrays; always-open markets return one
+                session spanning the whole range.
+        """
+        start_ns, end_ns = self._to_ns([start, end])
+        if self.always_open:
+            return np.array([start_ns]), np.array([end_ns])
+        self._ensure(start_ns, end_ns)
+        opens, closes = self._arrays
+        first = np.searchsorted(closes, start_ns, side="right")
+        last = np.searchsorted(opens, end_ns, side="left")
+        return opens[first:last], closes[first:last]
+
+    def is_trading_day(self, day):
+        """Whether a session opens on the given date (in UTC)."""
+        if self.always_open:
+            return True
+        start = pd.Timestamp(day, tz="UTC").value
+        self._ensure(start)
+        opens = self.opens
+        i = np.searchsorted(opens, start, side="left")
+        return bool(i < len(opens) and opens[i] < start + 86400 * 10**9)
+
+
+CALENDARS = {
+    "NYSE": lambda: TradingCalendar("NYSE", nyse_sessions),
+    "CRYPTO": lambda: TradingCalendar("CRYPTO"),
+    "KILLZONES": lambda: TradingCalendar("KILLZONES", daily_window_sessions(DEFAULT_KILLZONES), include_close=True),
+}
+
+
+def get_calendar(name):
+    """Return the shared calendar for an exchange ("NYSE", "CRYPTO") or "KILLZONES"."""
+    with _lock:
+        calendar = _calendars.get(name)
+        if calendar is None:
+            calendar = _calendars[name] = CALENDARS[name]()
+        return calendar
+
+
+ASSET_CLASS_CALENDARS = {"crypto": "CRYPTO", "equity": "NYSE"}
+
+
+def asset_class(symbol):
+    """Asset class of a ticker: yfinance crypto pairs (BTC-USD) are "crypto", the rest "equity"."""
+    return "crypto" if symbol.endswith("-USD") else "equity"
+
+
+def calendar_for(symbol):
+    """Calendar a ticker trades on: crypto trades 24/7, equities on NYSE."""
+    return get_calendar(ASSET_CLASS_CALENDARS[asset_class(symbol)])
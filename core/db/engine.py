@@ -0,0 +1,159 @@
+import logging
+import threading
+import time
+from prometheus_client import Gauge, Histogram
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+logger = logging.getLogger("core.db.engine")
+
+# Prometheus metrics, labelled by pool (host:port/db)
+POOL_WAIT = Histogram("db_pool_wait_seconds", "Time spent waiting for a pooled DB connection", ["pool"])
+CONNECTION_CHECKOUT = Histogram("db_connection_checkout_seconds", "Time a DB connection is held before being returned", ["pool"])
+CONNECTIONS_CHECKED_OUT = Gauge("db_connections_checked_out", "DB connections currently checked out", ["pool"])
+QUERY_DURATION = Histogram(
+    "db_query_seconds", "DB statement execution time", ["pool", "operation"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+DEFAULT_POOL = {
+    "size": 10,
+    "max_overflow": 5,
+    "timeout": 30,  # Seconds to wait for a free connection before raising
+    "recycle": 1800,  # Seconds before a connection is replaced
+    "statement_cache_size": 500,  # Prepared statements cached per asyncpg connection
+}
+
+_engines = {}
+_sync_engines = {}
+_lock = threading.Lock()
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers wait for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT.labels(getattr(self, "logging_name", None) or "default").observe(time.perf_counter() - start)
+
+
+def build_dsn(db_cfg, driver="postgresql+asyncpg"):
+    """Build a SQLAlchemy URL from the `database` section of settings.yaml."""
+    return f"{driver}://{db_cfg['user']}:{db_cfg['password']}@{db_cfg['host']}:{db_cfg['port']}/{db_cfg['db']}"
+
+
+def _pool_label(db_cfg):
+    return f"{db_cfg['host']}:{db_cfg['port']}/{db_cfg['db']}"
+
+
+def _pool_config(db_cfg):
+    pool = dict(DEFAULT_POOL)
+    pool.update(db_cfg.get("pool", {}) or {})
+    return pool
+
+
+def _operation(statement):
+    """Leading SQL keyword of a statement (SELECT, INSERT, ...), the label of its timing."""
+    words = statement.lstrip().split(None, 1)
+    return words[0].upper() if words else "UNKNOWN"
+
+
+def _instrument(sync_engine, label):
+    """Track checkout duration, the number of checked-out connections and statement timings."""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("query_started_at")
+        if started:
+            QUERY_DURATION.labels(label, _operation(statement)).observe(time.perf_counter() - started.pop())
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        CONNECTIONS_CHECKED_OUT.labels(label).inc()
+
+    @event.listens_for(sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            CONNECTION_CHECKOUT.labels(label).observe(time.perf_counter() - checked_out_at)
+            CONNECTIONS_CHECKED_OUT.labels(label).dec()
+
+
+def get_async_engine(db_cfg):
+    """
+    Return the process-wide async engine for the given database settings.
+
+    All agents in a process share one engine (and one connection pool) per DSN,
+    so pool_size + max_overflow from `database.pool` is the global connection cap.
+    The engine's connections belong to the process's main event loop.
+
+    Args:
+        db_cfg (dict): The `database` section of settings.yaml.
+    """
+    dsn = build_dsn(db_cfg)
+    with _lock:
+        engine = _engines.get(dsn)
+        if engine is None:
+            pool = _pool_config(db_cfg)
+            label = _pool_label(db_cfg)
+            engine = create_async_engine(
+                dsn,
+                poolclass=InstrumentedAsyncPool,
+                pool_size=pool["size"],
+                max_overflow=pool["max_overflow"],
+                pool_timeout=pool["timeout"],
+                pool_recycle=pool["recycle"],
+                pool_pre_ping=True,
+                pool_logging_name=label,
+                connect_args={"statement_cache_size": pool["statement_cache_size"]},
+            )
+            _instrument(engine.sync_engine, label)
+            _engines[dsn] = engine
+            logger.info("Created shared async engine for %s (pool_size=%d, max_overflow=%d).", label, pool["size"], pool["max_overflow"])
+        return engine
+
+
+def get_sync_engine(db_cfg):
+    """Return the process-wide synchronous engine (psycopg2) for the given database settings."""
+    dsn = build_dsn(db_cfg, driver="postgresql")
+    with _lock:
+        engine = _sync_engines.get(dsn)
+        if engine is None:
+            pool = _pool_config(db_cfg)
+            label = _pool_label(db_cfg)
+            engine = create_engine(
+                dsn,
+                pool_size=pool["size"],
+                max_overflow=pool["max_overflow"],
+                pool_timeout=pool["timeout"],
+                pool_recycle=pool["recycle"],
+                pool_pre_ping=True,
+                pool_logging_name=f"{label}:sync",
+            )
+            _instrument(engine, f"{label}:sync")
+            _sync_engines[dsn] = engine
+            logger.info("Created shared sync engine for %s.", label)
+        return engine
+
+
+async def dispose_engines():
+    """Close every pooled connection. Call once on shutdown."""
+    with _lock:
+        engines = list(_engines.values())
+        sync_engines = list(_sync_engines.values())
+        _engines.clear()
+        _sync_engines.clear()
+    for engine in engines:
+        await engine.dispose()
+    for engine in sync_engines:
+        engine.dispose()
+    logger.info("Disposed %d async and %d sync database engines.", len(engines), len(sync_engines))
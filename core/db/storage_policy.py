@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import re
+from sqlalchemy.sql import text
+from core.config.config_loader import load_settings
+from core.db.engine import get_async_engine, dispose_engines
+
+logger = logging.getLogger("core.db.storage_policy")
+
+HYPERTABLE = "ohlcv_data"
+# Timeframes stored in a hypertable of their own (same columns), so that their
+# retention drops whole chunks instead of deleting rows next to the HTF bars
+TIMEFRAME_TABLES = {"5m": "ohlcv_data_5m"}
+
+IDENTIFIER = re.compile(r"^[a-z_][a-z0-9_]*$")
+ORDERBY_ITEM = re.compile(r"^([a-z_][a-z0-9_]*)(\s+(ASC|DESC))?(\s+NULLS\s+(FIRST|LAST))?$", re.IGNORECASE)
+
+DEFAULT_POLICY = {
+    "chunk_interval": "1 day",
+    "compress_after_days": 7,
+    "compress_segmentby": ["symbol", "timeframe"],
+    "compress_orderby": "timestamp DESC",
+    "retention": {},
+}
+
+
+def ohlcv_table(timeframe):
+    """Name of the hypertable holding the bars of a timeframe."""
+    return TIMEFRAME_TABLES.get(timeframe, HYPERTABLE)
+
+
+def ohlcv_tables():
+    """Every OHLCV hypertable, ohlcv_data first."""
+    return [HYPERTABLE, *TIMEFRAME_TABLES.values()]
+
+
+def _segmentby_sql(columns):
+    for column in columns:
+        if not IDENTIFIER.match(str(column)):
+            raise ValueError(f"Invalid compress_segmentby column: {column!r}")
+    return ", ".join(columns)
+
+
+def _orderby_sql(orderby):
+    items = [item.strip() for item in str(orderby).split(",")]
+    for item in items:
+        if not ORDERBY_ITEM.match(item):
+            raise ValueError(f"Invalid compress_orderby item: {item!r}")
+    return ", ".join(" ".join(item.split()) for item in items)
+
+
+def get_ohlcv_policy(settings):
+    """
+    Return the ohlcv_data storage policy from settings, filled in with defaults.
+
+    Raises:
+        ValueError: If a compression column is not a plain identifier, or retention is set
+            for a timeframe that shares ohlcv_data with the others.
+    """
+    policy = dict(DEFAULT_POLICY)
+    policy.update(settings.get("storage", {}).get("ohlcv", {}) or {})
+    # Interpolated into DDL, which takes no bind parameters: reject anything but column names up front
+    _segmentby_sql(policy["compress_segmentby"])
+    _orderby_sql(policy["compress_orderby"])
+    for timeframe in policy.get("retention") or {}:
+        if str(timeframe) not in TIMEFRAME_TABLES:
+            raise ValueError(f"Retention for '{timeframe}' needs its own hypertable (one of {sorted(TIMEFRAME_TABLES)}).")
+    return policy
+
+
+async def apply_ohlcv_storage_policy(db_engine, policy):
+    """
+    Bring the OHLCV hypertables in line with the configured storage policy.
+
+    Idempotent: the chunk interval is reset and the compression and retention
+    policies are replaced with the configured ones. Compression settings are only
+    set on a hypertable that has none yet; TimescaleDB refuses to change them once
+    chunks are compressed.
+
+    Args:
+        db_engine: SQLAlchemy async engine connected to TimescaleDB.
+        policy (dict): Policy as returned by get_ohlcv_policy().
+    """
+    segmentby = _segmentby_sql(policy["compress_segmentby"])
+    orderby = _orderby_sql(policy["compress_orderby"])
+    retention = {TIMEFRAME_TABLES[str(timeframe)]: int(days) for timeframe, days in (policy.get("retention") or {}).items()}
+    async with db_engine.begin() as conn:
+        for table in ohlcv_tables():
+            # Chunk sizing only applies to chunks created after this call
+            await conn.execute(
+                text("SELECT set_chunk_time_interval(:table, CAST(:interval AS INTERVAL))"),
+                {"table": table, "interval": policy["chunk_interval"]}
+            )
+            logger.info("Set chunk interval for '%s' to %s.", table, policy["chunk_interval"])
+
+            result = await conn.execute(
+                text("""
+                    SELECT 1 FROM timescaledb_information.compression_settings
+                    WHERE hypertable_name = :table LIMIT 1
+                """),
+                {"table": table}
+            )
+            if result.scalar() is None:
+                await conn.execute(text(f"""
+                    ALTER TABLE {table} SET (
+                        timescaledb.compress,
+                        timescaledb.compress_segmentby = '{segmentby}',
+                        timescaledb.compress_orderby = '{orderby}'
+                    )
+                """))
+                logger.info("Enabled compression on '%s' (segmentby: %s).", table, segmentby)
+
+            await conn.execute(text("SELECT remove_compression_policy(:table, if_exists => TRUE)"), {"table": table})
+            await conn.execute(
+                text("SELECT add_compression_policy(:table, CAST(:after AS INTERVAL))"),
+                {"table": table, "after": f"{int(policy['compress_after_days'])} days"}
+            )
+            logger.info("Compressing '%s' chunks older than %d days.", table, policy["compress_after_days"])
+
+            # Replace the retention policy so removed timeframes stop being trimmed
+            await conn.execute(text("SELECT remove_retention_policy(:table, if_exists => TRUE)"), {"table": table})
+            if table in retention:
+                await conn.execute(
+                    text("SELECT add_retention_policy(:table, CAST(:after AS INTERVAL))"),
+                    {"table": table, "after": f"{retention[table]} days"}
+                )
+                logger.info("Dropping '%s' chunks older than %d days.", table, retention[table])
+
+
+async def compress_eligible_chunks(db_engine, policy):
+    """Compress every chunk already past the compression horizon (the policy job does this lazily)."""
+    compressed = 0
+    async with db_engine.begin() as conn:
+        for table in ohlcv_tables():
+            result = await conn.execute(
+                text("""
+                    SELECT compress_chunk(c, if_not_compressed => TRUE)
+                    FROM show_chunks(:table, older_than => CAST(:after AS INTERVAL)) c
+                """),
+                {"table": table, "after": f"{int(policy['compress_after_days'])} days"}
+            )
+            compressed += len(result.fetchall())
+    logger.info("Compressed %d eligible chunks of %s.", compressed, ", ".join(ohlcv_tables()))
+    return compressed
+
+
+async def main():
+    settings = load_settings()
+    db_engine = get_async_engine(settings["database"])
+    try:
+        await apply_ohlcv_storage_policy(db_engine, get_ohlcv_policy(settings))
+    finally:
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,266 @@
+import json
+import logging
+import threading
+import time
+import numpy as np
+import pandas as pd
+import redis
+import yfinance as yf
+from core.ratelimit.provider_limiter import get_limiter, yf_history
+from core.redis_bus.redis_stream import redis_client
+
+logger = logging.getLogger("core.fx")
+
+PRICE_COLUMNS = ["open", "high", "low", "close"]
+REDIS_KEY = "fx:rates:{pair}"
+
+DEFAULT_FX = {
+    "source_currency": "USD",  # Currency the market data arrives in
+    "target_currency": "EUR",  # Currency prices are stored and traded in
+    "pairs": ["USD/EUR"],  # Pairs kept warm by the background refresh
+    "history_days": 365,  # Daily rates kept per pair; must cover the longest OHLCV lookback
+    "ttl_seconds": 3600,  # Lifetime of a cached series in Redis and in memory
+    "refresh_interval_seconds": 900,  # 0 disables the background refresh
+    "fallback_rate": 1.0,  # Used when no rate was ever fetched for a pair
+}
+
+_services = {}
+_lock = threading.Lock()
+
+
+def get_fx_config(settings):
+    """Return the fx settings, filled in with defaults."""
+    config = dict(DEFAULT_FX)
+    config.update(settings.get("fx", {}) or {})
+    return config
+
+
+def yahoo_symbol(base, quote):
+    """Yahoo Finance ticker of a currency pair (USD/EUR -> "EUR=X", GBP/EUR -> "GBPEUR=X")."""
+    return f"{quote}=X" if base == "USD" else f"{base}{quote}=X"
+
+
+def utc_days(index):
+    """
+    Label daily bars with their calendar date, as UTC midnight.
+
+    Yahoo stamps daily FX bars at 00:00 in the exchange's timezone (Europe/London),
+    which is 23:00 UTC the day before during BST; the date is read in that timezone.
+    """
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)  # Wall time in the bars' own timezone
+    return index.normalize().tz_localize("UTC")
+
+
+def fetch_daily_rates(base, quote, days):
+    """
+    Download daily closing rates for a pair from yfinance.
+
+    Returns:
+        pd.Series: Rates indexed by UTC day, oldest first (empty when unavailable).
+    """
+    with get_limiter("yahoo").request():
+        df = yf_history(yf.Ticker(yahoo_symbol(base, quote)), period=f"{int(days)}d", interval="1d")
+    if df.empty:
+        return pd.Series(dtype=np.float64)
+    return pd.Series(df["Close"].to_numpy(dtype=np.float64), index=utc_days(df.index)).groupby(level=0).last()
+
+
+class FXService:
+    """
+    Currency conversion backed by daily rates cached in Redis.
+
+    Rate series are shared between agents and processes through Redis (TTL
+    `ttl_seconds`) and kept in memory in each process. A background thread refreshes
+    the configured pairs so that conversions never wait on the network. Prices are
+    converted per bar, with the daily rate in force on the bar's date.
+    """
+
+    def __init__(self, redis_client, config, fetcher=fetch_daily_rates):
+        """
+        Args:
+            redis_client: redis.Redis client used as the shared cache (None disables it).
+            config (dict): Settings as returned by get_fx_config().
+            fetcher (callable): (base, quote, days) -> pd.Series of daily rates.
+        """
+        self.redis = redis_client
+        self.config = config
+        self.fetcher = fetcher
+        self._series = {}  # pair -> (rates, loaded_at)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher = None
+
+    @staticmethod
+    def _pair(base, quote):
+        return f"{base}{quote}"
+
+    def _load_from_redis(self, pair):
+        if self.redis is None:
+            return None
+        try:
+            payload = self.redis.get(REDIS_KEY.format(pair=pair))
+        except redis.RedisError as e:
+            logger.warning("FX cache unavailable: %s", e)
+            return None
+        if not payload:
+            return None
+        data = json.loads(payload)
+        return pd.Series(data["rates"], index=pd.to_datetime(data["days"], utc=True), dtype=np.float64)
+
+    def _save_to_redis(self, pair, rates):
+        if self.redis is None:
+            return
+        payload = json.dumps({"days": [day.isoformat() for day in rates.index], "rates": rates.tolist()})
+        try:
+            self.redis.set(REDIS_KEY.format(pair=pair), payload, ex=int(self.config["ttl_seconds"]))
+        except redis.RedisError as e:
+            logger.warning("Could not cache %s rates: %s", pair, e)
+
+    def refresh(self, base, quote, force=False):
+        """
+        Load the rate series of a pair into memory: from Redis when another agent or
+        process already fetched it, from yfinance otherwise.
+
+        Returns:
+            pd.Series: Daily rates (possibly empty when every source failed).
+        """
+        pair = self._pair(base, quote)
+        rates = None if force else self._load_from_redis(pair)
+        if rates is None or rates.empty:
+            try:
+                rates = self.fetcher(base, quote, self.config["history_days"])
+            except Exception as e:
+                logger.error("Error fetching %s/%s exchange rates: %s", base, quote, str(e))
+                rates = pd.Series(dtype=np.float64)
+            if rates.empty:
+                with self._lock:
+                    cached = self._series.get(pair)
+                if cached is not None:
+                    logger.warning("Keeping the previous %s/%s rates.", base, quote)
+                    return cached[0]
+                return rates
+            self._save_to_redis(pair, rates)
+            logger.info("Fetched %d daily %s/%s rates (latest %.4f).", len(rates), base, quote, rates.iloc[-1])
+        with self._lock:
+            self._series[pair] = (rates, time.monotonic())
+        return rates
+
+    def series(self, base, quote):
+        """Return the daily rate series of a pair, refreshing it once it is older than the TTL."""
+        pair = self._pair(base, quote)
+        with self._lock:
+            cached = self._series.get(pair)
+        if cached is not None and time.monotonic() - cached[1] < self.config["ttl_seconds"]:
+            return cached[0]
+        return self.refresh(base, quote)
+
+    def rate(self, base, quote, at=None):
+        """
+        Return the rate of a pair on a date (the latest rate by default).
+
+        Falls back to `fallback_rate` when no rate is available.
+        """
+        if base == quote:
+            return 1.0
+        rates = self.series(base, quote)
+        if rates.empty:
+            logger.error("No %s/%s exchange rate available. Defaulting to %.1f.", base, quote, self.config["fallback_rate"])
+            return self.config["fallback_rate"]
+        if at is None:
+            return float(rates.iloc[-1])
+        return float(self.rates_at(rates, pd.DatetimeIndex([pd.Timestamp(at)]))[0])
+
+    @staticmethod
+    def rates_at(rates, timestamps):
+        """
+        Look up the daily rate in force at each timestamp.
+
+        A bar uses the rate of its own UTC day, or the last day before it when that
+        day has no rate (weekends, holidays). Bars before the first known rate use it.
+        """
+        days = pd.DatetimeIndex(timestamps)
+        days = (days.tz_localize("UTC") if days.tz is None else days.tz_convert("UTC")).normalize()
+        positions = rates.index.searchsorted(days, side="right") - 1
+        return rates.to_numpy()[np.clip(positions, 0, len(rates) - 1)]
+
+    def convert(self, df, base=None, quote=None, columns=PRICE_COLUMNS, timestamp_column="timestamp"):
+        """
+        Convert price columns of an OHLCV frame bar by bar (in place).
+
+        Args:
+            df (pd.DataFrame): Frame with `timestamp_column` and the price `columns`.
+            base (str): Currency of the prices (default: fx.source_currency).
+            quote (str): Currency to convert to (default: fx.target_currency).
+
+        Returns:
+            pd.DataFrame: The same frame.
+        """
+        base = base or self.config["source_currency"]
+        quote = quote or self.config["target_currency"]
+        if base == quote or df.empty:
+            return df
+        rates = self.series(base, quote)
+        if rates.empty:
+            factors = self.rate(base, quote)
+        else:
+            factors = self.rates_at(rates, pd.to_datetime(df[timestamp_column], utc=True))[:, None]
+        df[columns] = df[columns].to_numpy(dtype=np.float64) * factors
+        return df
+
+    def start(self):
+        """Start refreshing the configured pairs in a background thread."""
+        interval = self.config["refresh_interval_seconds"]
+        if not interval or self._refresher is not None:
+            return
+
+        def refresh_loop():
+            while True:
+                for pair in self.config["pairs"]:
+                    base, quote = pair.split("/")
+                    self.refresh(base, quote)
+                if self._stop.wait(interval):
+                    return
+
+        self._refresher = threading.Thread(target=refresh_loop, name="fx-refresh", daemon=True)
+        self._refresher.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+class StaticFXService(FXService):
+    """
+    Local stand-in for tests and offline runs: fixed rates, no Redis, no network.
+
+    Args:
+        rates (dict): "BASE/QUOTE" -> a constant rate or a {date: rate} mapping.
+    """
+
+    def __init__(self, rates=None, config=None):
+        super().__init__(None, {**DEFAULT_FX, "refresh_interval_seconds": 0, **(config or {})}, fetcher=self._fetch)
+        self.rates = rates or {}
+
+    def _fetch(self, base, quote, days):
+        value = self.rates.get(f"{base}/{quote}")
+        if value is None:
+            return pd.Series(dtype=np.float64)
+        if not isinstance(value, dict):
+            value = {"1970-01-01": value}
+        index = pd.to_datetime(list(value), utc=True).normalize()
+        return pd.Series(list(value.values()), index=index, dtype=np.float64).sort_index()
+
+
+def get_fx_service(settings):
+    """
+    Return this process's FX service, creating it and starting its background
+    refresh on first use.
+    """
+    with _lock:
+        service = _services.get("default")
+        if service is None:
+            service = FXService(redis_client(settings), get_fx_config(settings))
+            service.start()
+            _services["default"] = service
+        return service
@@ -0,0 +1,175 @@
+import atexit
+import copy
+import itertools
+import json
+import logging
+import logging.config
+import logging.handlers
+import os
+import queue
+import threading
+import yaml
+
+LOGGING_CONFIG = os.path.join(os.path.dirname(__file__), "../config/logging_config.yaml")
+LOGS_DIR = os.path.join(os.path.dirname(__file__), "../../logs")
+
+DEFAULT_PIPELINE = {
+    "queue": True,  # Hand records to a background writer instead of writing on the caller's thread
+    "queue_size": 10000,  # Records beyond this are dropped (and counted) rather than blocking the caller
+    "payload_sample_every": 100,  # Log one full message body in N at INFO; every body at DEBUG
+}
+
+_listener = None
+_lock = threading.Lock()
+_sampler = None
+_exc_formatter = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; built on the writer thread, after the record left the hot path."""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks the caller: records are dropped when the writer
+    falls behind. Queued records are tagged with `route`, the handlers they go to.
+
+    Unlike QueueHandler, records are queued unformatted, with their arguments: the
+    message is interpolated by the writer thread's handlers. Only a traceback is
+    rendered here, while its frames are still current.
+    """
+
+    dropped = 0
+
+    def __init__(self, records, route):
+        super().__init__(records)
+        self.route = route
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exc_text = record.exc_text or _exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        record.log_route = self.route
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+class PayloadSampler:
+    """Let one payload in `every` through at INFO; the rest are logged as a summary."""
+
+    def __init__(self, every):
+        self.every = max(1, int(every))
+        self._counter = itertools.count()
+
+    def take(self):
+        return next(self._counter) % self.every == 0
+
+
+class PayloadSummary:
+    """Stand-in for a message body in a log line: its field names, rendered only if the record is emitted."""
+
+    __slots__ = ("payload",)
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def __str__(self):
+        if isinstance(self.payload, dict):
+            return f"<{len(self.payload)} fields: {', '.join(map(str, self.payload))}>"
+        if isinstance(self.payload, (list, tuple)):
+            return f"<{len(self.payload)} items>"
+        return f"<{type(self.payload).__name__}>"
+
+
+def sampled(logger, payload, sampler=None):
+    """
+    Wrap a message body for a log call: the full body at DEBUG or when sampled, a
+    short summary otherwise.
+
+        logger.info("Received trade signal: %s", sampled(logger, signal))
+    """
+    sampler = sampler or _sampler
+    if logger.isEnabledFor(logging.DEBUG) or (sampler is not None and sampler.take()):
+        return payload
+    return PayloadSummary(payload)
+
+
+def setup_logging(config_path=LOGGING_CONFIG):
+    """
+    Configure logging from logging_config.yaml once per process.
+
+    With `pipeline.queue` enabled, every logger's handlers are moved behind a single
+    QueueListener thread, so the caller only pays for building the record.
+    """
+    global _listener, _sampler
+    with _lock:
+        if _sampler is not None:
+            return
+        os.makedirs(LOGS_DIR, exist_ok=True)
+        with open(config_path, "r") as file:
+            config = yaml.safe_load(file)
+        pipeline = {**DEFAULT_PIPELINE, **(config.pop("pipeline", None) or {})}
+        logging.config.dictConfig(config)
+        _sampler = PayloadSampler(pipeline["payload_sample_every"])
+        if not pipeline["queue"]:
+            return
+
+        # Loggers that own handlers (root and those with propagate: no) share one queue
+        loggers = [logging.getLogger()] + [logging.getLogger(name) for name in config.get("loggers", {})]
+        records = queue.Queue(maxsize=pipeline["queue_size"])
+        # Each logger's queue handler routes its records to the handlers that logger owned
+        routes = {}
+        for route, logger in enumerate(loggers):
+            routes[route] = list(logger.handlers)
+            for handler in routes[route]:
+                logger.removeHandler(handler)
+            if routes[route]:
+                logger.addHandler(DroppingQueueHandler(records, route))
+        _listener = _RoutingListener(records, routes)
+        _listener.start()
+        atexit.register(stop_logging)
+
+
+class _RoutingListener(logging.handlers.QueueListener):
+    """QueueListener that hands each record to the handlers of the logger that queued it."""
+
+    def __init__(self, records, routes):
+        super().__init__(records, respect_handler_level=True)
+        self.routes = routes
+
+    def handle(self, record):
+        for handler in self.routes.get(getattr(record, "log_route", None), ()):
+            if record.levelno >= handler.level:
+                try:
+                    handler.handle(record)
+                except Exception:
+                    handler.handleError(record)  # A broken handler must not stop the writer thread
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
@@ -0,0 +1,84 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+logger = logging.getLogger("core.observability.metrics")
+
+# Shared by every agent; module-specific metrics (fetches, backfill, FX...) stay in their modules
+HANDLER_LATENCY = Histogram(
+    "agent_handler_seconds", "Time spent in a stream message handler", ["agent", "handler"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+HANDLER_ERRORS = Counter("agent_handler_errors_total", "Stream message handlers that raised", ["agent", "handler"])
+QUEUE_DEPTH = Gauge("agent_queue_depth", "Items waiting in an in-process queue", ["queue"])
+CONSUMER_LAG = Gauge("redis_consumer_lag", "Entries in a stream not yet delivered to a consumer group", ["stream", "group"])
+CONSUMER_PENDING = Gauge("redis_consumer_pending", "Entries delivered to a consumer group but not acknowledged", ["stream", "group"])
+CONSUMER_OLDEST_PENDING = Gauge(
+    "redis_consumer_oldest_pending_seconds", "Age of the oldest entry a consumer group has not acknowledged", ["stream", "group"]
+)
+CONSUMER_TRIMMED = Counter(
+    "redis_consumer_trimmed_unread_total", "Entries trimmed from a stream before a consumer group read them", ["stream", "group"]
+)
+BUS_BACKPRESSURE = Gauge("bus_backpressure", "1 while a stream's consumers are too far behind for producers to keep up", ["stream"])
+BUS_BACKPRESSURE_WAIT = Counter("bus_backpressure_wait_seconds_total", "Time producers waited for a stream's consumers", ["stream"])
+
+DEFAULT_METRICS = {
+    "enabled": True,
+    "port": 8000,  # Single mode; in multiprocess mode worker N (from 0) listens on port + 1 + N
+}
+
+PORT_ENV = "BOT_METRICS_PORT"  # Set by the launcher for each worker process
+
+_server_port = None
+_lock = threading.Lock()
+
+
+def get_metrics_config(settings):
+    config = dict(DEFAULT_METRICS)
+    config.update(settings.get("metrics", {}) or {})
+    return config
+
+
+def start_metrics_server(settings):
+    """
+    Start this process's /metrics exporter once; later calls return the same port.
+
+    Returns:
+        int: The port being served, or None when disabled or the port is taken.
+    """
+    global _server_port
+    config = get_metrics_config(settings)
+    if not config["enabled"]:
+        return None
+    with _lock:
+        if _server_port is None:
+            port = int(os.environ.get(PORT_ENV) or config["port"])
+            try:
+                start_http_server(port)
+            except OSError as e:
+                logger.error("Metrics exporter could not listen on port %d: %s", port, e)
+                return None
+            _server_port = port
+            logger.info("Serving Prometheus metrics on port %d.", port)
+        return _server_port
+
+
+@contextmanager
+def time_handler(agent, handler):
+    """Time one message handler call; errors are counted and re-raised."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        HANDLER_ERRORS.labels(agent=agent, handler=handler).inc()
+        raise
+    finally:
+        HANDLER_LATENCY.labels(agent=agent, handler=handler).observe(time.perf_counter() - started)
+
+
+def track_queue(name, size):
+    """Export the depth of an in-process queue; `size` is read at scrape time (e.g. queue.qsize)."""
+    QUEUE_DEPTH.labels(queue=name).set_function(size)
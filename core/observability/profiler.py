@@ -0,0 +1,207 @@
+import asyncio
+import collections
+import functools
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from prometheus_client import Histogram
+
+logger = logging.getLogger("core.observability.profiler")
+
+STAGE_SECONDS = Histogram(
+    "profiled_stage_seconds", "Wall time of functions decorated with @timed (profiling.timers)", ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+DEFAULT_PROFILING = {
+    "enabled": False,  # Install the signal and HTTP triggers
+    "signal": "SIGUSR1",  # `kill -USR1 <pid>` captures a profile of default_seconds
+    "http_port": 0,  # GET http://localhost:<port>/profile?seconds=N returns the profile; 0 disables
+    "default_seconds": 30,
+    "max_seconds": 300,
+    "interval_ms": 5,  # Sampling interval
+    "output_dir": "logs/profiles",
+    "timers": False,  # Record @timed stages in profiled_stage_seconds
+}
+
+_timers_enabled = False
+_profiler = None
+_lock = threading.Lock()
+
+
+def get_profiling_config(settings):
+    config = dict(DEFAULT_PROFILING)
+    config.update(settings.get("profiling", {}) or {})
+    return config
+
+
+def timed(stage):
+    """
+    Record the wall time of a function (sync or async) as `stage` while
+    profiling.timers is on. When off, the wrapper costs one flag check per call.
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _timers_enabled:
+                    return await func(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    STAGE_SECONDS.labels(stage=stage).observe(time.perf_counter() - started)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _timers_enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                STAGE_SECONDS.labels(stage=stage).observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler for every thread of the process.
+
+    A background thread snapshots all stacks every `interval_ms`; the result is in
+    the collapsed-stack format ("thread;outer;...;inner count") read by flamegraph.pl,
+    speedscope and inferno. Waiting threads are sampled too, so time blocked on the
+    database or Redis shows up where it is spent.
+    """
+
+    def __init__(self, interval_ms=5, output_dir=DEFAULT_PROFILING["output_dir"]):
+        self.interval = interval_ms / 1000
+        self.output_dir = output_dir
+        self._busy = threading.Lock()
+
+    def sample(self, seconds):
+        """Sample for `seconds` on the calling thread; return {collapsed stack: count}."""
+        if not self._busy.acquire(blocking=False):
+            raise RuntimeError("A profile is already being captured.")
+        try:
+            stacks = collections.Counter()
+            me = threading.get_ident()
+            names = {}
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == me:
+                        continue
+                    if thread_id not in names:
+                        names = {t.ident: t.name for t in threading.enumerate()}
+                    labels = []
+                    while frame is not None:
+                        labels.append(_frame_label(frame))
+                        frame = frame.f_back
+                    labels.append(names.get(thread_id, str(thread_id)))
+                    stacks[";".join(reversed(labels))] += 1
+                time.sleep(self.interval)
+            return stacks
+        finally:
+            self._busy.release()
+
+    @staticmethod
+    def collapsed(stacks):
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    def capture_to_file(self, seconds):
+        """Sample for `seconds` and write the collapsed stacks under output_dir; return the path."""
+        stacks = self.sample(seconds)
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.folded")
+        with open(path, "w") as file:
+            file.write(self.collapsed(stacks))
+        logger.info("Wrote a %ss profile (%d samples) to %s.", seconds, sum(stacks.values()), path)
+        return path
+
+    def capture_in_background(self, seconds):
+        thread = threading.Thread(target=self._capture_logged, args=(seconds,), name="profiler", daemon=True)
+        thread.start()
+        return thread
+
+    def _capture_logged(self, seconds):
+        try:
+            self.capture_to_file(seconds)
+        except RuntimeError as e:
+            logger.warning("Profile request ignored: %s", e)
+
+
+def _http_handler(profiler, config):
+    class ProfileHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/profile":
+                self.send_error(404)
+                return
+            try:
+                seconds = float(parse_qs(url.query).get("seconds", [config["default_seconds"]])[0])
+            except ValueError:
+                self.send_error(400, "seconds must be a number")
+                return
+            seconds = min(max(seconds, 0.1), config["max_seconds"])
+            try:
+                body = profiler.collapsed(profiler.sample(seconds)).encode()
+            except RuntimeError as e:
+                self.send_error(409, str(e))
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.info("Profile request from %s: %s", self.address_string(), format % args)
+
+    return ProfileHandler
+
+
+def install_profiler(settings):
+    """
+    Apply the profiling settings to this process: enable the @timed stages and
+    install the signal and HTTP triggers. Safe to call more than once.
+
+    Returns:
+        SamplingProfiler: The process's profiler, or None when profiling is disabled.
+    """
+    global _timers_enabled, _profiler
+    config = get_profiling_config(settings)
+    _timers_enabled = bool(config["timers"])
+    if not config["enabled"]:
+        return None
+    with _lock:
+        if _profiler is not None:
+            return _profiler
+        _profiler = SamplingProfiler(config["interval_ms"], config["output_dir"])
+
+        signum = getattr(signal, config["signal"], None) if config["signal"] else None
+        if signum is not None and threading.current_thread() is threading.main_thread():
+            signal.signal(signum, lambda *_: _profiler.capture_in_background(config["default_seconds"]))
+            logger.info("Send %s to pid %d for a %ss profile.", config["signal"], os.getpid(), config["default_seconds"])
+
+        if config["http_port"]:
+            try:
+                server = ThreadingHTTPServer(("127.0.0.1", int(config["http_port"])), _http_handler(_profiler, config))
+            except OSError as e:
+                logger.error("Profiler endpoint could not listen on port %s: %s", config["http_port"], e)
+            else:
+                threading.Thread(target=server.serve_forever, name="profiler-http", daemon=True).start()
+                logger.info("Profiles available at http://127.0.0.1:%s/profile?seconds=N", config["http_port"])
+        return _profiler
@@ -0,0 +1,75 @@
+import json
+import logging
+import time
+import uuid
+from prometheus_client import Histogram
+
+logger = logging.getLogger("core.observability.tracing")
+
+# Pipeline stages in order. Each stage is timed from the previous one present in the
+# trace, so queueing on the Redis stream counts towards the stage that consumes it.
+STAGES = ["bar_close", "ingest", "ta", "pm", "execution", "tracking"]
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900)
+
+STAGE_LATENCY = Histogram(
+    "pipeline_stage_latency_seconds", "Time from the previous pipeline stage to this one", ["stage"], buckets=LATENCY_BUCKETS
+)
+END_TO_END_LATENCY = Histogram(
+    "pipeline_end_to_end_latency_seconds", "Time from bar close to the position being tracked", buckets=LATENCY_BUCKETS
+)
+
+TRACE_FIELD = "trace"
+
+
+def new_trace(bar_close=None):
+    """
+    Start a trace for the data behind one data event.
+
+    Args:
+        bar_close (float): Epoch seconds at which the newest bar closed.
+    """
+    trace = {"id": uuid.uuid4().hex, "stages": {}}
+    if bar_close is not None:
+        trace["stages"]["bar_close"] = float(bar_close)
+    return trace
+
+
+def extract(message):
+    """Return the trace carried by a stream message, or None."""
+    payload = message.get(TRACE_FIELD) if isinstance(message, dict) else None
+    if not payload:
+        return None
+    try:
+        trace = json.loads(payload) if isinstance(payload, str) else payload
+        return {"id": trace["id"], "stages": dict(trace.get("stages", {}))}
+    except (ValueError, KeyError, TypeError):
+        logger.debug("Ignoring malformed trace context: %s", payload)
+        return None
+
+
+def inject(message, trace):
+    """Attach a trace to an outgoing stream message (no-op without a trace)."""
+    if trace is not None:
+        message[TRACE_FIELD] = json.dumps(trace, separators=(",", ":"))
+    return message
+
+
+def mark(trace, stage, at=None):
+    """
+    Record that a stage finished and observe its latency.
+
+    Returns:
+        dict: A new trace including the stage (the input is left untouched, so one
+            event can fan out into several traced messages), or None without a trace.
+    """
+    if trace is None:
+        return None
+    at = time.time() if at is None else at
+    stages = dict(trace["stages"])
+    previous = [stages[name] for name in STAGES[:STAGES.index(stage)] if name in stages]
+    if previous:
+        STAGE_LATENCY.labels(stage=stage).observe(max(0.0, at - previous[-1]))
+    stages[stage] = at
+    if stage == STAGES[-1] and "bar_close" in stages:
+        END_TO_END_LATENCY.observe(max(0.0, at - stages["bar_close"]))
+    return {"id": trace["id"], "stages": stages}
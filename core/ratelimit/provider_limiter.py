@@ -0,0 +1,242 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+import pandas as pd
+import redis
+from prometheus_client import Counter, Gauge, Histogram
+from core.config.config_loader import load_settings
+from core.redis_bus.redis_stream import redis_client
+
+logger = logging.getLogger("core.ratelimit")
+
+TOKEN_WAIT = Histogram("provider_token_wait_seconds", "Time spent waiting for a rate-limit token", ["provider"])
+CONCURRENCY_LIMIT = Gauge("provider_concurrency_limit", "Current adaptive concurrency limit", ["provider"])
+REQUESTS = Counter("provider_requests_total", "Upstream requests by outcome", ["provider", "outcome"])
+
+DEFAULT_PROVIDER = {
+    "rate_per_second": 2.0,  # Token refill rate shared by every process
+    "burst": 10,  # Bucket capacity
+    "concurrency": {"initial": 4, "min": 1, "max": 16},
+    "latency_target_seconds": 5.0,  # Slower responses count as congestion
+    "decrease_factor": 0.5,  # Multiplicative decrease on errors and slow responses
+    "throttle_pause_seconds": 30,  # All processes back off this long after a 429
+}
+
+# Atomic refill-and-take. Returns 0 when a token was taken, otherwise the milliseconds
+# until one is available. KEYS[1] bucket hash, ARGV: rate/s, capacity, now (s), ttl (s)
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'paused_until')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+local paused_until = tonumber(state[3]) or 0
+if now < paused_until then
+  return math.ceil((paused_until - now) * 1000)
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = math.ceil((1 - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return wait
+"""
+
+_limiters = {}
+_lock = threading.Lock()
+
+
+class ThrottledError(Exception):
+    """Raised by callers when a provider answered with a rate-limit response."""
+
+
+def is_throttle_error(error):
+    """Whether an exception looks like the provider throttling us (HTTP 429 or a rate-limit error)."""
+    text = f"{type(error).__name__} {error}"
+    return isinstance(error, ThrottledError) or "RateLimit" in text or "429" in text or "Too Many Requests" in text
+
+
+def yf_history(ticker, **kwargs):
+    """
+    ticker.history() with provider errors raised, so that the limiter around it sees them.
+
+    yfinance only logs errors by default and returns an empty frame, which hid
+    throttling from the limiter. Missing data (delisted symbols, empty ranges)
+    still comes back as an empty frame rather than a failure.
+    """
+    try:
+        return ticker.history(raise_errors=True, **kwargs)
+    except Exception as e:
+        if is_throttle_error(e) or "Missing" not in type(e).__name__:
+            raise
+        logger.debug("No data from yfinance: %s", e)
+        return pd.DataFrame()
+
+
+class TokenBucket:
+    """
+    Token bucket held in Redis so that every process shares one request budget per
+    provider. Falls back to an in-process bucket while Redis is unreachable.
+    """
+
+    def __init__(self, redis_client, provider, rate, capacity):
+        self.redis = redis_client
+        self.key = f"ratelimit:{provider}"
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._script = redis_client.register_script(TOKEN_BUCKET_LUA) if redis_client is not None else None
+        self._local_tokens = self.capacity
+        self._local_ts = time.monotonic()
+        self._local_lock = threading.Lock()
+
+    def _try_take_local(self):
+        with self._local_lock:
+            now = time.monotonic()
+            self._local_tokens = min(self.capacity, self._local_tokens + (now - self._local_ts) * self.rate)
+            self._local_ts = now
+            if self._local_tokens >= 1:
+                self._local_tokens -= 1
+                return 0.0
+            return (1 - self._local_tokens) / self.rate
+
+    def try_take(self):
+        """Take a token if one is available; return 0, or the seconds to wait before retrying."""
+        if self._script is None:
+            return self._try_take_local()
+        try:
+            ttl = max(60, int(self.capacity / self.rate) * 2)
+            return self._script(keys=[self.key], args=[self.rate, self.capacity, time.time(), ttl]) / 1000
+        except redis.RedisError as e:
+            logger.debug("Rate-limit bucket unavailable (%s); using the local bucket.", e)
+            return self._try_take_local()
+
+    def acquire(self):
+        """Block until a token is taken."""
+        while True:
+            wait = self.try_take()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Stop handing out tokens in every process for `seconds` (after a throttle response)."""
+        if self.redis is not None:
+            try:
+                self.redis.hset(self.key, "paused_until", time.time() + seconds)
+                return
+            except redis.RedisError:
+                pass
+        with self._local_lock:
+            self._local_tokens = -seconds * self.rate
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit: +1 after a full window of healthy requests, multiplied
+    by `decrease_factor` on an error or a response slower than the latency target.
+    """
+
+    def __init__(self, provider, initial, min_limit, max_limit, latency_target, decrease_factor):
+        self.provider = provider
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+        CONCURRENCY_LIMIT.labels(provider=provider).set(self.limit)
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency, failed, record=True):
+        with self._condition:
+            self.in_flight -= 1
+            if not record:
+                pass
+            elif failed or latency > self.latency_target:
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= int(self.limit):
+                    self.limit = min(self.max_limit, self.limit + 1)
+                    self._successes = 0
+            CONCURRENCY_LIMIT.labels(provider=self.provider).set(self.limit)
+            self._condition.notify_all()
+
+
+class ProviderLimiter:
+    """Rate limit plus adaptive concurrency for one upstream data provider."""
+
+    def __init__(self, provider, config, redis_client=None):
+        self.provider = provider
+        self.config = config
+        self.bucket = TokenBucket(redis_client, provider, config["rate_per_second"], config["burst"])
+        concurrency = config["concurrency"]
+        self.concurrency = AdaptiveConcurrency(
+            provider, concurrency["initial"], concurrency["min"], concurrency["max"],
+            config["latency_target_seconds"], config["decrease_factor"],
+        )
+
+    @contextmanager
+    def request(self):
+        """
+        Hold a concurrency slot and a token for the duration of one upstream call.
+
+        Exceptions raised inside the block are recorded (throttle responses also pause
+        the shared bucket) and re-raised.
+        """
+        self.concurrency.acquire()
+        try:
+            waited = time.perf_counter()
+            self.bucket.acquire()
+            TOKEN_WAIT.labels(provider=self.provider).observe(time.perf_counter() - waited)
+        except BaseException:
+            self.concurrency.release(0.0, failed=False, record=False)
+            raise
+
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception as e:
+            failed = True
+            if is_throttle_error(e):
+                REQUESTS.labels(provider=self.provider, outcome="throttled").inc()
+                logger.warning("%s is throttling requests; pausing for %ss.", self.provider, self.config["throttle_pause_seconds"])
+                self.bucket.pause(self.config["throttle_pause_seconds"])
+            else:
+                REQUESTS.labels(provider=self.provider, outcome="error").inc()
+            raise
+        finally:
+            self.concurrency.release(time.perf_counter() - started, failed)
+        REQUESTS.labels(provider=self.provider, outcome="ok").inc()
+
+
+def get_provider_config(settings, provider):
+    config = dict(DEFAULT_PROVIDER)
+    config.update((settings.get("rate_limits", {}) or {}).get(provider, {}) or {})
+    config["concurrency"] = {**DEFAULT_PROVIDER["concurrency"], **config.get("concurrency", {})}
+    return config
+
+
+def get_limiter(provider, settings=None):
+    """Return this process's limiter for a provider ("yahoo", "coingecko", "wikipedia")."""
+    with _lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            settings = settings or load_settings()
+            limiter = _limiters[provider] = ProviderLimiter(provider, get_provider_config(settings, provider), redis_client(settings))
+        return limiter
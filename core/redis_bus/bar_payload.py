@@ -0,0 +1,91 @@
+import json
+import logging
+import numpy as np
+import pandas as pd
+import redis
+
+logger = logging.getLogger("core.redis_bus.bar_payload")
+
+OHLCV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+FIELDS = {"open": "o", "high": "h", "low": "l", "close": "c", "volume": "v"}
+REFERENCE_KEY = "bars:{symbol}:{timeframe}:{end}"
+
+DEFAULT_BAR_PAYLOAD = {
+    "mode": "none",  # none: events carry the range only; inline: bars in the event; reference: bars in a Redis key
+    "max_inline_bytes": 16384,  # Larger inline payloads are stored under a reference instead
+    "max_bars": 2000,  # Larger batches (initial history) are left to the consumers' DB queries
+    "reference_ttl_seconds": 900,
+}
+
+
+def get_bar_payload_config(settings):
+    config = dict(DEFAULT_BAR_PAYLOAD)
+    config.update((settings.get("bar_events", {}) or {}).get("payload", {}) or {})
+    return config
+
+
+def encode_bars(df):
+    """
+    Encode OHLCV bars as compact columnar JSON: {"t": [epoch ms], "o": [...], ...}.
+    """
+    payload = {"t": (pd.to_datetime(df["timestamp"], utc=True).astype("int64") // 10**6).tolist()}
+    for column, key in FIELDS.items():
+        payload[key] = df[column].to_numpy(dtype=np.float64).tolist()
+    return json.dumps(payload, separators=(",", ":"))
+
+
+def decode_bars(payload):
+    """Decode encode_bars() output into an OHLCV frame (UTC timestamps, float64 prices)."""
+    data = json.loads(payload)
+    decoded = {"timestamp": pd.to_datetime(data["t"], unit="ms", utc=True)}
+    for column, key in FIELDS.items():
+        decoded[column] = np.asarray(data[key], dtype=np.float64)
+    return pd.DataFrame(decoded, columns=OHLCV_COLUMNS)
+
+
+def attach_bars(message, df, redis_client, config):
+    """
+    Add the bars of a data event to its message, per the configured mode.
+
+    Inline payloads go in the "bars" field; payloads over max_inline_bytes (or every
+    payload in reference mode) are stored in a Redis key named by "bars_ref".
+    Consumers fall back to the database when neither field is present.
+
+    Returns:
+        dict: The same message.
+    """
+    mode = config["mode"]
+    if mode == "none" or df.empty or len(df) > config["max_bars"]:
+        return message
+    payload = encode_bars(df)
+    if mode == "inline" and len(payload) <= config["max_inline_bytes"]:
+        message["bars"] = payload
+        return message
+    key = REFERENCE_KEY.format(
+        symbol=message["ticker"], timeframe=message["timeframe"],
+        end=pd.Timestamp(df["timestamp"].iloc[-1]).value // 10**6,
+    )
+    try:
+        redis_client.set(key, payload, ex=int(config["reference_ttl_seconds"]))
+        message["bars_ref"] = key
+    except redis.RedisError as e:
+        logger.warning("Could not store the bar payload of %s: %s", key, e)
+    return message
+
+
+def read_bars(message, redis_client):
+    """
+    Return the bars carried by a data event, or None when the event has none (or
+    its reference expired) and the consumer has to query the database.
+    """
+    try:
+        if message.get("bars"):
+            return decode_bars(message["bars"])
+        if message.get("bars_ref"):
+            payload = redis_client.get(message["bars_ref"])
+            if payload:
+                return decode_bars(payload)
+            logger.info("Bar payload %s expired; falling back to the database.", message["bars_ref"])
+    except (redis.RedisError, ValueError, KeyError) as e:
+        logger.warning("Unreadable bar payload (%s); falling back to the database.", e)
+    return None
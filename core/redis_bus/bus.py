@@ -0,0 +1,17 @@
+from core.config.config_loader import load_settings
+from core.redis_bus.memory_bus import InMemoryBus
+from core.redis_bus.message_bus import get_bus_config
+from core.redis_bus.redis_stream import RedisStream
+
+
+def get_bus(settings_path=None):
+    """
+    A MessageBus for one agent, from the backend selected by bus.backend in settings.yaml.
+
+    Each agent gets its own instance (drained on its own at shutdown); with the memory
+    backend they all share the process's broker.
+    """
+    settings = load_settings(settings_path)
+    if get_bus_config(settings)["backend"] == "memory":
+        return InMemoryBus(settings)
+    return RedisStream(settings_path=settings_path)
@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import threading
+import time
+import redis
+from core.observability.metrics import (
+    BUS_BACKPRESSURE, BUS_BACKPRESSURE_WAIT, CONSUMER_LAG, CONSUMER_OLDEST_PENDING, CONSUMER_PENDING, CONSUMER_TRIMMED,
+)
+from core.redis_bus.message_bus import get_bus_config
+from core.redis_bus.redis_stream import redis_client
+from core.redis_bus.retention import StreamRetention
+
+logger = logging.getLogger("core.redis_bus.bus_monitor")
+
+DEFAULT_BUS_MONITOR = {
+    "enabled": True,
+    "interval_seconds": 15,  # XINFO/XPENDING round per stream
+    "ignore_groups": [],  # Groups left out of the backpressure decision (still exported)
+    # Groups without a consumer that read within this many seconds (e.g. of an agent that is no
+    # longer deployed) are left out of the backpressure decision too
+    "abandoned_after_seconds": 600,
+    "backpressure": {
+        # A stream is congested when any of its groups exceeds one of these...
+        "max_lag": 500,  # Entries not yet delivered
+        "max_pending": 200,  # Entries delivered but not acknowledged
+        "max_oldest_pending_seconds": 300,
+        # ...and clears once every group is below release_ratio of each limit
+        "release_ratio": 0.5,
+        "max_wait_seconds": 60,  # Longest a producer holds a message back before publishing anyway
+        "check_seconds": 1,  # How often a waiting producer re-reads the stream
+    },
+}
+
+_monitor = None
+_lock = threading.Lock()
+
+
+def get_bus_monitor_config(settings):
+    config = dict(DEFAULT_BUS_MONITOR)
+    section = settings.get("bus_monitor", {}) or {}
+    config.update(section)
+    config["backpressure"] = {**DEFAULT_BUS_MONITOR["backpressure"], **(section.get("backpressure") or {})}
+    return config
+
+
+def _id_tuple(entry_id):
+    ms, _, seq = str(entry_id).partition("-")
+    return int(ms), int(seq or 0)
+
+
+class BusMonitor:
+    """
+    Consumer-group health for a set of streams, from XINFO STREAM, XINFO GROUPS and XPENDING.
+
+    Every poll exports lag, pending count, oldest-pending age and entries trimmed before
+    they were read, and updates a per-stream backpressure flag (with hysteresis) that
+    producers consult through wait_for_capacity(). Groups whose consumers have all been
+    idle for abandoned_after_seconds (XINFO CONSUMERS) do not hold producers back.
+    """
+
+    def __init__(self, redis_client, streams, config=None, retention=None):
+        self.redis = redis_client
+        self.streams = list(streams)
+        self.config = config or get_bus_monitor_config({})
+        self.retention = retention  # StreamRetention whose quiet streams are trimmed on every poll
+        self.congested = {}  # stream -> bool
+        self._checked_at = {}  # stream -> monotonic time of the last poll
+        self._trimmed = {}  # (stream, group) -> trimmed-unread count at the last poll
+        self._abandoned = set()  # (stream, group) found abandoned at the last poll
+        self._stop = threading.Event()
+        self._thread = None
+
+    def group_stats(self, stream):
+        """
+        Read the health of every consumer group on a stream.
+
+        Returns:
+            list[dict]: name, lag (None before Redis 7), pending, oldest_pending_seconds,
+                trimmed_unread (None before Redis 7), consumers and idle_seconds (since the most
+                recent read by any of them; None without consumers) per group; empty if the
+                stream does not exist.
+        """
+        try:
+            info = self.redis.xinfo_stream(stream)
+            groups = self.redis.xinfo_groups(stream)
+        except redis.ResponseError:
+            return []  # No such stream yet
+        first_id = info.get("recorded-first-entry-id") or (info["first-entry"][0] if info.get("first-entry") else None)
+        now_ms = time.time() * 1000
+        stats = []
+        for group in groups:
+            oldest = None
+            if group["pending"]:
+                summary = self.redis.xpending(stream, group["name"])
+                # An entry ID starts with the ms it was added: an upper bound on how long it has waited
+                oldest = max(0.0, (now_ms - _id_tuple(summary["min"])[0]) / 1000)
+            trimmed = None
+            if info.get("entries-added") is not None and group.get("entries-read") is not None:
+                trimmed = 0
+                if first_id is None or _id_tuple(group["last-delivered-id"]) < _id_tuple(first_id):
+                    # Nothing left in the stream was delivered; whatever the group has not read and is gone was trimmed
+                    trimmed = max(0, info["entries-added"] - group["entries-read"] - info["length"])
+            consumers = self.redis.xinfo_consumers(stream, group["name"]) if group.get("consumers", 1) else []
+            stats.append({
+                "name": group["name"], "lag": group.get("lag"), "pending": group["pending"],
+                "oldest_pending_seconds": oldest, "trimmed_unread": trimmed, "consumers": len(consumers),
+                "idle_seconds": min(consumer["idle"] for consumer in consumers) / 1000 if consumers else None,
+            })
+        return stats
+
+    def check(self, streams=None):
+        """Poll the streams, export their metrics and update backpressure; returns {stream: group stats}."""
+        result = {}
+        for stream in streams or self.streams:
+            try:
+                stats = self.group_stats(stream)
+            except redis.RedisError as e:
+                logger.warning("Could not read consumer groups of '%s': %s", stream, e)
+                continue
+            for group in stats:
+                self._export(stream, group)
+            self._update_backpressure(stream, stats)
+            self._checked_at[stream] = time.monotonic()
+            result[stream] = stats
+        return result
+
+    def _export(self, stream, group):
+        labels = {"stream": stream, "group": group["name"]}
+        if group["lag"] is not None:
+            CONSUMER_LAG.labels(**labels).set(group["lag"])
+        CONSUMER_PENDING.labels(**labels).set(group["pending"])
+        CONSUMER_OLDEST_PENDING.labels(**labels).set(group["oldest_pending_seconds"] or 0)
+        if group["trimmed_unread"] is not None:
+            previous = self._trimmed.get((stream, group["name"]), 0)
+            if group["trimmed_unread"] > previous:
+                CONSUMER_TRIMMED.labels(**labels).inc(group["trimmed_unread"] - previous)
+                logger.warning("%d entries of '%s' were trimmed before '%s' read them.",
+                               group["trimmed_unread"] - previous, stream, group["name"])
+            self._trimmed[(stream, group["name"])] = group["trimmed_unread"]
+
+    def _is_abandoned(self, stream, group):
+        """Whether no consumer of the group has read for abandoned_after_seconds (logged on change)."""
+        idle = group["idle_seconds"]
+        abandoned = idle is None or idle > self.config["abandoned_after_seconds"]
+        key = (stream, group["name"])
+        if abandoned and key not in self._abandoned:
+            logger.warning("No consumer of '%s' on '%s' has read for %ss; ignored for backpressure.",
+                           group["name"], stream, self.config["abandoned_after_seconds"])
+            self._abandoned.add(key)
+        elif not abandoned and key in self._abandoned:
+            logger.info("'%s' on '%s' is reading again.", group["name"], stream)
+            self._abandoned.discard(key)
+        return abandoned
+
+    def _update_backpressure(self, stream, stats):
+        limits = self.config["backpressure"]
+        ratio = limits["release_ratio"] if self.congested.get(stream) else 1.0
+        over = [
+            group["name"] for group in stats
+            if group["name"] not in self.config["ignore_groups"] and not self._is_abandoned(stream, group) and (
+                (group["lag"] or 0) > limits["max_lag"] * ratio
+                or group["pending"] > limits["max_pending"] * ratio
+                or (group["oldest_pending_seconds"] or 0) > limits["max_oldest_pending_seconds"] * ratio
+            )
+        ]
+        congested = bool(over)
+        if congested != self.congested.get(stream, False):
+            if congested:
+                logger.warning("Backpressure on '%s': %s behind.", stream, ", ".join(over))
+            else:
+                logger.info("Backpressure on '%s' released.", stream)
+        self.congested[stream] = congested
+        BUS_BACKPRESSURE.labels(stream=stream).set(int(congested))
+
+    def is_congested(self, stream):
+        return self.congested.get(stream, False)
+
+    async def wait_for_capacity(self, stream):
+        """
+        Hold a producer back while the stream is congested, re-reading it every check_seconds,
+        for at most max_wait_seconds.
+
+        Returns:
+            float: Seconds waited.
+        """
+        limits = self.config["backpressure"]
+        # The background poll may be up to interval_seconds old; re-read the stream if so
+        if time.monotonic() - self._checked_at.get(stream, float("-inf")) >= self.config["interval_seconds"]:
+            await asyncio.to_thread(self.check, [stream])
+        if not self.is_congested(stream):
+            return 0.0
+        started = time.monotonic()
+        while self.is_congested(stream) and time.monotonic() - started < limits["max_wait_seconds"]:
+            await asyncio.sleep(limits["check_seconds"])
+            await asyncio.to_thread(self.check, [stream])
+        waited = time.monotonic() - started
+        BUS_BACKPRESSURE_WAIT.labels(stream=stream).inc(waited)
+        if self.is_congested(stream):
+            logger.warning("'%s' still congested after %.0fs; publishing anyway.", stream, waited)
+        return waited
+
+    def start(self):
+        """Poll every interval_seconds on a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="bus-monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.check()
+                if self.retention is not None:
+                    self.retention.trim_idle()
+            except Exception as e:
+                logger.error("Bus monitor poll failed: %s", e)
+            self._stop.wait(self.config["interval_seconds"])
+
+
+def start_bus_monitor(settings):
+    """
+    Start this process's monitor of every channel in settings.yaml once; later calls return it.
+
+    Returns:
+        BusMonitor: The running monitor, or None when disabled or the bus is not Redis.
+    """
+    global _monitor
+    config = get_bus_monitor_config(settings)
+    if not config["enabled"] or get_bus_config(settings)["backend"] != "redis":
+        return None
+    with _lock:
+        if _monitor is None:
+            streams = sorted(set((settings.get("channels") or {}).values()))
+            client = redis_client(settings)
+            _monitor = BusMonitor(client, streams, config, retention=StreamRetention(client, settings)).start()
+            logger.info("Monitoring consumer groups on %d streams every %ss.", len(streams), config["interval_seconds"])
+        return _monitor
@@ -0,0 +1,283 @@
+import asyncio
+import collections
+import logging
+import threading
+import time
+from core.observability.log_pipeline import sampled
+from core.observability.metrics import time_handler
+from core.redis_bus.message_bus import MessageBus, get_bus_config
+from core.redis_bus.redis_stream import redis_client
+from core.redis_bus.retention import StreamRetention
+
+logger = logging.getLogger("core.redis_bus.memory_bus")
+
+IDLE_POLL_SECONDS = 1.0  # Idle consumers look for entries due for redelivery this often
+
+_broker = None
+_lock = threading.Lock()
+
+
+def _encode(value):
+    """Field values as Redis returns them to a decode_responses client."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bytes):
+        return value.decode()
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(f"Invalid input of type: '{type(value).__name__}'. Convert to a bytes, string, int or float first.")
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _wake(waiters):
+    for loop, event in waiters:
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            pass  # The consumer's loop has closed
+
+
+def _id_tuple(entry_id):
+    ms, _, seq = str(entry_id).partition("-")
+    return int(ms), int(seq or 0)
+
+
+class _Group:
+    def __init__(self, next_index):
+        self.next_index = next_index  # Absolute index of the next entry never delivered to the group
+        self.pending = collections.OrderedDict()  # entry id -> {"consumer", "delivered_at", "deliveries"}
+        self.waiters = set()  # (loop, asyncio.Event) of the group's idle consumers
+
+
+class _Stream:
+    def __init__(self):
+        self.entries = collections.deque()  # (entry id, fields)
+        self.offset = 0  # Absolute index of entries[0]; grows as entries are trimmed
+        self.by_id = {}
+        self.last_id = (0, 0)
+        self.groups = {}
+
+
+class InMemoryBroker:
+    """
+    Streams and consumer groups held in this process, with the Redis Streams semantics
+    the agents rely on: entry IDs, one delivery per group, a pending list per group
+    until acknowledgement, and redelivery of entries left unacknowledged.
+
+    Thread-safe; consumers waiting on an asyncio loop are woken from any thread.
+    """
+
+    def __init__(self, redeliver_after_seconds=30, max_deliveries=5):
+        self.redeliver_after = redeliver_after_seconds
+        self.max_deliveries = max_deliveries
+        self.streams = collections.defaultdict(_Stream)
+        self._lock = threading.Lock()
+
+    def add(self, stream, fields):
+        """Append an entry (XADD stream * ...) and wake the stream's consumers; returns its ID."""
+        with self._lock:
+            state = self.streams[stream]
+            ms = int(time.time() * 1000)
+            last_ms, last_seq = state.last_id
+            state.last_id = (ms, 0) if ms > last_ms else (last_ms, last_seq + 1)
+            entry_id = f"{state.last_id[0]}-{state.last_id[1]}"
+            state.entries.append((entry_id, fields))
+            state.by_id[entry_id] = fields
+            waiters = [waiter for group in state.groups.values() for waiter in group.waiters]
+        _wake(waiters)
+        return entry_id
+
+    def create_group(self, stream, group, start="0"):
+        """XGROUP CREATE ... MKSTREAM; `start` is "0" (whole stream) or "$" (new entries only). No-op if it exists."""
+        with self._lock:
+            state = self.streams[stream]
+            if group not in state.groups:
+                state.groups[group] = _Group(state.offset if start == "0" else state.offset + len(state.entries))
+
+    def read(self, stream, group, consumer):
+        """
+        Next entry for a consumer: one due for redelivery first, else the group's next new one.
+
+        Returns:
+            tuple: (entry id, fields), or None when there is nothing to read.
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self.streams[stream]
+            consumer_group = state.groups[group]
+            pending = consumer_group.pending
+            for entry_id, delivery in list(pending.items()):
+                if now - delivery["delivered_at"] < self.redeliver_after:
+                    break  # Ordered by delivery time
+                fields = state.by_id.get(entry_id)
+                if fields is None or delivery["deliveries"] >= self.max_deliveries:
+                    del pending[entry_id]
+                    if fields is not None:
+                        logger.error("Dropping entry %s of '%s' for '%s' after %d deliveries.", entry_id, stream, group, delivery["deliveries"])
+                    continue
+                pending.move_to_end(entry_id)
+                delivery.update(consumer=consumer, delivered_at=now, deliveries=delivery["deliveries"] + 1)
+                return entry_id, dict(fields)
+
+            if consumer_group.next_index < state.offset:
+                logger.warning("%d entries of '%s' were trimmed before '%s' read them.",
+                               state.offset - consumer_group.next_index, stream, group)
+                consumer_group.next_index = state.offset
+            position = consumer_group.next_index - state.offset
+            if position >= len(state.entries):
+                return None
+            entry_id, fields = state.entries[position]
+            consumer_group.next_index += 1
+            pending[entry_id] = {"consumer": consumer, "delivered_at": now, "deliveries": 1}
+            return entry_id, dict(fields)
+
+    def ack(self, stream, group, *entry_ids):
+        with self._lock:
+            pending = self.streams[stream].groups[group].pending
+            return sum(pending.pop(entry_id, None) is not None for entry_id in entry_ids)
+
+    def release(self, stream, group, consumer):
+        """Make a consumer's unacknowledged entries due for redelivery now (as a restarted Redis consumer replays them)."""
+        with self._lock:
+            pending = self.streams[stream].groups[group].pending
+            for entry_id, delivery in reversed(list(pending.items())):
+                if delivery["consumer"] == consumer:
+                    delivery["delivered_at"] = float("-inf")
+                    pending.move_to_end(entry_id, last=False)  # Keep the list ordered by delivery time
+
+    def add_waiter(self, stream, group, waiter):
+        with self._lock:
+            self.streams[stream].groups[group].waiters.add(waiter)
+
+    def remove_waiter(self, stream, group, waiter):
+        with self._lock:
+            self.streams[stream].groups[group].waiters.discard(waiter)
+
+    def wake(self, stream=None):
+        """Wake idle consumers (of one stream, or all)."""
+        with self._lock:
+            states = [self.streams[stream]] if stream else list(self.streams.values())
+            waiters = [waiter for state in states for group in state.groups.values() for waiter in group.waiters]
+        _wake(waiters)
+
+    def groups(self, stream):
+        """Like XINFO GROUPS: name, pending and lag (entries not yet delivered) per group."""
+        with self._lock:
+            state = self.streams[stream]
+            end = state.offset + len(state.entries)
+            return [
+                {"name": name, "pending": len(group.pending), "lag": max(0, end - max(group.next_index, state.offset))}
+                for name, group in state.groups.items()
+            ]
+
+    def xtrim(self, stream, minid=None, approximate=True):
+        """XTRIM MINID: drop entries older than `minid` (exactly); returns how many. Lets StreamRetention trim this broker."""
+        bound = _id_tuple(minid)
+        removed = 0
+        with self._lock:
+            state = self.streams[stream]
+            while state.entries and _id_tuple(state.entries[0][0]) < bound:
+                entry_id, _ = state.entries.popleft()
+                del state.by_id[entry_id]
+                state.offset += 1
+                removed += 1
+        return removed
+
+
+def get_broker(settings):
+    """This process's broker, shared by every InMemoryBus."""
+    global _broker
+    with _lock:
+        if _broker is None:
+            config = get_bus_config(settings)
+            _broker = InMemoryBroker(config["redeliver_after_seconds"], config["max_deliveries"])
+        return _broker
+
+
+class InMemoryBus(MessageBus):
+    """
+    MessageBus on the process's InMemoryBroker: no network round trip per message.
+
+    Subscriptions are asyncio tasks on the subscriber's loop; coroutine callbacks run
+    there and synchronous ones in a worker thread. Messages only reach subscribers in
+    the same process, and are lost when it exits. `redis` is still a Redis client for
+    the state agents keep next to the bus (watermarks, bar payload references).
+    """
+
+    def __init__(self, settings, broker=None):
+        super().__init__(settings)
+        self.broker = broker or get_broker(settings)
+        self.redis = redis_client(settings)
+        self.retention = StreamRetention(self.broker, settings)
+        self._stopping = False
+        self._listeners = []
+        logger.info("InMemoryBus initialized with channels: %s", self.channels)
+
+    def publish(self, stream, message, retention_ms=None):
+        logger.info("Publishing message to stream '%s': %s", stream, sampled(logger, message))
+        self.broker.add(stream, {key: _encode(value) for key, value in message.items()})
+        self.retention.published(stream, retention_ms)
+
+    def subscribe(self, stream, callback, consumer_group="market_research_group", consumer_name="market_research_consumer"):
+        logger.info("Subscribing to stream '%s' with consumer group '%s' and consumer name '%s'.", stream, consumer_group, consumer_name)
+        self.broker.create_group(stream, consumer_group)
+        task = asyncio.get_running_loop().create_task(
+            self._listen(stream, callback, consumer_group, consumer_name), name=f"bus:{stream}:{consumer_group}"
+        )
+        self._listeners.append(task)
+
+    async def _listen(self, stream, callback, consumer_group, consumer_name):
+        handler_name = getattr(callback, "__name__", "callback")
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        # Entries this consumer left unacknowledged (a drain timeout) are replayed first
+        self.broker.release(stream, consumer_group, consumer_name)
+        self.broker.add_waiter(stream, consumer_group, waiter)
+        try:
+            while not self._stopping:
+                waiter[1].clear()
+                entry = self.broker.read(stream, consumer_group, consumer_name)
+                if entry is None:
+                    try:
+                        await asyncio.wait_for(waiter[1].wait(), IDLE_POLL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                entry_id, entry_data = entry
+                logger.info("Message received on stream '%s': %s", stream, sampled(logger, entry_data))
+                try:
+                    with time_handler(consumer_group, handler_name):
+                        if asyncio.iscoroutinefunction(callback):
+                            await callback(entry_data)
+                        else:
+                            await asyncio.to_thread(callback, entry_data)
+                except Exception as e:
+                    # Left pending: redelivered after redeliver_after_seconds
+                    logger.error("Error while handling message '%s' on stream '%s': %s", entry_id, stream, str(e))
+                    continue
+                self.broker.ack(stream, consumer_group, entry_id)
+                logger.debug("Acknowledged message ID '%s' on stream '%s'.", entry_id, stream)
+        finally:
+            self.broker.remove_waiter(stream, consumer_group, waiter)
+        logger.info("Stopped listening to stream '%s' (%s/%s).", stream, consumer_group, consumer_name)
+
+    async def drain(self, timeout=30):
+        """
+        Stop reading new messages and wait for in-flight callbacks to finish and be acknowledged.
+
+        Listeners still busy after `timeout` are cancelled; their messages stay pending
+        and are redelivered to the group's next reader.
+
+        Returns:
+            int: Number of listeners still busy when the timeout expired.
+        """
+        self._stopping = True
+        self.broker.wake()  # Idle listeners see the stop at once
+        busy = set()
+        if self._listeners:
+            _, busy = await asyncio.wait(self._listeners, timeout=timeout)
+            for task in busy:
+                task.cancel()
+        if busy:
+            logger.warning("%d listeners still busy after %ss; their messages stay pending for redelivery.", len(busy), timeout)
+        else:
+            logger.info("Drained %d stream listeners.", len(self._listeners))
+        return len(busy)
@@ -0,0 +1,57 @@
+import logging
+
+logger = logging.getLogger("core.redis_bus.message_bus")
+
+DEFAULT_BUS = {
+    "backend": "redis",  # redis: Redis Streams, shared by every process; memory: in-process queues (single mode only)
+    # Both backends: unacknowledged entries go to the next reader of the group after this long...
+    "redeliver_after_seconds": 30,
+    "max_deliveries": 5,  # ...and are dropped (and logged) once delivered this many times
+}
+
+BACKENDS = ("redis", "memory")
+
+
+def get_bus_config(settings):
+    config = dict(DEFAULT_BUS)
+    section = settings.get("bus", {}) or {}
+    config.update(section)
+    config.update(section.get("memory") or {})  # Where earlier settings set them, for the memory backend only
+    if config["backend"] not in BACKENDS:
+        raise ValueError(f"Unknown bus backend '{config['backend']}' (expected one of {', '.join(BACKENDS)}).")
+    return config
+
+
+def channels_from_settings(settings):
+    """Agent name -> stream name, from the channels section (or the older redis.channels)."""
+    return settings.get("channels") or (settings.get("redis", {}) or {}).get("channels") or {}
+
+
+class MessageBus:
+    """
+    Streams with consumer groups, as the agents use them.
+
+    publish() appends a message (a flat dict of str/int/float values; consumers get
+    strings back) to a stream. subscribe() delivers each message to one consumer of
+    each group; it stays pending until the callback returns and is then acknowledged,
+    so a failed or interrupted callback leaves it for redelivery: a reader of the
+    group gets it again once it has been pending for redeliver_after_seconds, up to
+    max_deliveries times (get_bus_config). drain() stops the subscriptions made
+    through this instance, letting in-flight callbacks finish.
+    """
+
+    def __init__(self, settings):
+        self.channels = channels_from_settings(settings)
+
+    def publish(self, stream, message, retention_ms=None):
+        raise NotImplementedError
+
+    def subscribe(self, stream, callback, consumer_group="market_research_group", consumer_name="market_research_consumer"):
+        raise NotImplementedError
+
+    async def drain(self, timeout=30):
+        raise NotImplementedError
+
+    def get_channel(self, agent_name):
+        """Retrieve the stream for a specific agent."""
+        return self.channels.get(agent_name, None)
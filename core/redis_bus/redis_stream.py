@@ -1,24 +1,36 @@
 import redis
 import threading
 import logging
-import logging.config
 import yaml
 import os
 import asyncio
+import time
+from core.observability.log_pipeline import sampled, setup_logging
+from core.observability.metrics import time_handler
+from core.redis_bus.message_bus import MessageBus, get_bus_config
+from core.redis_bus.retention import StreamRetention
 
-# Ensure the logs directory exists
-logs_dir = os.path.join(os.path.dirname(__file__), "../../logs")
-os.makedirs(logs_dir, exist_ok=True)
-
-# Load centralized logging configuration
-logging_config_path = os.path.join(os.path.dirname(__file__), "../config/logging_config.yaml")
-with open(logging_config_path, "r") as file:
-    logging_config = yaml.safe_load(file)
-logging.config.dictConfig(logging_config)
+# Centralized logging configuration (queued, written by a background thread)
+setup_logging()
 
 logger = logging.getLogger("core.redis_stream")
 
-class RedisStream:
+# Appended to consumer names when several processes run the same agent (set by the launcher)
+CONSUMER_SUFFIX = os.environ.get("BOT_CONSUMER_SUFFIX", "")
+
+CLAIM_POLL_SECONDS = 5.0  # Listeners look for entries of their group pending past redeliver_after_seconds this often
+CLAIM_BATCH = 10
+
+def redis_client(settings, decode_responses=True):
+    """Plain Redis client for the `redis` section of settings.yaml (unset placeholders fall back to localhost:6379/0)."""
+    cfg = settings.get("redis", {}) or {}
+    value = lambda key, default: cfg.get(key) if cfg.get(key) not in (None, "") and not str(cfg.get(key)).startswith("$") else default
+    return redis.StrictRedis(
+        host=value("host", "localhost"), port=int(value("port", 6379)), db=int(value("db", 0)),
+        decode_responses=decode_responses,
+    )
+
+class RedisStream(MessageBus):
     def __init__(self, host="localhost", port=6379, db=0, settings_path=None):
         """Initialize the Redis connection."""
         self.redis = redis.StrictRedis(host=host, port=port, db=db, decode_responses=True)
@@ -30,20 +42,30 @@ class RedisStream:
         # Load agent-specific channels from settings.yaml
         with open(settings_path, "r") as file:
             settings = yaml.safe_load(file)
-        self.channels = settings["redis"]["channels"]
+        super().__init__(settings)
+        self.config = get_bus_config(settings)
         logger.info("RedisStream initialized with channels: %s", self.channels)
 
-    def publish(self, stream, message, retention_ms=259200000):
+        # Time-based trimming per channel (stream_retention in settings.yaml), applied in batches
+        self.retention = StreamRetention(self.redis, settings)
+
+        # Drain state for graceful shutdown
+        self._stopping = threading.Event()
+        self._listeners = []
+
+    def publish(self, stream, message, retention_ms=None):
         """
         Publish a message to a Redis Stream with a retention policy.
 
         Args:
             stream (str): The name of the Redis Stream.
             message (dict): The message to publish (key-value pairs).
-            retention_ms (int): Retention period in milliseconds (default: 3 days).
+            retention_ms (int): Retention period in milliseconds (default: the channel's stream_retention policy).
         """
-        logger.info("Publishing message to stream '%s': %s", stream, message)
-        self.redis.xadd(stream, message, maxlen=1000, approximate=True)  # Retain up to 1000 messages
+        logger.info("Publishing message to stream '%s': %s", stream, sampled(logger, message))
+        self.redis.xadd(stream, message)
+        # Entries are kept by age, not count: a burst cannot trim what consumers have not read yet
+        self.retention.published(stream, retention_ms)
 
     def subscribe(self, stream, callback, consumer_group="market_research_group", consumer_name="market_research_consumer"):
         """
@@ -55,6 +77,7 @@ class RedisStream:
             consumer_group (str): The name of the consumer group.
             consumer_name (str): The name of the consumer within the group.
         """
+        consumer_name = f"{consumer_name}{CONSUMER_SUFFIX}"
         logger.info("Subscribing to stream '%s' with consumer group '%s' and consumer name '%s'.", stream, consumer_group, consumer_name)
 
         # Create the consumer group if it doesn't exist
@@ -66,31 +89,97 @@ class RedisStream:
             else:
                 raise
 
+        # Coroutine callbacks run on the subscriber's event loop, which owns the shared DB engine
+        try:
+            owner_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            owner_loop = None
+
+        handler_name = getattr(callback, "__name__", "callback")
+        redeliver_after_ms = int(self.config["redeliver_after_seconds"] * 1000)
+
+        def handle(loop, entry_id, entry_data):
+            if entry_data is None:
+                # Pending entry already trimmed from the stream
+                self.redis.xack(stream, consumer_group, entry_id)
+                return
+            logger.info("Message received on stream '%s': %s", stream, sampled(logger, entry_data))
+            # Check if the callback is asynchronous
+            with time_handler(consumer_group, handler_name):
+                if asyncio.iscoroutinefunction(callback) and owner_loop is not None:
+                    asyncio.run_coroutine_threadsafe(callback(entry_data), owner_loop).result()  # Ack only after it finishes
+                elif asyncio.iscoroutinefunction(callback):
+                    loop.run_until_complete(callback(entry_data))  # Run the coroutine in the thread's event loop
+                else:
+                    callback(entry_data)  # Call the synchronous function
+            # Acknowledge the message
+            self.redis.xack(stream, consumer_group, entry_id)
+            logger.debug("Acknowledged message ID '%s' on stream '%s'.", entry_id, stream)
+
+        def claim(loop):
+            """Take over the group's entries pending for redeliver_after_seconds (failed callbacks, dead consumers)."""
+            due = self.redis.xpending_range(stream, consumer_group, min="-", max="+", count=CLAIM_BATCH, idle=redeliver_after_ms)
+            for pending in due:
+                if pending["times_delivered"] >= self.config["max_deliveries"]:
+                    self.redis.xack(stream, consumer_group, pending["message_id"])
+                    logger.error("Dropping entry %s of '%s' for '%s' after %d deliveries.",
+                                 pending["message_id"], stream, consumer_group, pending["times_delivered"])
+                    continue
+                # min_idle_time again: another consumer of the group may have claimed it since XPENDING
+                for entry_id, entry_data in self.redis.xclaim(stream, consumer_group, consumer_name, redeliver_after_ms, [pending["message_id"]]):
+                    handle(loop, entry_id, entry_data)
+
         def listen():
             loop = asyncio.new_event_loop()  # Create a new event loop for the thread
             asyncio.set_event_loop(loop)  # Set the event loop for this thread
-            while True:
+            # Replay this consumer's pending entries (left by a drain timeout or crash) before reading new ones
+            last_id = "0"
+            claimed_at = time.monotonic()
+            while not self._stopping.is_set():
                 try:
-                    # Read messages from the stream
-                    messages = self.redis.xreadgroup(consumer_group, consumer_name, {stream: ">"}, count=1, block=0)
+                    if last_id == ">" and time.monotonic() - claimed_at >= CLAIM_POLL_SECONDS:
+                        claimed_at = time.monotonic()
+                        claim(loop)
+                    # Read messages from the stream; the block timeout lets drain() stop the loop
+                    messages = self.redis.xreadgroup(consumer_group, consumer_name, {stream: last_id}, count=1, block=1000)
+                    if last_id != ">" and not any(entries for _, entries in messages or []):
+                        last_id = ">"
+                        continue
                     for stream_name, entries in messages:
                         for entry_id, entry_data in entries:
-                            logger.info("Message received on stream '%s': %s", stream, entry_data)
-                            # Check if the callback is asynchronous
-                            if asyncio.iscoroutinefunction(callback):
-                                loop.run_until_complete(callback(entry_data))  # Run the coroutine in the thread's event loop
-                            else:
-                                callback(entry_data)  # Call the synchronous function
-                            # Acknowledge the message
-                            self.redis.xack(stream, consumer_group, entry_id)
-                            logger.info("Acknowledged message ID '%s' on stream '%s'.", entry_id, stream)
+                            if last_id != ">":
+                                last_id = entry_id  # Move past this pending entry even if the callback fails
+                            handle(loop, entry_id, entry_data)
                 except Exception as e:
+                    # A failed callback leaves its entry pending: claimed again after redeliver_after_seconds
                     logger.error("Error while listening to stream '%s': %s", stream, str(e))
+            logger.info("Stopped listening to stream '%s' (%s/%s).", stream, consumer_group, consumer_name)
 
         # Run the listener in a separate thread
         thread = threading.Thread(target=listen, daemon=True)
         thread.start()
+        self._listeners.append(thread)
 
-    def get_channel(self, agent_name):
-        """Retrieve the Redis stream for a specific agent."""
-        return self.channels.get(agent_name, None)
\ No newline at end of file
+    async def drain(self, timeout=30):
+        """
+        Stop reading new messages and wait for in-flight callbacks to finish and be acknowledged.
+
+        Messages whose callbacks do not finish within `timeout` stay in the consumer
+        group's pending list; they are replayed when the consumer subscribes again, or
+        claimed by another consumer of the group after redeliver_after_seconds.
+
+        Returns:
+            int: Number of listeners still busy when the timeout expired.
+        """
+        self._stopping.set()
+        deadline = asyncio.get_running_loop().time() + timeout
+        for thread in self._listeners:
+            remaining = max(0.0, deadline - asyncio.get_running_loop().time())
+            # Join off the loop: in-flight coroutine callbacks still need it to finish
+            await asyncio.to_thread(thread.join, remaining)
+        busy = sum(thread.is_alive() for thread in self._listeners)
+        if busy:
+            logger.warning("%d listeners still busy after %ss; their messages stay pending for redelivery.", busy, timeout)
+        else:
+            logger.info("Drained %d stream listeners.", len(self._listeners))
+        return busy
@@ -0,0 +1,97 @@
+import logging
+import threading
+import time
+import redis
+from prometheus_client import Counter
+
+logger = logging.getLogger("core.redis_bus.retention")
+
+STREAM_TRIMMED = Counter("redis_stream_trimmed_total", "Entries removed from a stream by its retention policy", ["stream"])
+
+DEFAULT_RETENTION = {
+    "retention_ms": 259200000,  # Entries older than this are trimmed (3 days)
+    "trim_every": 100,  # XADDs to a stream between trims...
+    "trim_interval_seconds": 60,  # ...or this long since its last trim, whichever comes first
+}
+
+
+def get_retention_config(settings):
+    """Default policy from the stream_retention section, plus its per-channel overrides under `channels`."""
+    section = settings.get("stream_retention", {}) or {}
+    config = {key: section.get(key, default) for key, default in DEFAULT_RETENTION.items()}
+    config["channels"] = section.get("channels", {}) or {}
+    return config
+
+
+class StreamRetention:
+    """
+    Time-based retention for the bus streams: XTRIM MINID ~ <now - retention_ms>.
+
+    Publishers report each XADD with published(); a stream is trimmed once per
+    trim_every entries or trim_interval_seconds, not on every XADD. trim_idle()
+    covers streams nobody publishes to, so their old entries expire too.
+    """
+
+    def __init__(self, redis_client, settings):
+        self.redis = redis_client
+        config = get_retention_config(settings)
+        self.default = {key: config[key] for key in DEFAULT_RETENTION}
+        channels = settings.get("channels", {}) or {}
+        # Policies are configured by channel name; publishers know the stream name
+        self.policies = {
+            channels.get(name, name): {**self.default, **(overrides or {})}
+            for name, overrides in config["channels"].items()
+        }
+        self.streams = set(channels.values()) | set(self.policies)
+        self._lock = threading.Lock()
+        self._published = {}  # stream -> XADDs since its last trim
+        self._trimmed_at = {}  # stream -> monotonic time of its last trim
+
+    def policy(self, stream):
+        return self.policies.get(stream, self.default)
+
+    def published(self, stream, retention_ms=None):
+        """Count one XADD to `stream` and trim it if a trim is due."""
+        policy = self.policy(stream)
+        now = time.monotonic()
+        with self._lock:
+            count = self._published.get(stream, 0) + 1
+            due = count >= policy["trim_every"] or now - self._trimmed_at.get(stream, float("-inf")) >= policy["trim_interval_seconds"]
+            if due:
+                self._published[stream] = 0
+                self._trimmed_at[stream] = now
+            else:
+                self._published[stream] = count
+        if due:
+            self.trim(stream, retention_ms)
+
+    def trim(self, stream, retention_ms=None):
+        """
+        Remove the entries of `stream` older than its retention (approximately: whole
+        radix-tree nodes only, which keeps XTRIM cheap).
+
+        Returns:
+            int: Entries removed (0 if the trim failed).
+        """
+        retention_ms = retention_ms or self.policy(stream)["retention_ms"]
+        min_id = f"{int(time.time() * 1000) - int(retention_ms)}-0"
+        try:
+            removed = self.redis.xtrim(stream, minid=min_id, approximate=True)
+        except redis.RedisError as e:
+            logger.warning("Could not trim stream '%s': %s", stream, e)
+            return 0
+        if removed:
+            STREAM_TRIMMED.labels(stream=stream).inc(removed)
+            logger.debug("Trimmed %d entries older than %d ms from '%s'.", removed, retention_ms, stream)
+        return removed
+
+    def trim_idle(self):
+        """Trim the known streams that have not been trimmed for trim_interval_seconds."""
+        now = time.monotonic()
+        for stream in sorted(self.streams):
+            with self._lock:
+                if now - self._trimmed_at.get(stream, float("-inf")) < self.policy(stream)["trim_interval_seconds"]:
+                    continue
+                self._published[stream] = 0
+                self._trimmed_at[stream] = now
+            self.trim(stream)
@@ -1,48 +1,43 @@
-# from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
 from agents.ticker_updater.ticker_updater_agent import TickerUpdaterAgent
-# from agents.market_data_collector import fetch_ltf_data, fetch_htf_data
+from core.calendar.trading_calendar import ASSET_CLASS_CALENDARS, get_calendar
+from core.config.config_loader import load_settings
+from core.scheduler.candle_scheduler import CandleScheduler
+from functools import partial
 import logging
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-import asyncio
 
 logger = logging.getLogger("core.scheduler")
 
-def start_scheduler(data_collector_agent):
-# def start_scheduler():
-    """Start the APScheduler and align jobs to candle closes."""
-    scheduler = AsyncIOScheduler()
-    # scheduler = BackgroundScheduler()
+def start_scheduler(data_collector_agent, settings=None):
+    """
+    Start the process's scheduler: the daily ticker update and one data-fetch job
+    per timeframe and asset class, aligned to candle closes (poll ingestion mode only).
+    """
+    settings = settings or load_settings()
+    scheduler = CandleScheduler(settings)
     ticker_updater = TickerUpdaterAgent()
 
-    # 🔁 Schedule the TickerUpdaterAgent to run daily at 23:59
-    scheduler.add_job(
-        ticker_updater.update_tickers,
-        CronTrigger(hour=23, minute=59),
-        id="ticker_updater_job",
-        name="Ticker Updater Agent",
-        misfire_grace_time=300,
-    )
-    logger.info("Scheduled TickerUpdaterAgent to run daily at 23:59.")
+    # 🔁 Schedule the TickerUpdaterAgent to run daily at 23:59 UTC, after the US close
+    scheduler.add_cron_job("ticker_updater_job", ticker_updater.update_tickers, hour=23, minute=59)
 
-    # 🕔 Schedule 5m LTF job on exact 5-min intervals
-    scheduler.add_job(
-        data_collector_agent.fetch_ltf_data,  # Directly pass the coroutine
-        CronTrigger(minute="*/5"),
-        id="ltf_fetch_job",
-        name="Fetch 5m data (LTF)",
-        misfire_grace_time=120,
-    )
-    logger.info("Scheduled LTF data fetch every 5 minutes.")
+    # 🕔 One job per (timeframe, asset class): crypto around the clock, equities during NYSE sessions.
+    # In streaming mode bars arrive from the live feed instead.
+    polling = data_collector_agent.ingestion_mode != "stream"
+    for timeframe_key, timeframe in (settings["timeframes"].items() if polling else []):
+        for asset_class, calendar_name in ASSET_CLASS_CALENDARS.items():
+            scheduler.add_candle_job(
+                f"{timeframe_key}_{asset_class}_fetch_job",
+                timeframe,
+                partial(data_collector_agent.fetch_timeframe, timeframe_key, asset_class),
+                calendar=get_calendar(calendar_name),
+            )
 
-    # ⏰ Schedule 1h HTF job exactly on the hour
-    scheduler.add_job(
-        data_collector_agent.fetch_htf_data,
-        CronTrigger(minute=0),
-        id="htf_fetch_job",
-        name="Fetch 1h data (HTF)",
-        misfire_grace_time=300,
-    )
-    logger.info("Scheduled HTF data fetch every hour.")
+    # 🩹 Periodic gap scan; the backfill itself runs at low priority inside the data collector
+    backfill = data_collector_agent.backfill_config
+    if backfill["enabled"]:
+        scheduler.add_cron_job(
+            "backfill_scan_job", data_collector_agent.scan_for_gaps,
+            minute=f"*/{backfill['scan_interval_minutes']}", second=30,  # Clear of the candle-close fetches
+        )
 
     scheduler.start()
+    return scheduler
@@ -0,0 +1,141 @@
+import asyncio
+import inspect
+import logging
+import re
+import time
+import pandas as pd
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+from prometheus_client import Counter, Histogram
+
+logger = logging.getLogger("core.scheduler")
+
+JOB_LATENESS = Histogram(
+    "scheduler_job_lateness_seconds", "Delay between a candle close (plus settle delay) and its job starting",
+    ["job"], buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60),
+)
+JOB_DURATION = Histogram("scheduler_job_duration_seconds", "Run time of scheduled jobs", ["job"])
+JOB_RUNS = Counter("scheduler_job_runs_total", "Scheduled job runs by outcome", ["job", "outcome"])
+
+DEFAULT_SCHEDULER = {
+    "settle_delay_seconds": 10,  # Wait after the close so the data source has published the candle
+    "misfire_grace_seconds": 60,
+}
+
+_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+
+def get_scheduler_config(settings):
+    config = dict(DEFAULT_SCHEDULER)
+    config.update(settings.get("scheduler", {}) or {})
+    return config
+
+
+def timeframe_seconds(timeframe):
+    """Length of a candle in seconds ("5m" -> 300, "1h" -> 3600, "1d" -> 86400)."""
+    match = re.fullmatch(r"(\d+)([mhd])", timeframe)
+    if not match:
+        raise ValueError(f"Unsupported timeframe '{timeframe}'.")
+    return int(match.group(1)) * _UNITS[match.group(2)]
+
+
+def candle_trigger(timeframe, settle_delay_seconds=0):
+    """
+    Cron trigger firing once at every candle close of `timeframe` (UTC clock boundaries),
+    `settle_delay_seconds` after the close.
+    """
+    if not 0 <= settle_delay_seconds < 60:
+        raise ValueError("settle_delay_seconds must be between 0 and 59.")
+    n, unit = int(timeframe[:-1]), timeframe[-1]
+    timeframe_seconds(timeframe)  # Validate
+    if unit == "m":
+        fields = {"minute": f"*/{n}"}
+    elif unit == "h":
+        fields = {"hour": f"*/{n}", "minute": 0}
+    else:
+        fields = {"day": f"*/{n}", "hour": 0, "minute": 0}
+    return CronTrigger(second=settle_delay_seconds, timezone="UTC", **fields)
+
+
+class CandleScheduler:
+    """
+    The process's single job scheduler, firing jobs on candle closes.
+
+    Each candle job runs once per close of its timeframe, after a settle delay,
+    and only when its trading calendar had a session during the candle that just
+    closed (so crypto jobs run around the clock and equity jobs during NYSE
+    hours, including the close). Lateness and run time are recorded per job.
+    """
+
+    def __init__(self, settings):
+        self.config = get_scheduler_config(settings)
+        self.scheduler = AsyncIOScheduler(timezone="UTC")
+
+    def add_candle_job(self, name, timeframe, func, calendar=None):
+        """
+        Run `func` (coroutine function, or blocking function run in a thread; no arguments)
+        on every close of `timeframe`.
+
+        Args:
+            name (str): Job id, also the metrics label.
+            timeframe (str): Candle timeframe, e.g. "5m" or "1h".
+            func (callable): The job.
+            calendar (TradingCalendar): Skip candles without a session; None runs every close.
+        """
+        self.scheduler.add_job(
+            self._run_candle_job,
+            candle_trigger(timeframe, self.config["settle_delay_seconds"]),
+            args=[name, timeframe, func, calendar],
+            id=name,
+            name=name,
+            max_instances=1,
+            coalesce=True,  # A late scheduler runs a missed close once, not once per missed close
+            misfire_grace_time=self.config["misfire_grace_seconds"],
+            replace_existing=True,
+        )
+        logger.info("Scheduled job '%s' on every %s candle close.", name, timeframe)
+
+    def add_cron_job(self, name, func, **cron_fields):
+        """Run `func` on a plain cron schedule (UTC)."""
+        self.scheduler.add_job(
+            self._run_job, CronTrigger(timezone="UTC", **cron_fields), args=[name, func],
+            id=name, name=name, max_instances=1, coalesce=True,
+            misfire_grace_time=self.config["misfire_grace_seconds"], replace_existing=True,
+        )
+        logger.info("Scheduled job '%s' (%s).", name, cron_fields)
+
+    async def _run_candle_job(self, name, timeframe, func, calendar, now=None):
+        now = time.time() if now is None else now
+        period = timeframe_seconds(timeframe)
+        settle = self.config["settle_delay_seconds"]
+        close = (now - settle) // period * period
+        JOB_LATENESS.labels(job=name).observe(max(0.0, now - close - settle))
+
+        if calendar is not None:
+            candle = pd.to_datetime([close - period, close - 1], unit="s", utc=True)
+            if not calendar.session_mask(candle).any():
+                JOB_RUNS.labels(job=name, outcome="skipped").inc()
+                logger.debug("Skipping '%s': %s had no session in the candle closing at %s.", name, calendar.name, candle[1])
+                return
+        await self._run_job(name, func)
+
+    async def _run_job(self, name, func):
+        started = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(func):
+                await func()
+            else:
+                await asyncio.to_thread(func)  # Blocking jobs must not stall the event loop
+            JOB_RUNS.labels(job=name, outcome="ok").inc()
+        except Exception as e:
+            JOB_RUNS.labels(job=name, outcome="error").inc()
+            logger.exception("Scheduled job '%s' failed: %s", name, e)
+        finally:
+            JOB_DURATION.labels(job=name).observe(time.perf_counter() - started)
+
+    def start(self):
+        self.scheduler.start()
+        logger.info("Scheduler started with jobs: %s", [job.id for job in self.scheduler.get_jobs()])
+
+    def shutdown(self):
+        self.scheduler.shutdown(wait=False)
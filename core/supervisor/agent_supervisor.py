@@ -0,0 +1,171 @@
+import asyncio
+import inspect
+import logging
+import time
+from core.config.config_loader import load_settings
+
+logger = logging.getLogger("core.supervisor")
+
+DEFAULT_SUPERVISOR = {
+    "restart_on_failure": True,
+    "max_restarts": 5,
+    "backoff_seconds": 2,  # Doubled after every consecutive failure
+    "max_backoff_seconds": 60,
+    "health_interval_seconds": 30,
+    "drain_timeout_seconds": 30,  # Time in-flight stream messages get to finish on shutdown
+}
+
+
+class AgentSupervisor:
+    """
+    Launch agents as concurrent asyncio tasks and keep them running.
+
+    Agents are constructed in worker threads (constructors do blocking network
+    calls) and started in parallel. An agent whose start() raises is rebuilt and
+    restarted with exponential backoff, up to `max_restarts` times. An agent whose
+    start() returns is considered running: its work continues on Redis
+    subscriptions and scheduler jobs.
+    """
+
+    def __init__(self, settings=None):
+        settings = settings or load_settings()
+        self.config = dict(DEFAULT_SUPERVISOR)
+        self.config.update(settings.get("supervisor", {}) or {})
+        self._specs = {}
+        self._status = {}
+        self._instances = {}
+        self._started = {}
+        self._tasks = {}
+
+    def register(self, name, factory, start=None):
+        """
+        Register an agent.
+
+        Args:
+            name (str): Agent name, as used by the --agents selector.
+            factory (callable): Builds the agent instance.
+            start (callable): Receives the agent and starts it; may return a coroutine.
+                Defaults to calling agent.start().
+        """
+        self._specs[name] = {"factory": factory, "start": start or (lambda agent: agent.start())}
+        self._started[name] = asyncio.Event()
+
+    @property
+    def names(self):
+        return list(self._specs)
+
+    def get_agent(self, name):
+        return self._instances.get(name)
+
+    async def wait_started(self, name):
+        """Wait for an agent's first successful start and return its instance."""
+        await self._started[name].wait()
+        return self._instances[name]
+
+    def status(self):
+        """Return a snapshot of every agent's state, restarts and startup time."""
+        return {name: dict(status) for name, status in self._status.items()}
+
+    async def run(self, names=None):
+        """Start the selected agents (all by default) in parallel and supervise them until cancelled."""
+        names = names or self.names
+        unknown = [name for name in names if name not in self._specs]
+        if unknown:
+            raise ValueError(f"Unknown agents: {unknown}. Available: {self.names}")
+
+        for name in names:
+            self._status[name] = {"state": "pending", "restarts": 0, "startup_seconds": None, "last_error": None}
+            self._tasks[name] = asyncio.create_task(self._supervise(name), name=f"agent:{name}")
+
+        monitor = asyncio.create_task(self._report_startup(names))
+        try:
+            await self._monitor_health()
+        finally:
+            monitor.cancel()
+            await self.stop()
+
+    async def _report_startup(self, names):
+        """Log per-agent startup time once every agent has started (or given up)."""
+        while not all(self._started[name].is_set() or self._tasks[name].done() for name in names):
+            await asyncio.sleep(0.1)
+        for name in names:
+            status = self._status[name]
+            if status["startup_seconds"] is not None:
+                logger.info("Agent '%s' started in %.2fs.", name, status["startup_seconds"])
+            else:
+                logger.error("Agent '%s' failed to start: %s", name, status["last_error"])
+
+    async def _supervise(self, name):
+        spec = self._specs[name]
+        status = self._status[name]
+        failures = 0
+        while True:
+            started_at = time.perf_counter()
+            status["state"] = "starting"
+            task = None
+            try:
+                agent = await asyncio.to_thread(spec["factory"])
+                self._instances[name] = agent
+                result = spec["start"](agent)
+                if inspect.isawaitable(result):
+                    task = asyncio.ensure_future(result)
+                    # Let start() run up to its first suspension point (subscribed, waiting for work)
+                    await asyncio.wait([task], timeout=0.05)
+                    if task.done():
+                        task.result()  # Raises if start() failed immediately
+                status.update(state="running", startup_seconds=round(time.perf_counter() - started_at, 3), last_error=None)
+                self._started[name].set()
+                failures = 0
+                if task is not None:
+                    await task
+                return  # start() returned: the agent keeps working on its subscriptions/jobs
+            except asyncio.CancelledError:
+                if task is not None:
+                    task.cancel()
+                status["state"] = "stopped"
+                raise
+            except Exception as e:
+                failures += 1
+                status.update(state="failed", last_error=str(e))
+                logger.exception("Agent '%s' failed: %s", name, e)
+                if not self.config["restart_on_failure"] or status["restarts"] >= self.config["max_restarts"]:
+                    logger.error("Agent '%s' will not be restarted (restarts: %d).", name, status["restarts"])
+                    return
+                backoff = min(self.config["backoff_seconds"] * 2 ** (failures - 1), self.config["max_backoff_seconds"])
+                status["restarts"] += 1
+                logger.warning("Restarting agent '%s' in %.1fs (restart %d/%d).", name, backoff, status["restarts"], self.config["max_restarts"])
+                await asyncio.sleep(backoff)
+
+    async def _monitor_health(self):
+        """Periodically log agents that have failed or stopped unexpectedly."""
+        while True:
+            await asyncio.sleep(self.config["health_interval_seconds"])
+            for name, status in self._status.items():
+                if status["state"] == "failed":
+                    logger.error("Agent '%s' is down after %d restarts: %s", name, status["restarts"], status["last_error"])
+            logger.debug("Agent status: %s", self.status())
+
+    async def stop(self):
+        """
+        Shut agents down: drain their Redis listeners, then cancel their tasks and
+        call agent.stop() where an agent defines one.
+        """
+        streams = [agent.redis_stream for agent in self._instances.values() if hasattr(agent, "redis_stream")]
+        await asyncio.gather(
+            *(stream.drain(self.config["drain_timeout_seconds"]) for stream in streams),
+            return_exceptions=True,
+        )
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        for name, agent in self._instances.items():
+            stop = getattr(agent, "stop", None)
+            if stop is None:
+                continue
+            try:
+                result = stop()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error("Error stopping agent '%s': %s", name, e)
+        logger.info("Stopped %d agents.", len(self._tasks))
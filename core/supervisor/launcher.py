@@ -0,0 +1,152 @@
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+logger = logging.getLogger("core.supervisor.launcher")
+
+DEFAULT_DEPLOYMENT = {
+    "mode": "single",
+    "workers": {},
+    "restart_on_failure": True,
+    "max_restarts": 5,
+    "backoff_seconds": 2,
+    "stable_seconds": 300,  # A worker that ran this long before dying starts over with a full restart budget
+}
+
+
+def get_deployment(settings):
+    deployment = dict(DEFAULT_DEPLOYMENT)
+    deployment.update(settings.get("deployment", {}) or {})
+    return deployment
+
+
+def plan_workers(workers, metrics_port=None):
+    """
+    Expand the worker groups from settings.yaml into one entry per process.
+
+    Args:
+        metrics_port (int): Base metrics port; worker N gets metrics_port + 1 + N.
+
+    Returns:
+        list: Dicts with the process name, its agents, CPU affinity, consumer-name suffix
+            and metrics port.
+    """
+    plan = []
+    for group, cfg in workers.items():
+        processes = int(cfg.get("processes", 1))
+        for index in range(processes):
+            plan.append({
+                "name": group if processes == 1 else f"{group}-{index}",
+                "agents": list(cfg["agents"]),
+                "cpu_affinity": list(cfg.get("cpu_affinity") or []),
+                # Replicas share consumer groups, so each one needs its own consumer name
+                "consumer_suffix": "" if processes == 1 else f"-{group}-{index}",
+                "metrics_port": None if metrics_port is None else metrics_port + 1 + len(plan),
+            })
+    return plan
+
+
+def _worker_entry(target, worker):
+    """Process entry point: pin CPUs, tag consumers, then run the worker's agents."""
+    if worker["cpu_affinity"] and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, worker["cpu_affinity"])
+        except OSError as e:
+            logger.warning("Could not pin worker '%s' to CPUs %s: %s", worker["name"], worker["cpu_affinity"], e)
+    if worker["consumer_suffix"]:
+        os.environ["BOT_CONSUMER_SUFFIX"] = worker["consumer_suffix"]
+    if worker.get("metrics_port"):
+        os.environ["BOT_METRICS_PORT"] = str(worker["metrics_port"])
+    target(worker["agents"])
+
+
+class WorkerLauncher:
+    """
+    Run each worker group in its own OS process and restart processes that die.
+
+    Workers talk to each other only through the Redis bus. On SIGINT/SIGTERM every
+    worker is sent SIGTERM, which drains its stream listeners (in-flight messages are
+    acked, unfinished ones stay pending for redelivery) before it exits.
+
+    A worker that dies leaves its unacknowledged entries in its consumers' pending
+    lists. The restarted process keeps the same consumer names and replays them
+    first; those of a worker that is not restarted (restart budget spent) are claimed
+    by the other consumers of the group after bus.redeliver_after_seconds.
+    """
+
+    def __init__(self, deployment, target, drain_timeout=30, metrics_port=None):
+        """
+        Args:
+            deployment (dict): The `deployment` section of settings.yaml.
+            target (callable): Importable function run in each worker with its list of agent names.
+            drain_timeout (int): Seconds a worker gets to drain before it is killed.
+            metrics_port (int): Base port of the workers' metrics exporters (see plan_workers).
+        """
+        self.deployment = deployment
+        self.target = target
+        self.drain_timeout = drain_timeout
+        self.metrics_port = metrics_port
+        self._context = multiprocessing.get_context("spawn")
+        self._processes = {}
+        self._restarts = {}
+        self._started_at = {}
+        self._stop = threading.Event()
+
+    def _spawn(self, worker):
+        process = self._context.Process(target=_worker_entry, args=(self.target, worker), name=f"worker:{worker['name']}")
+        process.start()
+        self._processes[worker["name"]] = (process, worker)
+        self._started_at[worker["name"]] = time.monotonic()
+        logger.info("Started worker '%s' (pid %s) with agents %s on CPUs %s.",
+                    worker["name"], process.pid, worker["agents"], worker["cpu_affinity"] or "any")
+
+    def _request_stop(self, signum, frame):
+        logger.info("Received signal %s; draining workers...", signum)
+        self._stop.set()
+
+    def run(self):
+        """Start every worker and watch them until a shutdown signal arrives."""
+        plan = plan_workers(self.deployment["workers"], self.metrics_port)
+        if not plan:
+            raise ValueError("deployment.workers is empty; nothing to launch.")
+
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        for worker in plan:
+            self._spawn(worker)
+
+        # Waiting on the event instead of sleeping lets a signal end the loop (or a restart backoff) at once
+        while not self._stop.wait(1):
+            for name, (process, worker) in list(self._processes.items()):
+                if process.is_alive() or self._stop.is_set():
+                    continue
+                logger.error("Worker '%s' exited with code %s.", name, process.exitcode)
+                if time.monotonic() - self._started_at[name] >= self.deployment["stable_seconds"]:
+                    self._restarts[name] = 0  # Occasional crashes do not add up to the budget
+                restarts = self._restarts.get(name, 0)
+                if not self.deployment["restart_on_failure"] or restarts >= self.deployment["max_restarts"]:
+                    logger.error("Worker '%s' will not be restarted (restarts: %d).", name, restarts)
+                    del self._processes[name]
+                    continue
+                self._restarts[name] = restarts + 1
+                if self._stop.wait(self.deployment["backoff_seconds"] * 2 ** restarts):
+                    break
+                self._spawn(worker)
+        self.shutdown()
+
+    def shutdown(self):
+        """Ask every worker to drain and exit; kill the ones that overrun the drain timeout."""
+        for process, _ in self._processes.values():
+            if process.is_alive():
+                process.terminate()  # SIGTERM -> graceful drain in the worker
+        deadline = time.monotonic() + self.drain_timeout + 5
+        for name, (process, _) in self._processes.items():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning("Worker '%s' did not drain in time; killing it.", name)
+                process.kill()
+                process.join()
+        logger.info("All workers stopped.")
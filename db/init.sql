@@ -7,17 +7,59 @@ CREATE TABLE
         symbol VARCHAR(20) NOT NULL,
         timeframe VARCHAR(10) NOT NULL,
         timestamp TIMESTAMPTZ NOT NULL,
-        open NUMERIC NOT NULL,
-        high NUMERIC NOT NULL,
-        low NUMERIC NOT NULL,
-        close NUMERIC NOT NULL,
-        volume NUMERIC NOT NULL,
+        open DOUBLE PRECISION NOT NULL,
+        high DOUBLE PRECISION NOT NULL,
+        low DOUBLE PRECISION NOT NULL,
+        close DOUBLE PRECISION NOT NULL,
+        volume DOUBLE PRECISION NOT NULL,
         PRIMARY KEY (symbol, timestamp, timeframe)
     );
 
 -- Create a hypertable for efficient time-series queries
+-- (compression and retention policies live in db/migrations/001_ohlcv_storage_policy.sql)
 SELECT
-    create_hypertable ('ohlcv_data', 'timestamp', if_not_exists = > TRUE);
+    create_hypertable (
+        'ohlcv_data',
+        'timestamp',
+        chunk_time_interval => INTERVAL '1 day',
+        if_not_exists => TRUE
+    );
+
+-- 5m bars, kept apart so their retention drops whole chunks (core/db/storage_policy.py)
+CREATE TABLE
+    IF NOT EXISTS ohlcv_data_5m (
+        symbol VARCHAR(20) NOT NULL,
+        timeframe VARCHAR(10) NOT NULL,
+        timestamp TIMESTAMPTZ NOT NULL,
+        open DOUBLE PRECISION NOT NULL,
+        high DOUBLE PRECISION NOT NULL,
+        low DOUBLE PRECISION NOT NULL,
+        close DOUBLE PRECISION NOT NULL,
+        volume DOUBLE PRECISION NOT NULL,
+        PRIMARY KEY (symbol, timestamp, timeframe)
+    );
+
+SELECT
+    create_hypertable (
+        'ohlcv_data_5m',
+        'timestamp',
+        chunk_time_interval => INTERVAL '1 day',
+        if_not_exists => TRUE
+    );
+
+-- Daily-bar cache for the market research screener (see db/migrations/003_research_daily_bars.sql)
+CREATE TABLE
+    IF NOT EXISTS research_daily_bars (
+        symbol VARCHAR(20) NOT NULL,
+        timestamp TIMESTAMPTZ NOT NULL,
+        open DOUBLE PRECISION NOT NULL,
+        high DOUBLE PRECISION NOT NULL,
+        low DOUBLE PRECISION NOT NULL,
+        close DOUBLE PRECISION NOT NULL,
+        volume DOUBLE PRECISION NOT NULL,
+        fetched_at TIMESTAMPTZ NOT NULL DEFAULT NOW (),
+        PRIMARY KEY (symbol, timestamp)
+    );
 
 -- Create a table for tracked FVGs
 CREATE TABLE
@@ -26,15 +68,15 @@ CREATE TABLE
         symbol VARCHAR(20) NOT NULL,
         timeframe VARCHAR(10) NOT NULL,
         direction TEXT NOT NULL,
-        high NUMERIC NOT NULL,
-        low NUMERIC NOT NULL,
+        high DOUBLE PRECISION NOT NULL,
+        low DOUBLE PRECISION NOT NULL,
         formed_at TIMESTAMPTZ NOT NULL,
         status TEXT NOT NULL, -- pending, filled, invalidated
         confirmed BOOLEAN DEFAULT FALSE,
         msb_confirmed BOOLEAN DEFAULT FALSE,
-        fvg_height NUMERIC,
-        pct_of_price NUMERIC,
-        avg_height NUMERIC,
+        fvg_height DOUBLE PRECISION,
+        pct_of_price DOUBLE PRECISION,
+        avg_height DOUBLE PRECISION,
         inversion_time TIMESTAMPTZ,
         signal_emitted_at TIMESTAMPTZ,
         metadata JSONB,
@@ -48,7 +90,7 @@ CREATE TABLE
         symbol VARCHAR(20) NOT NULL,
         timeframe VARCHAR(10) NOT NULL,
         type TEXT NOT NULL, -- buy-side or sell-side
-        level NUMERIC NOT NULL,
+        level DOUBLE PRECISION NOT NULL,
         formed_at TIMESTAMPTZ NOT NULL,
         tapped BOOLEAN DEFAULT FALSE,
         tap_time TIMESTAMPTZ,
@@ -0,0 +1,88 @@
+-- Storage policies for the OHLCV hypertables.
+-- Safe to re-run. The values below are the defaults from settings.yaml (storage.ohlcv);
+-- run `python -m core.db.storage_policy` to re-apply them after changing the settings.
+
+-- 5m bars get a hypertable of their own with the same columns, so that their retention
+-- drops whole chunks; ohlcv_data keeps the HTF bars indefinitely.
+CREATE TABLE
+    IF NOT EXISTS ohlcv_data_5m (
+        symbol VARCHAR(20) NOT NULL,
+        timeframe VARCHAR(10) NOT NULL,
+        timestamp TIMESTAMPTZ NOT NULL,
+        open DOUBLE PRECISION NOT NULL,
+        high DOUBLE PRECISION NOT NULL,
+        low DOUBLE PRECISION NOT NULL,
+        close DOUBLE PRECISION NOT NULL,
+        volume DOUBLE PRECISION NOT NULL,
+        PRIMARY KEY (symbol, timestamp, timeframe)
+    );
+
+SELECT
+    create_hypertable (
+        'ohlcv_data_5m',
+        'timestamp',
+        chunk_time_interval => INTERVAL '1 day',
+        if_not_exists => TRUE
+    );
+
+-- Move the 5m bars stored so far (a no-op once they have moved). Rows of compressed
+-- chunks cannot be deleted on every TimescaleDB version, so the chunks are decompressed
+-- first; the compression policy compresses them again.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM ohlcv_data WHERE timeframe = '5m' LIMIT 1) THEN
+        IF EXISTS (SELECT 1 FROM timescaledb_information.compression_settings WHERE hypertable_name = 'ohlcv_data') THEN
+            PERFORM decompress_chunk(c, if_compressed => TRUE) FROM show_chunks('ohlcv_data') c;
+        END IF;
+        INSERT INTO ohlcv_data_5m (symbol, timeframe, timestamp, open, high, low, close, volume)
+        SELECT symbol, timeframe, timestamp, open, high, low, close, volume FROM ohlcv_data WHERE timeframe = '5m'
+        ON CONFLICT (symbol, timestamp, timeframe) DO NOTHING;
+        DELETE FROM ohlcv_data WHERE timeframe = '5m';
+    END IF;
+END
+$$;
+
+-- Smaller chunks for the 5m ingest rate (only affects chunks created from now on)
+SELECT
+    set_chunk_time_interval ('ohlcv_data', INTERVAL '1 day');
+
+-- Native compression, one segment per (symbol, timeframe) series. The settings cannot be
+-- changed once chunks are compressed, so they are only set on a hypertable without them.
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM timescaledb_information.compression_settings WHERE hypertable_name = 'ohlcv_data') THEN
+        ALTER TABLE ohlcv_data SET (
+            timescaledb.compress,
+            timescaledb.compress_segmentby = 'symbol, timeframe',
+            timescaledb.compress_orderby = 'timestamp DESC'
+        );
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM timescaledb_information.compression_settings WHERE hypertable_name = 'ohlcv_data_5m') THEN
+        ALTER TABLE ohlcv_data_5m SET (
+            timescaledb.compress,
+            timescaledb.compress_segmentby = 'symbol, timeframe',
+            timescaledb.compress_orderby = 'timestamp DESC'
+        );
+    END IF;
+END
+$$;
+
+SELECT
+    add_compression_policy ('ohlcv_data', INTERVAL '7 days', if_not_exists => TRUE);
+
+SELECT
+    add_compression_policy ('ohlcv_data_5m', INTERVAL '7 days', if_not_exists => TRUE);
+
+-- 5m retention: drop whole chunks older than 90 days
+SELECT
+    add_retention_policy ('ohlcv_data_5m', INTERVAL '90 days', if_not_exists => TRUE);
+
+-- Earlier revisions of this migration trimmed 5m rows with a DELETE job
+SELECT
+    delete_job (job_id)
+FROM
+    timescaledb_information.jobs
+WHERE
+    proc_name = 'ohlcv_timeframe_retention';
+
+DROP PROCEDURE IF EXISTS ohlcv_timeframe_retention;
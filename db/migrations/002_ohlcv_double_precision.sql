@@ -0,0 +1,48 @@
+-- Store market data as DOUBLE PRECISION instead of arbitrary-precision NUMERIC.
+-- Prices come from float sources (yfinance) and are analysed as float64, so NUMERIC
+-- only added Decimal decoding and casting on every read. Volume stays 8-byte: REAL
+-- keeps ~7 significant digits, which is not enough for crypto dollar volumes.
+--
+-- Compressed chunks cannot change column types, so compression is switched off
+-- for the duration of the migration and restored afterwards.
+
+SELECT
+    remove_compression_policy ('ohlcv_data', if_exists => TRUE);
+
+SELECT
+    decompress_chunk (c, if_compressed => TRUE)
+FROM
+    show_chunks ('ohlcv_data') c;
+
+ALTER TABLE ohlcv_data
+SET
+    (timescaledb.compress = FALSE);
+
+ALTER TABLE ohlcv_data
+ALTER COLUMN open TYPE DOUBLE PRECISION,
+ALTER COLUMN high TYPE DOUBLE PRECISION,
+ALTER COLUMN low TYPE DOUBLE PRECISION,
+ALTER COLUMN close TYPE DOUBLE PRECISION,
+ALTER COLUMN volume TYPE DOUBLE PRECISION;
+
+ALTER TABLE ohlcv_data
+SET
+    (
+        timescaledb.compress,
+        timescaledb.compress_segmentby = 'symbol, timeframe',
+        timescaledb.compress_orderby = 'timestamp DESC'
+    );
+
+SELECT
+    add_compression_policy ('ohlcv_data', INTERVAL '7 days', if_not_exists => TRUE);
+
+-- Levels derived from ohlcv_data by the TechnicalAnalysisAgent
+ALTER TABLE tracked_fvgs
+ALTER COLUMN high TYPE DOUBLE PRECISION,
+ALTER COLUMN low TYPE DOUBLE PRECISION,
+ALTER COLUMN fvg_height TYPE DOUBLE PRECISION,
+ALTER COLUMN pct_of_price TYPE DOUBLE PRECISION,
+ALTER COLUMN avg_height TYPE DOUBLE PRECISION;
+
+ALTER TABLE tracked_liquidity
+ALTER COLUMN level TYPE DOUBLE PRECISION;
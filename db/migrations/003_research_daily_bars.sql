@@ -0,0 +1,15 @@
+-- Daily-bar cache for the market research screener.
+-- Raw (USD) yfinance daily bars; MarketResearchAgent tops it up incrementally and
+-- converts to EUR when reading. Safe to re-run.
+CREATE TABLE
+    IF NOT EXISTS research_daily_bars (
+        symbol VARCHAR(20) NOT NULL,
+        timestamp TIMESTAMPTZ NOT NULL,
+        open DOUBLE PRECISION NOT NULL,
+        high DOUBLE PRECISION NOT NULL,
+        low DOUBLE PRECISION NOT NULL,
+        close DOUBLE PRECISION NOT NULL,
+        volume DOUBLE PRECISION NOT NULL,
+        fetched_at TIMESTAMPTZ NOT NULL DEFAULT NOW (),
+        PRIMARY KEY (symbol, timestamp)
+    );
@@ -8,66 +8,114 @@ from agents.execution.execution_agent import ExecutionAgent
 from agents.position_tracker.position_tracker_agent import PositionTrackerAgent
 from agents.journaling.journaling_agent import JournalingAgent
 from agents.performance_measurer.performance_measurer_agent import PerformanceMeasurerAgent  # Import the agent
+from core.db.engine import dispose_engines
+from core.supervisor.agent_supervisor import AgentSupervisor
+from core.supervisor.launcher import WorkerLauncher, get_deployment
+from core.config.config_loader import load_settings
+from core.observability.metrics import get_metrics_config, start_metrics_server
+from core.observability.profiler import install_profiler
+from core.redis_bus.bus_monitor import start_bus_monitor
+from core.redis_bus.message_bus import get_bus_config
+import argparse
 import logging
 import asyncio
+import signal
 
 # Initialize logger
 logging.basicConfig(level=logging.INFO)
 
-async def start_agents():
-    """Start all agents in the correct order."""
-    logging.info("Starting the Agentic Trading Bot...")
-
-    # Initialize the TickerUpdaterAgent and trigger it to update tickers
-    ticker_updater_agent = TickerUpdaterAgent()
-    logging.info("Running the TickerUpdaterAgent to update tickers...")
-    ticker_updater_agent.update_tickers()
-
-    # Initialize and start the MarketResearchAgent
-    market_research_agent = MarketResearchAgent()
-    market_research_agent.subscribe_to_ticker_updates()  # Call the synchronous method directly
-
-    # Initialize and start the DataCollectorAgent
-    data_collector_agent = DataCollectorAgent()
-    await data_collector_agent.start()
-
-    # Initialize and start the TechnicalAnalysisAgent
-    technical_analysis_agent = TechnicalAnalysisAgent()
-    await technical_analysis_agent.start()
-    
-    # Initialize and start the PortfolioManagerAgent
-    portfolio_manager_agent = PortfolioManagerAgent()
-    await portfolio_manager_agent.start()
+# name -> (agent class, how to start it; None means `await agent.start()`)
+AGENTS = {
+    # Ticker update runs once at startup; it triggers the MarketResearchAgent through Redis
+    "ticker_updater": (TickerUpdaterAgent, lambda agent: asyncio.to_thread(agent.update_tickers)),
+    "market_research": (MarketResearchAgent, lambda agent: agent.subscribe_to_ticker_updates()),
+    "data_collector": (DataCollectorAgent, None),
+    "technical_analysis": (TechnicalAnalysisAgent, None),
+    "portfolio_manager": (PortfolioManagerAgent, None),
+    "execution": (ExecutionAgent, None),
+    "position_tracker": (PositionTrackerAgent, None),
+    "journaling": (JournalingAgent, None),
+    "performance_measurer": (PerformanceMeasurerAgent, None),
+}
 
-    # Initialize and start the ExecutionAgent
-    execution_agent = ExecutionAgent()
-    await execution_agent.start()
+def build_supervisor():
+    """Register every agent with the supervisor."""
+    supervisor = AgentSupervisor()
+    for name, (factory, start) in AGENTS.items():
+        supervisor.register(name, factory, start=start)
+    return supervisor
 
-    # Initialize and start the PositionTrackerAgent
-    position_tracker_agent = PositionTrackerAgent()
-    await position_tracker_agent.start()
+async def start_agents(names=None):
+    """Start the selected agents (all by default) concurrently under the supervisor."""
+    logging.info("Starting the Agentic Trading Bot...")
+    supervisor = build_supervisor()
+    run_task = asyncio.create_task(supervisor.run(names))
+    try:
+        if names is None or "data_collector" in names:
+            # Start the scheduler once the data_collector_agent is up
+            data_collector_agent = await supervisor.wait_started("data_collector")
+            start_scheduler(data_collector_agent)
 
-    # Initialize and start the JournalingAgent
-    journaling_agent = JournalingAgent()
-    await journaling_agent.start()
+        logging.info("[main.py] Loop ID: %s", id(asyncio.get_running_loop()))
+        await run_task
+    finally:
+        # Make sure the supervisor drains its agents whatever interrupted us
+        run_task.cancel()
+        await asyncio.gather(run_task, return_exceptions=True)
 
-    # Initialize and start the PerformanceMeasurerAgent
-    performance_measurer_agent = PerformanceMeasurerAgent()
-    await performance_measurer_agent.start()
-    
-    logging.info("All agents started successfully.")
-    logging.info("[main.py] Loop ID: %s", id(asyncio.get_running_loop()))
+async def main(names=None):
+    # SIGTERM (sent by the launcher or a container runtime) shuts down like Ctrl-C: drain, then exit
+    main_task = asyncio.current_task()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, main_task.cancel)
+    # One /metrics exporter per process, shared by all of its agents; profiling hooks when enabled
+    settings = load_settings()
+    start_metrics_server(settings)
+    install_profiler(settings)
+    start_bus_monitor(settings)
+    try:
+        await start_agents(names)
+    except asyncio.CancelledError:
+        logging.info("Shutdown requested; agents drained.")
+    finally:
+        # Close the shared connection pools before the loop goes away
+        await dispose_engines()
 
-    # Start the scheduler and pass in the data_collector_agent
-    start_scheduler(data_collector_agent)
-    # start_scheduler()
+def run_worker(names):
+    """Entry point of a worker process in multiprocess mode."""
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main(names))
+    except KeyboardInterrupt:
+        pass  # The launcher coordinates shutdown
 
-    # Keep the application running
-    while True:
-        await asyncio.sleep(1)  # Prevent the script from exiting
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the Agentic Trading Bot.")
+    parser.add_argument(
+        "--agents",
+        help="Comma-separated agents to run in this process (default: all). Available: " + ", ".join(AGENTS),
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["single", "multiprocess"],
+        help="single: all selected agents in this process; multiprocess: one process per worker group "
+             "from deployment.workers in settings.yaml (default: deployment.mode).",
+    )
+    args = parser.parse_args()
+    args.agents = [name.strip() for name in args.agents.split(",") if name.strip()] if args.agents else None
+    return args
 
 if __name__ == "__main__":
-    try:
-        asyncio.run(start_agents())
-    except (KeyboardInterrupt, SystemExit):
-        logging.info("Shutting down the Agentic Trading Bot...")
\ No newline at end of file
+    args = parse_args()
+    settings = load_settings()
+    deployment = get_deployment(settings)
+    if (args.mode or deployment["mode"]) == "multiprocess":
+        if get_bus_config(settings)["backend"] == "memory":
+            raise SystemExit("bus.backend 'memory' only connects agents within one process; use --mode single or the redis backend.")
+        drain_timeout = settings.get("supervisor", {}).get("drain_timeout_seconds", 30)
+        metrics_port = get_metrics_config(settings)["port"]
+        WorkerLauncher(deployment, run_worker, drain_timeout=drain_timeout, metrics_port=metrics_port).run()
+    else:
+        try:
+            asyncio.run(main(args.agents))
+        except (KeyboardInterrupt, SystemExit):
+            logging.info("Shutting down the Agentic Trading Bot...")
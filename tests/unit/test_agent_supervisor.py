@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from core.supervisor.agent_supervisor import AgentSupervisor
+
+SETTINGS = {"supervisor": {"backoff_seconds": 0, "max_restarts": 2, "health_interval_seconds": 0.01}}
+
+class BlockingAgent:
+    """Agent whose start() never returns, like TechnicalAnalysisAgent."""
+    def __init__(self):
+        self.started = False
+
+    async def start(self):
+        self.started = True
+        while True:
+            await asyncio.sleep(1)
+
+class FailingAgent:
+    attempts = 0
+
+    def __init__(self):
+        FailingAgent.attempts += 1
+
+    async def start(self):
+        raise RuntimeError("boom")
+
+async def run_for(supervisor, names, seconds):
+    task = asyncio.create_task(supervisor.run(names))
+    await asyncio.sleep(seconds)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+def test_blocking_agents_start_concurrently():
+    """A start() that never returns must not hold up the agents registered after it."""
+    supervisor = AgentSupervisor(settings=SETTINGS)
+    supervisor.register("first", BlockingAgent)
+    supervisor.register("second", BlockingAgent)
+
+    asyncio.run(run_for(supervisor, None, 0.2))
+
+    status = supervisor.status()
+    assert supervisor.get_agent("first").started
+    assert supervisor.get_agent("second").started
+    assert status["second"]["startup_seconds"] is not None
+
+def test_failing_agent_restarted_up_to_limit():
+    """A failing agent is rebuilt and restarted max_restarts times, then left down."""
+    FailingAgent.attempts = 0
+    supervisor = AgentSupervisor(settings=SETTINGS)
+    supervisor.register("failing", FailingAgent)
+    supervisor.register("healthy", BlockingAgent)
+
+    asyncio.run(run_for(supervisor, None, 0.3))
+
+    status = supervisor.status()
+    assert FailingAgent.attempts == 3
+    assert status["failing"]["state"] == "failed"
+    assert status["failing"]["restarts"] == 2
+    assert status["healthy"]["state"] == "stopped"
+
+def test_agent_selector():
+    """Only the selected agents are started."""
+    supervisor = AgentSupervisor(settings=SETTINGS)
+    supervisor.register("first", BlockingAgent)
+    supervisor.register("second", BlockingAgent)
+
+    asyncio.run(run_for(supervisor, ["second"], 0.1))
+
+    assert supervisor.get_agent("first") is None
+    assert supervisor.get_agent("second").started
@@ -0,0 +1,52 @@
+import asyncio
+import time
+from unittest.mock import MagicMock
+import numpy as np
+import pandas as pd
+from core.calendar.trading_calendar import get_calendar
+from agents.market_data_collector.backfill import expected_bar_timestamps, find_gaps
+from agents.market_data_collector.watermarks import WatermarkStore
+
+def test_expected_bars_follow_sessions():
+    """Equity bars start at the session open and skip the weekend; crypto bars cover the clock."""
+    start, end = pd.Timestamp("2024-03-08", tz="UTC"), pd.Timestamp("2024-03-11 16:00", tz="UTC")
+
+    equity = pd.to_datetime(expected_bar_timestamps(get_calendar("NYSE"), "1h", start, end), utc=True)
+    crypto = expected_bar_timestamps(get_calendar("CRYPTO"), "1h", start, end)
+
+    # Friday 14:30-21:00 UTC (EST) -> 7 bars; Monday 13:30 UTC (EDT) until 16:00 -> 13:30, 14:30 closed
+    assert len(equity) == 9
+    assert equity[0] == pd.Timestamp("2024-03-08 14:30", tz="UTC")
+    assert equity[-1] == pd.Timestamp("2024-03-11 14:30", tz="UTC")
+    assert len(crypto) == 3 * 24 + 16
+
+def test_find_gaps_groups_and_merges_ranges():
+    expected = pd.date_range("2024-03-05 00:00", periods=12, freq="5min", tz="UTC").asi8
+    actual = np.delete(expected, [2, 3, 6, 10])
+
+    ranges, missing = find_gaps(expected, actual, "5m")
+    merged, _ = find_gaps(expected, actual, "5m", merge_gap_bars=2)
+
+    assert missing == 4
+    assert ranges[0] == (pd.Timestamp("2024-03-05 00:10", tz="UTC"), pd.Timestamp("2024-03-05 00:20", tz="UTC"))
+    assert len(ranges) == 3
+    assert [r[0].minute for r in merged] == [10, 50]  # 2-3 and 6 merge (2 bars apart), 10 stays separate
+
+def test_fruitless_backfills_cool_down():
+    """A gap Yahoo had nothing for is skipped until retry_after passes; older records are dropped."""
+    store = {"AAPL:5m:2024-01-02T15:00:00+00:00": str(int(time.time()) - 7200)}
+    client = MagicMock()
+    client.hset.side_effect = lambda key, field, value: store.__setitem__(field, str(value))
+    client.hgetall.side_effect = lambda key: dict(store)
+    client.hdel.side_effect = lambda key, *fields: [store.pop(field) for field in fields]
+    watermarks = WatermarkStore(client, db_engine=None)
+    start = pd.Timestamp("2024-03-05 14:30", tz="UTC")
+
+    async def run():
+        await watermarks.record_fruitless_backfill("AAPL", "1h", start.to_pydatetime())
+        return await watermarks.backfill_cooldowns(3600)
+
+    cooling_down = asyncio.run(run())
+
+    assert cooling_down == {watermarks.backfill_field("AAPL", "1h", start)}
+    assert list(store) == ["AAPL:1h:2024-03-05T14:30:00+00:00"]  # The 2-hour-old record expired
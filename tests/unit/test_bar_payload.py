@@ -0,0 +1,57 @@
+import asyncio
+import pandas as pd
+from unittest.mock import patch, AsyncMock
+from core.redis_bus.bar_payload import DEFAULT_BAR_PAYLOAD, attach_bars, read_bars
+from agents.technical_analysis.utils.window_cache import OHLCVWindowCache
+
+class FakeRedis(dict):
+    def set(self, key, value, ex=None):
+        self[key] = value
+
+def bars(start, periods):
+    timestamps = pd.date_range(start, periods=periods, freq="5min", tz="UTC")
+    return pd.DataFrame({"timestamp": timestamps, "open": 1.5, "high": 2.0, "low": 1.0, "close": range(periods), "volume": 10.0})
+
+def test_bars_round_trip_inline_and_by_reference():
+    df = bars(pd.Timestamp.now(tz="UTC").floor("5min"), 3)
+    redis_client = FakeRedis()
+
+    inline = attach_bars({"ticker": "AAPL", "timeframe": "5m"}, df, redis_client, {**DEFAULT_BAR_PAYLOAD, "mode": "inline"})
+    large = attach_bars({"ticker": "AAPL", "timeframe": "5m"}, df, redis_client, {**DEFAULT_BAR_PAYLOAD, "mode": "inline", "max_inline_bytes": 10})
+    skipped = attach_bars({"ticker": "AAPL", "timeframe": "5m"}, df, redis_client, {**DEFAULT_BAR_PAYLOAD, "mode": "inline", "max_bars": 2})
+
+    assert "bars" in inline and "bars_ref" in large and len(redis_client) == 1
+    pd.testing.assert_frame_equal(read_bars(inline, redis_client), df.astype({"close": "float64"}))
+    pd.testing.assert_frame_equal(read_bars(large, redis_client), read_bars(inline, redis_client))
+    assert read_bars(skipped, redis_client) is None  # Consumer queries the database
+
+def test_window_cache_merges_pushed_bars_and_reloads_on_gaps():
+    now = pd.Timestamp.now(tz="UTC").floor("5min")
+    stored = bars(now - pd.Timedelta(minutes=50), 10)
+    cache = OHLCVWindowCache(db_engine=None)
+
+    with patch("agents.technical_analysis.utils.window_cache.load_ohlcv_window", new=AsyncMock(return_value=stored)) as load:
+        asyncio.run(cache.get("AAPL", "5m", 1))
+        window = asyncio.run(cache.get("AAPL", "5m", 1, new_bars=bars(now - pd.Timedelta(minutes=5), 2)))
+        assert load.await_count == 1
+        assert len(window) == 11 and window["timestamp"].is_monotonic_increasing
+
+        asyncio.run(cache.get("AAPL", "5m", 1, new_bars=bars(now + pd.Timedelta(hours=1), 1)))  # Gap: reload
+        assert load.await_count == 2
+
+def test_window_cache_keeps_stored_bars_and_reloads_stale_windows():
+    now = pd.Timestamp.now(tz="UTC").floor("5min")
+    stored = bars(now - pd.Timedelta(minutes=50), 10)
+    cache = OHLCVWindowCache(db_engine=None, max_age_seconds=60)
+
+    with patch("agents.technical_analysis.utils.window_cache.load_ohlcv_window", new=AsyncMock(return_value=stored)) as load:
+        asyncio.run(cache.get("AAPL", "1h", 1))
+        revised = bars(now - pd.Timedelta(minutes=5), 1).assign(close=99.0)
+        window = asyncio.run(cache.get("AAPL", "1h", 1, new_bars=revised))
+        assert window["close"].iloc[-1] == 9  # Stored bar kept, as ON CONFLICT DO NOTHING does
+
+        asyncio.run(cache.get("AAPL", "1h", 1))
+        assert load.await_count == 1
+        cache.updated_at[("AAPL", "1h")] -= 61  # Not extended by an event for longer than max_age_seconds
+        asyncio.run(cache.get("AAPL", "1h", 1))
+        assert load.await_count == 2
@@ -0,0 +1,93 @@
+import asyncio
+import time
+from prometheus_client import REGISTRY
+from core.redis_bus.bus_monitor import BusMonitor, get_bus_monitor_config
+
+STREAM = "data_collector_channel"
+
+class FakeRedis:
+    """XINFO/XPENDING replies of one stream with a fast and a slow consumer group."""
+
+    def __init__(self):
+        now_ms = int(time.time() * 1000)
+        self.info = {"length": 1000, "entries-added": 1500, "recorded-first-entry-id": f"{now_ms - 60000}-0"}
+        self.groups = [
+            {"name": "ta_group", "pending": 0, "lag": 0, "entries-read": 1500, "last-delivered-id": f"{now_ms}-0"},
+            # Last read before the current first entry: 1500 - 200 - 1000 entries were trimmed unread
+            {"name": "pm_group", "pending": 3, "lag": None, "entries-read": 200, "last-delivered-id": f"{now_ms - 90000}-0"},
+        ]
+        self.oldest_pending = f"{now_ms - 120000}-0"
+        self.consumers = {"ta_group": [{"name": "ta_consumer", "pending": 0, "idle": 500}],
+                          "pm_group": [{"name": "pm_consumer", "pending": 3, "idle": 2000}]}
+
+    def xinfo_stream(self, stream):
+        return self.info
+
+    def xinfo_groups(self, stream):
+        return self.groups
+
+    def xinfo_consumers(self, stream, group):
+        return self.consumers[group]
+
+    def xpending(self, stream, group):
+        return {"pending": 3, "min": self.oldest_pending, "max": self.oldest_pending, "consumers": []}
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def make_monitor(redis_client, **backpressure):
+    config = get_bus_monitor_config({"bus_monitor": {"backpressure": {"check_seconds": 0.01, **backpressure}}})
+    return BusMonitor(redis_client, [STREAM], config)
+
+def test_group_stats_are_exported():
+    trimmed = sample("redis_consumer_trimmed_unread_total", stream=STREAM, group="pm_group")
+    stats = {group["name"]: group for group in make_monitor(FakeRedis()).check()[STREAM]}
+
+    assert stats["ta_group"]["trimmed_unread"] == 0
+    assert stats["pm_group"]["trimmed_unread"] == 300
+    assert 119 < stats["pm_group"]["oldest_pending_seconds"] < 125
+    assert sample("redis_consumer_pending", stream=STREAM, group="pm_group") == 3
+    assert sample("redis_consumer_trimmed_unread_total", stream=STREAM, group="pm_group") - trimmed == 300
+
+def test_backpressure_releases_below_the_release_ratio():
+    fake = FakeRedis()
+    fake.groups[1]["pending"] = 0
+    fake.groups[0]["lag"] = 600
+    monitor = make_monitor(fake, max_lag=500, release_ratio=0.5)
+    monitor.check()
+    assert monitor.is_congested(STREAM)
+
+    fake.groups[0]["lag"] = 300  # Under the limit but above half of it: still congested
+    monitor.check()
+    assert monitor.is_congested(STREAM)
+
+    fake.groups[0]["lag"] = 100
+    monitor.check()
+    assert not monitor.is_congested(STREAM)
+    assert sample("bus_backpressure", stream=STREAM) == 0
+
+def test_wait_for_capacity_returns_when_consumers_catch_up():
+    fake = FakeRedis()
+    fake.groups[1]["pending"] = 0
+    fake.groups[0]["lag"] = 600
+    monitor = make_monitor(fake, max_lag=500, max_wait_seconds=5)
+
+    async def run():
+        asyncio.get_running_loop().call_later(0.05, fake.groups[0].update, {"lag": 0})
+        return await monitor.wait_for_capacity(STREAM)
+
+    waited = asyncio.run(run())
+    assert 0.05 <= waited < 1
+    assert not monitor.is_congested(STREAM)
+
+def test_groups_without_active_consumers_do_not_hold_producers_back():
+    fake = FakeRedis()
+    fake.groups[0]["lag"] = 600
+    fake.consumers["ta_group"][0]["idle"] = 3600 * 1000  # Agent no longer deployed
+    monitor = make_monitor(fake, max_lag=500)
+    assert monitor.check()[STREAM][0]["idle_seconds"] == 3600
+    assert not monitor.is_congested(STREAM)
+
+    fake.consumers["ta_group"][0]["idle"] = 0  # Reading again
+    monitor.check()
+    assert monitor.is_congested(STREAM)
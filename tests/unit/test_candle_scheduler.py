@@ -0,0 +1,36 @@
+import asyncio
+from datetime import datetime, timezone
+import pytest
+from unittest.mock import AsyncMock
+from core.calendar.trading_calendar import get_calendar
+from core.scheduler.candle_scheduler import CandleScheduler, candle_trigger, JOB_RUNS
+
+def ts(text):
+    return datetime.fromisoformat(text).replace(tzinfo=timezone.utc)
+
+def test_trigger_fires_on_candle_close_plus_settle_delay():
+    """The first run after 10:32 is the 10:35 close, not 10:37."""
+    trigger = candle_trigger("5m", settle_delay_seconds=10)
+    assert trigger.get_next_fire_time(None, ts("2024-03-05T10:32:00")) == ts("2024-03-05T10:35:10")
+
+    hourly = candle_trigger("1h", settle_delay_seconds=10)
+    assert hourly.get_next_fire_time(None, ts("2024-03-05T10:32:00")) == ts("2024-03-05T11:00:10")
+
+    with pytest.raises(ValueError):
+        candle_trigger("5m", settle_delay_seconds=90)
+
+def test_equity_jobs_follow_the_nyse_session():
+    """Equity jobs run for candles overlapping a session (including the one closing at 16:00 ET) only."""
+    scheduler = CandleScheduler({"scheduler": {"settle_delay_seconds": 10}})
+    nyse = get_calendar("NYSE")
+    job = AsyncMock()
+
+    def run_at(text):
+        asyncio.run(scheduler._run_candle_job("test_equity", "5m", job, nyse, now=ts(text).timestamp()))
+
+    run_at("2024-03-05T21:00:10")  # Candle 20:55-21:00 UTC, the last of the EST session
+    run_at("2024-03-05T21:05:10")  # After the close
+    run_at("2024-03-09T15:00:10")  # Saturday
+
+    assert job.await_count == 1
+    assert JOB_RUNS.labels(job="test_equity", outcome="skipped")._value.get() == 2
@@ -3,11 +3,14 @@ from unittest.mock import patch, AsyncMock, MagicMock
 from agents.market_data_collector.data_collector_agent import DataCollectorAgent
 import pandas as pd 
 import asyncio
+from tenacity import wait_none
+from core.fx.fx_service import StaticFXService
 
 @pytest.fixture
 def agent():
     """Fixture to initialize the DataCollectorAgent."""
-    return DataCollectorAgent()
+    with patch("agents.market_data_collector.data_collector_agent.get_fx_service", return_value=StaticFXService({"USD/EUR": 0.9})):
+        return DataCollectorAgent()
 
 @patch("agents.market_data_collector.data_collector_agent.yf.Ticker")
 def test_fetch_ohlcv(mock_ticker, agent):
@@ -28,12 +31,52 @@ def test_fetch_ohlcv(mock_ticker, agent):
     assert len(df) == 2
     assert list(df.columns) == ["timestamp", "open", "high", "low", "close", "volume", "symbol", "timeframe"]
 
-@patch("agents.data_collector.data_collector_agent.DataCollectorAgent.store_data", new_callable=AsyncMock)
-@patch("agents.data_collector.data_collector_agent.DataCollectorAgent.publish_raw_data_event", new_callable=AsyncMock)
-def test_process_filtered_assets(mock_publish, mock_store, agent):
+class YFRateLimitError(Exception):
+    pass
+
+class YFPricesMissingError(Exception):
+    pass
+
+@patch("agents.market_data_collector.data_collector_agent.yf.Ticker")
+def test_throttled_fetch_reaches_the_limiter_and_is_retried(mock_ticker, agent):
+    """A 429 is raised inside the limiter's block (so it pauses and backs off) and retried by @retry."""
+    mock_ticker.return_value.history.side_effect = YFRateLimitError("Too Many Requests. Rate limited. Try after a while.")
+    agent.limiter = MagicMock()
+
+    with patch.object(DataCollectorAgent.fetch_ohlcv.retry, "wait", wait_none()):
+        with pytest.raises(YFRateLimitError):
+            agent.fetch_ohlcv("AAPL", "1h", 30)
+
+    assert mock_ticker.return_value.history.call_count == 3
+    assert mock_ticker.return_value.history.call_args.kwargs["raise_errors"] is True
+    assert agent.limiter.request.return_value.__exit__.call_args[0][0] is YFRateLimitError
+
+@patch("agents.market_data_collector.data_collector_agent.yf.Ticker")
+def test_missing_data_is_not_a_provider_failure(mock_ticker, agent):
+    mock_ticker.return_value.history.side_effect = YFPricesMissingError("possibly delisted; no price data found")
+    agent.limiter = MagicMock()
+
+    assert agent.fetch_ohlcv("DELISTED", "1h", 30) is None
+    assert mock_ticker.return_value.history.call_count == 1
+    assert agent.limiter.request.return_value.__exit__.call_args[0][0] is None
+
+@patch("agents.market_data_collector.data_collector_agent.yf.Ticker")
+@patch("agents.market_data_collector.data_collector_agent.DataCollectorAgent.store_data", new_callable=AsyncMock)
+@patch("agents.market_data_collector.data_collector_agent.DataCollectorAgent.publish_raw_data_event", new_callable=AsyncMock)
+def test_process_filtered_assets(mock_publish, mock_store, mock_ticker, agent):
     """Test the process_filtered_assets method."""
+    mock_ticker.return_value.history.return_value = pd.DataFrame(
+        {"Date": ["2023-01-01"], "Open": [100], "High": [105], "Low": [95], "Close": [102], "Volume": [1000]}
+    )
+    agent.watermarks = MagicMock(get_many=AsyncMock(return_value={}), set_many=AsyncMock())
     message = {"filtered_assets": '["AAPL", "MSFT"]'}
-    asyncio.run(agent.process_filtered_assets(message))
+
+    async def run():
+        agent._loop = asyncio.get_running_loop()
+        agent._semaphore = asyncio.Semaphore(2)
+        await agent.process_filtered_assets(message)
+
+    asyncio.run(run())
     mock_store.assert_called()
     mock_publish.assert_called()
 
@@ -54,12 +97,50 @@ def test_empty_database(mock_publish, mock_store, mock_ticker, agent):
         }
     )
 
-    # Simulate an empty database by returning None for last fetched timestamp
-    agent.get_last_fetched_timestamp = AsyncMock(return_value=None)
+    # Simulate an empty database: no last fetched timestamp
+    async def run():
+        agent._loop = asyncio.get_running_loop()
+        agent._semaphore = asyncio.Semaphore(1)
+        return await agent.process_ohlcv("AAPL", "ltf", last_fetched=None)
 
-    # Run the fetch_and_store_ohlcv method
-    asyncio.run(agent.process_ohlcv("AAPL"))
+    asyncio.run(run())
 
     # Verify that data was stored and events were published
     mock_store.assert_called()
-    mock_publish.assert_called()
\ No newline at end of file
+    mock_publish.assert_called()
+
+def test_fetch_cycle_batches_watermarks(agent):
+    """One watermark read before and one write after the cycle, with the new watermark of each fetched pair."""
+    agent.watermarks = MagicMock()
+    agent.watermarks.get_many = AsyncMock(return_value={("AAPL", "5m"): pd.Timestamp("2024-03-05 10:00", tz="UTC")})
+    agent.watermarks.set_many = AsyncMock()
+    new_bar = pd.Timestamp("2024-03-05 10:05", tz="UTC")
+    agent.process_ohlcv = AsyncMock(side_effect=lambda asset, key, last: new_bar if asset == "AAPL" else None)
+
+    asyncio.run(agent.run_fetch_cycle(["AAPL", "MSFT"], ["ltf"]))
+
+    agent.watermarks.get_many.assert_awaited_once()
+    agent.process_ohlcv.assert_any_await("AAPL", "ltf", pd.Timestamp("2024-03-05 10:00", tz="UTC"))
+    agent.process_ohlcv.assert_any_await("MSFT", "ltf", None)
+    agent.watermarks.set_many.assert_awaited_once_with({("AAPL", "5m"): new_bar})
+
+def test_backpressure_wait_does_not_hold_a_fetch_slot(agent):
+    """While one fetch waits for the congested bus, the others still get the semaphore."""
+    agent.bus_monitor = MagicMock()
+    agent.fetch_ohlcv = MagicMock(return_value=None)
+    waiting = []
+
+    async def wait_for_capacity(stream):
+        waiting.append(agent.semaphore.locked())
+        await asyncio.sleep(0.05)
+
+    agent.bus_monitor.wait_for_capacity = wait_for_capacity
+
+    async def run():
+        agent._loop = asyncio.get_running_loop()
+        agent._semaphore = asyncio.Semaphore(1)
+        await asyncio.gather(agent.process_ohlcv("AAPL", "ltf"), agent.process_ohlcv("MSFT", "ltf"))
+
+    asyncio.run(run())
+    assert waiting == [False, False]
+    assert agent.fetch_ohlcv.call_count == 2
@@ -0,0 +1,54 @@
+import asyncio
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+import core.db.engine as db_engine
+
+DB_CFG = {"user": "bot_user", "password": "bot_password", "host": "localhost", "port": 5432, "db": "trading_bot"}
+
+@pytest.fixture(autouse=True)
+def clear_registry():
+    """Start every test with an empty engine registry."""
+    db_engine._engines.clear()
+    db_engine._sync_engines.clear()
+    yield
+    db_engine._engines.clear()
+    db_engine._sync_engines.clear()
+
+@patch("core.db.engine._instrument")
+@patch("core.db.engine.create_async_engine")
+def test_engine_shared_per_dsn(mock_create, mock_instrument):
+    """Agents asking for the same database get the same engine."""
+    mock_create.side_effect = lambda *args, **kwargs: MagicMock()
+
+    first = db_engine.get_async_engine(DB_CFG)
+    second = db_engine.get_async_engine(dict(DB_CFG))
+    other = db_engine.get_async_engine({**DB_CFG, "db": "backtest"})
+
+    assert first is second
+    assert other is not first
+    assert mock_create.call_count == 2
+
+@patch("core.db.engine._instrument")
+@patch("core.db.engine.create_async_engine")
+def test_pool_settings_applied(mock_create, mock_instrument):
+    """Pool settings from settings.yaml override the defaults."""
+    db_engine.get_async_engine({**DB_CFG, "pool": {"size": 3, "statement_cache_size": 0}})
+
+    kwargs = mock_create.call_args.kwargs
+    assert kwargs["pool_size"] == 3
+    assert kwargs["max_overflow"] == db_engine.DEFAULT_POOL["max_overflow"]
+    assert kwargs["connect_args"] == {"statement_cache_size": 0}
+
+@patch("core.db.engine._instrument")
+@patch("core.db.engine.create_async_engine")
+def test_dispose_engines(mock_create, mock_instrument):
+    """dispose_engines closes every pool and empties the registry."""
+    engine = MagicMock()
+    engine.dispose = AsyncMock()
+    mock_create.return_value = engine
+
+    db_engine.get_async_engine(DB_CFG)
+    asyncio.run(db_engine.dispose_engines())
+
+    engine.dispose.assert_awaited_once()
+    assert db_engine._engines == {}
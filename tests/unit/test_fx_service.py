@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+from unittest.mock import MagicMock
+from core.fx.fx_service import FXService, StaticFXService, DEFAULT_FX, utc_days
+
+RATES = {"USD/EUR": {"2024-03-11": 0.90, "2024-03-12": 0.91, "2024-03-15": 0.95}}
+
+def test_convert_uses_each_bars_daily_rate():
+    """Each bar is converted at the rate of its own day (or the last day before it)."""
+    fx = StaticFXService(RATES)
+    df = pd.DataFrame({
+        "timestamp": pd.to_datetime(["2024-03-11 15:00", "2024-03-13 15:00", "2024-03-15 09:00"], utc=True),
+        "open": [100.0] * 3, "high": [100.0] * 3, "low": [100.0] * 3, "close": [100.0] * 3, "volume": [10.0] * 3,
+    })
+
+    fx.convert(df, "USD", "EUR")
+
+    assert df["close"].tolist() == pytest.approx([90.0, 91.0, 95.0])  # 13th has no rate: uses the 12th
+    assert df["volume"].tolist() == [10.0] * 3
+
+def test_rates_shared_through_redis():
+    """A series fetched once is cached in Redis and reused by other services without a fetch."""
+    store = {}
+    client = MagicMock()
+    client.set.side_effect = lambda key, value, ex: store.__setitem__(key, value)
+    client.get.side_effect = lambda key: store.get(key)
+    fetcher = MagicMock(side_effect=StaticFXService(RATES)._fetch)
+
+    first = FXService(client, dict(DEFAULT_FX), fetcher=fetcher)
+    second = FXService(client, dict(DEFAULT_FX), fetcher=fetcher)
+
+    assert first.rate("USD", "EUR") == pytest.approx(0.95)
+    assert second.rate("USD", "EUR", at="2024-03-12 10:00") == pytest.approx(0.91)
+    assert fetcher.call_count == 1
+    assert client.set.call_args.kwargs["ex"] == DEFAULT_FX["ttl_seconds"]
+
+def test_missing_rate_falls_back():
+    fx = StaticFXService({})
+    assert fx.rate("USD", "EUR") == DEFAULT_FX["fallback_rate"]
+    assert fx.rate("EUR", "EUR") == 1.0
+
+def test_daily_bars_keep_their_london_date_in_summer():
+    """Yahoo's 00:00 Europe/London bars are 23:00 UTC the day before during BST; the rate belongs to the London date."""
+    index = pd.DatetimeIndex(["2024-07-01 00:00", "2024-07-02 00:00", "2024-12-02 00:00"], tz="Europe/London")
+
+    days = utc_days(index)
+
+    assert days.tolist() == list(pd.to_datetime(["2024-07-01", "2024-07-02", "2024-12-02"], utc=True))
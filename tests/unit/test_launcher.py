@@ -0,0 +1,72 @@
+import signal
+import threading
+import time
+from core.supervisor.launcher import DEFAULT_DEPLOYMENT, WorkerLauncher, plan_workers
+
+def test_plan_workers_expands_replicas():
+    """Each replica becomes its own process with a distinct consumer-name suffix."""
+    workers = {
+        "ingest": {"agents": ["data_collector"], "cpu_affinity": [0]},
+        "technical_analysis": {"agents": ["technical_analysis"], "processes": 2, "cpu_affinity": [1, 2]},
+    }
+
+    plan = plan_workers(workers, metrics_port=8000)
+
+    assert [w["name"] for w in plan] == ["ingest", "technical_analysis-0", "technical_analysis-1"]
+    assert plan[0]["consumer_suffix"] == ""
+    assert plan[1]["consumer_suffix"] != plan[2]["consumer_suffix"]
+    assert plan[2]["agents"] == ["technical_analysis"]
+    assert plan[2]["cpu_affinity"] == [1, 2]
+    assert [w["metrics_port"] for w in plan] == [8001, 8002, 8003]  # One exporter per process
+
+class DeadProcess:
+    exitcode = 1
+
+    def is_alive(self):
+        return False
+
+    def terminate(self):
+        pass
+
+    def join(self, timeout=None):
+        pass
+
+def make_launcher(**deployment):
+    config = {**DEFAULT_DEPLOYMENT, "workers": {"ingest": {"agents": ["data_collector"]}}, **deployment}
+    launcher = WorkerLauncher(config, target=print, drain_timeout=0)
+    spawned = []
+
+    def spawn(worker):
+        spawned.append(worker["name"])
+        launcher._processes[worker["name"]] = (DeadProcess(), worker)
+        launcher._started_at[worker["name"]] = 0.0  # Long enough ago to count as a stable run
+
+    launcher._spawn = spawn
+    handlers = signal.getsignal(signal.SIGINT), signal.getsignal(signal.SIGTERM)
+    return launcher, spawned, handlers
+
+def restore(handlers):
+    signal.signal(signal.SIGINT, handlers[0])
+    signal.signal(signal.SIGTERM, handlers[1])
+
+def test_stop_signal_interrupts_the_restart_backoff():
+    launcher, spawned, handlers = make_launcher(backoff_seconds=60)
+    threading.Timer(1.5, launcher._request_stop, args=(15, None)).start()
+    started = time.monotonic()
+    try:
+        launcher.run()
+    finally:
+        restore(handlers)
+
+    assert time.monotonic() - started < 10
+    assert spawned == ["ingest"]  # Stopped during the backoff, before the restart
+
+def test_restart_budget_resets_after_a_stable_run():
+    launcher, spawned, handlers = make_launcher(backoff_seconds=0, max_restarts=1, stable_seconds=1)
+    threading.Timer(3.5, launcher._request_stop, args=(15, None)).start()
+    try:
+        launcher.run()
+    finally:
+        restore(handlers)
+
+    assert len(spawned) >= 3  # Every crash came after a stable run, so max_restarts=1 never ran out
@@ -0,0 +1,50 @@
+import json
+import logging
+import queue
+from core.observability.log_pipeline import DroppingQueueHandler, JsonFormatter, PayloadSampler, PayloadSummary, sampled
+
+def test_payloads_are_sampled_at_info_and_logged_in_full_at_debug():
+    logger = logging.getLogger("tests.log_pipeline")
+    message = {"ticker": "AAPL", "entry_price": 101.5}
+    sampler = PayloadSampler(3)
+
+    logger.setLevel(logging.INFO)
+    logged = [sampled(logger, message, sampler) for _ in range(6)]
+    assert [item is message for item in logged] == [True, False, False, True, False, False]
+    assert str(logged[1]) == "<2 fields: ticker, entry_price>"
+
+    logger.setLevel(logging.DEBUG)
+    assert sampled(logger, message, sampler) is message
+
+def test_json_formatter_renders_lazy_arguments():
+    record = logging.LogRecord("agents.x", logging.INFO, __file__, 1, "Received %s", (PayloadSummary([1, 2]),), None)
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "Received <2 items>" and entry["logger"] == "agents.x"
+
+class Payload:
+    rendered = 0
+
+    def __str__(self):
+        Payload.rendered += 1
+        return "<payload>"
+
+def test_records_are_queued_unformatted():
+    records = queue.Queue()
+    logger = logging.getLogger("tests.log_pipeline.queue")
+    logger.propagate = False
+    logger.addHandler(DroppingQueueHandler(records, route=0))
+    try:
+        logger.error("Received %s", Payload())
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            logger.exception("Failed")
+    finally:
+        logger.handlers.clear()
+
+    received, failed = records.get_nowait(), records.get_nowait()
+    assert Payload.rendered == 0 and isinstance(received.args[0], Payload)  # Interpolated by the writer thread
+    assert received.log_route == 0
+    assert failed.exc_info is None and "RuntimeError: boom" in failed.exc_text
+    entry = json.loads(JsonFormatter().format(received))
+    assert entry["message"] == "Received <payload>" and Payload.rendered == 1
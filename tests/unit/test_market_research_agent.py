@@ -4,6 +4,9 @@ from unittest.mock import patch, MagicMock, mock_open
 from unittest import mock  # Import mock for mock.ANY
 from agents.market_research.market_research_agent import MarketResearchAgent
 import os
+from datetime import datetime, timedelta, timezone
+from core.fx.fx_service import StaticFXService
+from agents.market_research.bar_cache import DailyBarCache, DEFAULT_BAR_CACHE
 
 @pytest.fixture
 def agent():
@@ -12,7 +15,8 @@ def agent():
     settings_path = os.path.join(
         os.path.dirname(__file__), "../../core/config/settings.yaml"
     )
-    return MarketResearchAgent(settings_path=settings_path)
+    with patch("agents.market_research.market_research_agent.get_fx_service", return_value=StaticFXService({"USD/EUR": 0.9})):
+        return MarketResearchAgent(settings_path=settings_path)
 
 @patch("builtins.open", new_callable=mock_open, read_data='{"coin50": ["bitcoin", "ethereum"]}')
 def test_fetch_assets(mock_open, agent):
@@ -39,8 +43,8 @@ def test_fetch_ohlcv(mock_ticker, agent):
     assert isinstance(df, pd.DataFrame)
     assert len(df) == 2
     assert list(df.columns) == ["timestamp", "open", "high", "low", "close", "volume", "daily_returns"]
-    assert df["daily_returns"].iloc[0] == (102 - 100) / 100
-    assert df["daily_returns"].iloc[1] == (112 - 110) / 110
+    assert df["daily_returns"].iloc[0] == pytest.approx((102 - 100) / 100)  # Converted at a fixed rate
+    assert df["daily_returns"].iloc[1] == pytest.approx((112 - 110) / 110)
 
 def test_filter_assets(agent):
     """Test the filter_assets method."""
@@ -105,7 +109,7 @@ def test_filter_assets(agent):
     assert "BTC-USD" in filtered_assets
     assert "ETH-USD" not in filtered_assets
 
-@patch("agents.market_research.market_research_agent.create_engine")
+@patch("agents.market_research.market_research_agent.get_sync_engine")
 def test_store_data(mock_engine, agent):
     """Test the store_data method."""
     mock_conn = MagicMock()
@@ -122,7 +126,7 @@ def test_store_data(mock_engine, agent):
 @patch("agents.market_research.market_research_agent.MarketResearchAgent.fetch_ohlcv")
 @patch("agents.market_research.market_research_agent.MarketResearchAgent.filter_assets")
 @patch("agents.market_research.market_research_agent.MarketResearchAgent.store_data")
-@patch("agents.market_research.market_research_agent.RedisStream.publish")
+@patch("core.redis_bus.redis_stream.RedisStream.publish")
 def test_run(mock_publish, mock_store, mock_filter, mock_fetch_ohlcv, mock_fetch_assets, agent):
     """Test the run method."""
     mock_fetch_assets.return_value = ["bitcoin", "ethereum"]
@@ -130,6 +134,7 @@ def test_run(mock_publish, mock_store, mock_filter, mock_fetch_ohlcv, mock_fetch
         {"timestamp": ["2023-01-01"], "price": [30000]}
     )
     mock_filter.return_value = ["bitcoin"]
+    agent.bar_cache = None  # Download directly instead of going through research_daily_bars
 
     agent.run()
 
@@ -137,4 +142,56 @@ def test_run(mock_publish, mock_store, mock_filter, mock_fetch_ohlcv, mock_fetch
     mock_fetch_ohlcv.assert_called()
     mock_filter.assert_called_once()
     # mock_store.assert_called_once_with("bitcoin", mock.ANY)
-    mock_publish.assert_called_once_with(agent.market_research_signals_channel, {"filtered_assets": '["bitcoin"]'})
\ No newline at end of file
+    mock_publish.assert_called_once_with(agent.market_research_signals_channel, {"filtered_assets": '["bitcoin"]'})
+
+@patch("agents.market_research.market_research_agent.MarketResearchAgent.fetch_ohlcv")
+def test_fetch_universe_fetches_each_asset_once(mock_fetch_ohlcv, agent):
+    """Duplicate tickers are fetched once and assets without data are dropped."""
+    mock_fetch_ohlcv.side_effect = lambda asset: None if asset == "DELISTED" else pd.DataFrame({"close": [1.0]})
+    agent.bar_cache = None
+
+    ohlcv_data = agent.fetch_universe(["AAPL", "BTC-USD", "AAPL", "DELISTED"])
+
+    assert list(ohlcv_data) == ["AAPL", "BTC-USD"]
+    assert sorted(call.args[0] for call in mock_fetch_ohlcv.call_args_list) == ["AAPL", "BTC-USD", "DELISTED"]
+
+def test_screen_assets_ranks_and_applies_enabled_filters(agent):
+    """Every filter is evaluated; only the enabled ones decide pass/fail, ranked by score."""
+    agent.settings["agents"]["market_research"].update({
+        "volume_threshold": {"stocks": 1000, "crypto": 1000},
+        "volatility_threshold": 0.0,
+        "price_change_threshold": 0.05,
+        "min_price": {"stocks": 1, "crypto": 0.05},
+        "filters": ["liquidity", "momentum"],
+    })
+
+    def frame(close, volume):
+        df = pd.DataFrame({"open": [10.0] * len(close), "close": close, "volume": [volume] * len(close)})
+        df["daily_returns"] = (df["close"] - df["open"]) / df["open"]
+        return df
+
+    ohlcv_data = {
+        "FLAT": frame([10.0, 10.0, 10.1, 10.0, 10.0], 5000),    # No momentum
+        "MOVER": frame([10.0, 10.5, 11.0, 11.5, 12.0], 5000),   # +20% over 5 days
+        "RUNNER": frame([10.0, 11.0, 12.0, 13.0, 14.0], 9000),  # Bigger move, more volume
+        "SHORT": frame([10.0, 11.0], 9000),                     # Not enough history
+    }
+
+    screen = agent.screen_assets(ohlcv_data, coin50=[])
+    filtered_assets = agent.filter_assets(ohlcv_data, [], [])
+
+    assert list(screen.index) == ["RUNNER", "MOVER", "FLAT"]
+    assert not screen.loc["FLAT", "has_momentum"]
+    assert screen.loc["MOVER", "recent_change"] == pytest.approx(0.2)
+    assert filtered_assets == ["RUNNER", "MOVER"]
+
+def test_bar_cache_staleness_policy():
+    """Only the bars missing from the cache are downloaded."""
+    cache = DailyBarCache(MagicMock(), dict(DEFAULT_BAR_CACHE))
+    now = datetime(2024, 3, 15, 18, 0, tzinfo=timezone.utc)
+    yesterday = datetime(2024, 3, 14, tzinfo=timezone.utc)
+
+    assert cache.plan(None, now=now) == {"period": "30d"}  # Never cached
+    assert cache.plan((now - timedelta(days=45), now - timedelta(days=45)), now=now) == {"period": "30d"}  # Too old to top up
+    assert cache.plan((yesterday, now - timedelta(minutes=5)), now=now) is None  # Fetched recently
+    assert cache.plan((yesterday, now - timedelta(hours=3)), now=now) == {"start": "2024-03-14"}  # Top up from the last session
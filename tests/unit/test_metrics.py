@@ -0,0 +1,25 @@
+import pytest
+from prometheus_client import REGISTRY
+from core.observability.metrics import time_handler, track_queue
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def test_handler_timings_and_errors_are_recorded_per_agent():
+    calls = sample("agent_handler_seconds_count", agent="ta_group", handler="process_new_data")
+    errors = sample("agent_handler_errors_total", agent="ta_group", handler="process_new_data")
+
+    with time_handler("ta_group", "process_new_data"):
+        pass
+    with pytest.raises(ValueError):
+        with time_handler("ta_group", "process_new_data"):
+            raise ValueError("bad message")
+
+    assert sample("agent_handler_seconds_count", agent="ta_group", handler="process_new_data") - calls == 2
+    assert sample("agent_handler_errors_total", agent="ta_group", handler="process_new_data") - errors == 1
+
+def test_queue_depth_is_read_at_scrape_time():
+    items = []
+    track_queue("test_queue", lambda: len(items))
+    items.extend([1, 2, 3])
+    assert sample("agent_queue_depth", queue="test_queue") == 3
@@ -0,0 +1,38 @@
+import threading
+import time
+from prometheus_client import REGISTRY
+from core.observability import profiler
+from core.observability.profiler import SamplingProfiler, install_profiler, timed
+
+def spin(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+def test_sampling_profile_is_collapsed_stacks_of_running_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=spin, args=(stop,), name="busy-worker")
+    worker.start()
+    try:
+        stacks = SamplingProfiler(interval_ms=1).sample(0.2)
+    finally:
+        stop.set()
+        worker.join()
+
+    busy = [stack for stack in stacks if stack.startswith("busy-worker;")]
+    assert busy and all("spin (test_profiler.py" in stack for stack in busy)
+    line = SamplingProfiler.collapsed(stacks).splitlines()[0]
+    assert line.rsplit(" ", 1)[1].isdigit()
+
+def test_timed_stages_are_recorded_only_when_enabled():
+    @timed("tests.stage")
+    def stage():
+        time.sleep(0.01)
+
+    count = lambda: REGISTRY.get_sample_value("profiled_stage_seconds_count", {"stage": "tests.stage"}) or 0.0
+    install_profiler({"profiling": {"timers": False}})
+    stage()
+    assert count() == 0
+    install_profiler({"profiling": {"timers": True}})
+    stage()
+    assert count() == 1
+    install_profiler({"profiling": {"timers": False}})
@@ -0,0 +1,69 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from core.ratelimit.provider_limiter import ProviderLimiter, TokenBucket, DEFAULT_PROVIDER, get_provider_config, yf_history
+
+def make_limiter(**overrides):
+    config = get_provider_config({"rate_limits": {"test": overrides}}, "test")
+    return ProviderLimiter("test", config, redis_client=None)
+
+def test_aimd_concurrency():
+    """Healthy windows add one slot; errors halve the limit, never below the minimum."""
+    limiter = make_limiter(concurrency={"initial": 4, "min": 1, "max": 5}, rate_per_second=1000, burst=1000)
+
+    for _ in range(4):
+        with limiter.request():
+            pass
+    assert limiter.concurrency.limit == 5
+
+    with pytest.raises(RuntimeError):
+        with limiter.request():
+            raise RuntimeError("boom")
+    assert limiter.concurrency.limit == 2.5
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            with limiter.request():
+                raise RuntimeError("boom")
+    assert limiter.concurrency.limit == 1
+    assert limiter.concurrency.in_flight == 0
+
+def test_throttle_pauses_the_bucket():
+    """A 429 pauses the shared bucket instead of letting every caller retry at once."""
+    limiter = make_limiter(rate_per_second=10, burst=5, throttle_pause_seconds=2)
+
+    with pytest.raises(Exception):
+        with limiter.request():
+            raise Exception("429 Client Error: Too Many Requests")
+
+    assert limiter.bucket.try_take() == pytest.approx(2.1, abs=0.05)
+
+def test_local_bucket_refill():
+    bucket = TokenBucket(None, "test", rate=10, capacity=2)
+    with patch("core.ratelimit.provider_limiter.time.monotonic", side_effect=[100.0, 100.0, 100.0, 100.05]):
+        bucket._local_ts = 100.0
+        assert bucket.try_take() == 0
+        assert bucket.try_take() == 0
+        assert bucket.try_take() == pytest.approx(0.1)
+        assert bucket.try_take() == pytest.approx(0.05)
+
+class YFRateLimitError(Exception):
+    pass
+
+class YFPricesMissingError(Exception):
+    pass
+
+def test_yf_history_raises_throttling_and_returns_missing_data_empty():
+    """Market research and FX downloads go through yf_history too: a 429 pauses the bucket, missing data does not."""
+    limiter = make_limiter(rate_per_second=1000, burst=1000)
+    ticker = MagicMock()
+    ticker.history.side_effect = YFRateLimitError("Too Many Requests. Rate limited. Try after a while.")
+    with patch.object(limiter.bucket, "pause") as pause:
+        with pytest.raises(YFRateLimitError):
+            with limiter.request():
+                yf_history(ticker, period="30d", interval="1d")
+    pause.assert_called_once()
+    assert ticker.history.call_args.kwargs["raise_errors"] is True
+
+    ticker.history.side_effect = YFPricesMissingError("possibly delisted; no price data found")
+    with limiter.request():
+        assert yf_history(ticker, period="30d", interval="1d").empty
@@ -3,7 +3,7 @@ import os
 import time
 import threading
 from core.redis_bus.redis_stream import RedisStream
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 # Dynamically add the project root directory to the Python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
@@ -56,6 +56,51 @@ def test_redis_stream():
 
     # TODO: Replace these basic assertions with agent-specific assertions once agents are implemented
 
+class PendingRedis:
+    """XPENDING/XCLAIM replies for one entry left pending by a failed callback or a dead consumer."""
+
+    def __init__(self, times_delivered):
+        self.pending = [{"message_id": "1-0", "consumer": "dead_consumer", "time_since_delivered": 60000, "times_delivered": times_delivered}]
+        self.acked = []
+
+    def xgroup_create(self, *args, **kwargs):
+        pass
+
+    def xreadgroup(self, *args, **kwargs):
+        time.sleep(0.01)
+        return []
+
+    def xpending_range(self, stream, group, min, max, count, idle=None):
+        due, self.pending = self.pending, []
+        return due
+
+    def xclaim(self, stream, group, consumer, min_idle_time, message_ids):
+        return [(message_id, {"seq": "1"}) for message_id in message_ids]
+
+    def xack(self, stream, group, *entry_ids):
+        self.acked.extend(entry_ids)
+
+def listen_once(fake, received):
+    stream = RedisStream()
+    stream.redis = fake
+    with patch("core.redis_bus.redis_stream.CLAIM_POLL_SECONDS", 0):
+        stream.subscribe("orders", received.append, consumer_group="execution_group", consumer_name="execution_consumer")
+        time.sleep(0.2)
+        stream._stopping.set()
+        stream._listeners[0].join(2)
+
+def test_entries_pending_past_the_redelivery_delay_are_claimed():
+    fake, received = PendingRedis(times_delivered=1), []
+    listen_once(fake, received)
+    assert received == [{"seq": "1"}]
+    assert fake.acked == ["1-0"]
+
+def test_entries_delivered_max_deliveries_times_are_dropped():
+    fake, received = PendingRedis(times_delivered=5), []
+    listen_once(fake, received)
+    assert received == []
+    assert fake.acked == ["1-0"]  # Acknowledged without calling back
+
 if __name__ == "__main__":
     # Run the test manually
-    test_redis_stream()
\ No newline at end of file
+    test_redis_stream()
@@ -0,0 +1,44 @@
+import time
+from core.redis_bus.retention import StreamRetention
+
+SETTINGS = {
+    "channels": {"data_collector": "data_collector_channel", "technical_analysis": "technical_analysis_signals"},
+    "stream_retention": {
+        "retention_ms": 3000,
+        "trim_every": 3,
+        "trim_interval_seconds": 3600,
+        "channels": {"data_collector": {"retention_ms": 1000}},
+    },
+}
+
+class FakeRedis:
+    def __init__(self):
+        self.trims = []
+
+    def xtrim(self, stream, minid=None, approximate=True, **kwargs):
+        self.trims.append((stream, minid))
+        return 0
+
+def min_id_age_ms(min_id):
+    return time.time() * 1000 - int(min_id.split("-")[0])
+
+def test_streams_are_trimmed_by_age_once_per_batch():
+    fake = FakeRedis()
+    retention = StreamRetention(fake, SETTINGS)
+
+    for _ in range(7):
+        retention.published("data_collector_channel")
+
+    # The first XADD trims (no trim yet), then one trim per 3 XADDs
+    assert [stream for stream, _ in fake.trims] == ["data_collector_channel"] * 3
+    assert 900 < min_id_age_ms(fake.trims[-1][1]) < 1500  # The channel's own retention
+
+def test_idle_streams_get_the_default_policy():
+    fake = FakeRedis()
+    retention = StreamRetention(fake, SETTINGS)
+    retention.published("data_collector_channel")
+
+    retention.trim_idle()
+
+    assert [stream for stream, _ in fake.trims] == ["data_collector_channel", "technical_analysis_signals"]
+    assert 2900 < min_id_age_ms(fake.trims[-1][1]) < 3500
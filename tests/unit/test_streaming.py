@@ -0,0 +1,145 @@
+import asyncio
+import pandas as pd
+import pytest
+from core.fx.fx_service import StaticFXService
+from agents.market_data_collector.streaming import CandleAggregator, StreamingIngestor, WebSocketTickProvider
+
+T0 = pd.Timestamp("2024-03-05 10:00", tz="UTC").value // 10**6
+MINUTE = 60_000
+
+def test_aggregator_closes_candles_on_event_time():
+    aggregator = CandleAggregator(["5m", "1h"])
+
+    assert aggregator.add_trade("BTC-USD", T0, 100.0, 1) == []
+    aggregator.add_trade("BTC-USD", T0 + 1 * MINUTE, 105.0, 2)
+    aggregator.add_trade("BTC-USD", T0 + 2 * MINUTE, 95.0, 1)
+    aggregator.add_trade("BTC-USD", T0 + 4 * MINUTE, 101.0, 1)
+
+    # A trade in the next 5m period closes the first 5m candle but not the hour
+    closed = aggregator.add_trade("BTC-USD", T0 + 5 * MINUTE, 102.0, 1)
+    assert [(c["timeframe"], c["open"], c["high"], c["low"], c["close"], c["volume"]) for c in closed] == [
+        ("5m", 100.0, 105.0, 95.0, 101.0, 5)
+    ]
+
+    # A heartbeat alone closes the candles of every symbol once their period ends
+    closed = aggregator.advance(T0 + 60 * MINUTE)
+    assert sorted(c["timeframe"] for c in closed) == ["1h", "5m"]
+    assert next(c for c in closed if c["timeframe"] == "1h")["volume"] == 6
+
+def test_equity_candles_follow_the_session_open():
+    """1h equity candles start at 9:30 ET like yfinance's bars; the last one ends at the close."""
+    aggregator = CandleAggregator(["1h"])
+    session_open = pd.Timestamp("2024-03-05 14:30", tz="UTC").value // 10**6  # 9:30 EST
+
+    assert aggregator.add_trade("AAPL", session_open - 10 * MINUTE, 99.0, 1) == []  # Pre-market: ignored
+    aggregator.add_trade("AAPL", session_open + 5 * MINUTE, 100.0, 1)
+    aggregator.add_trade("AAPL", session_open + 50 * MINUTE, 101.0, 1)
+    closed = aggregator.add_trade("AAPL", session_open + 61 * MINUTE, 102.0, 1)
+    assert [(c["start"], c["open"], c["close"], c["volume"]) for c in closed] == [(session_open, 100.0, 101.0, 2)]
+
+    closed = aggregator.add_trade("AAPL", session_open + 370 * MINUTE, 103.0, 1)  # 15:40 ET, in the 15:30 bar
+    assert [c["start"] for c in closed] == [session_open + 60 * MINUTE]
+    closed = aggregator.advance(session_open + 390 * MINUTE)  # The 16:00 close ends the half-hour last bar
+    assert [(c["start"], c["end"]) for c in closed] == [(session_open + 360 * MINUTE, session_open + 390 * MINUTE)]
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def execute(self, statement, params):
+        self.rows.extend(params)
+
+class FakeEngine:
+    def __init__(self):
+        self.rows = []
+        self.batches = 0
+
+    def begin(self):
+        engine = self
+
+        class Transaction:
+            async def __aenter__(self):
+                engine.batches += 1
+                return FakeConnection(engine.rows)
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Transaction()
+
+class FakeWatermarks:
+    def __init__(self):
+        self.watermarks = {}
+
+    async def set_many(self, watermarks):
+        self.watermarks.update(watermarks)
+
+class FakeAgent:
+    timeframes = {"ltf": "5m", "htf": "1h"}
+
+    def __init__(self):
+        self.db_engine = FakeEngine()
+        self.fx = StaticFXService({"USD/EUR": 0.5})
+        self.events = []
+        self.watermarks = FakeWatermarks()
+
+    async def wait_for_bus_capacity(self):
+        pass
+
+    async def publish_raw_data_event(self, asset, timeframe, df):
+        self.events.append((asset, timeframe, len(df)))
+
+def test_replayed_candles_are_stored_in_batches_and_published():
+    """End to end through the local replay feed: 12 stored 5m candles -> 12 5m bars and one 1h bar per symbol."""
+    pytest.importorskip("websockets")
+    from agents.market_data_collector.replay_server import ReplayServer
+
+    timestamps = pd.date_range("2024-03-05 10:00", periods=12, freq="5min", tz="UTC")
+    candles = pd.concat([
+        pd.DataFrame({"symbol": symbol, "timestamp": timestamps, "open": 10.0, "high": 12.0, "low": 8.0, "close": 11.0, "volume": 4.0})
+        for symbol in ("BTC-USD", "ETH-USD")
+    ])
+    agent = FakeAgent()
+
+    async def replay():
+        server = await ReplayServer(candles, "5m", "EUR", port=8799).start()
+        try:
+            ingestor = StreamingIngestor(agent, WebSocketTickProvider("ws://localhost:8799"), {"batch_interval_ms": 10})
+            await asyncio.wait_for(ingestor.run(["BTC-USD", "ETH-USD"]), timeout=10)
+        finally:
+            await server.stop()
+
+    asyncio.run(replay())
+
+    assert len(agent.db_engine.rows) == 2 * (12 + 1)
+    assert agent.db_engine.batches < len(agent.db_engine.rows)  # Bars closing together share one INSERT
+    hourly = [row for row in agent.db_engine.rows if row["timeframe"] == "1h"]
+    assert {row["symbol"] for row in hourly} == {"BTC-USD", "ETH-USD"}
+    assert hourly[0]["high"] == 12.0 and hourly[0]["volume"] == 48.0  # Replayed bars are already in EUR: not converted again
+    assert ("BTC-USD", "1h", 1) in agent.events
+    assert agent.watermarks.watermarks[("ETH-USD", "5m")] == pd.Timestamp("2024-03-05 10:55", tz="UTC")
+
+def test_provider_reconnects_when_the_feed_closes_cleanly():
+    websockets = pytest.importorskip("websockets")
+    connections = []
+
+    async def handler(websocket):
+        await websocket.recv()
+        connections.append(websocket)
+        if len(connections) == 1:
+            return  # Clean close without an "end" message
+        await websocket.send('{"type": "heartbeat", "t": 1}')
+        await websocket.send('{"type": "end"}')
+
+    async def run():
+        server = await websockets.serve(handler, "localhost", 8798)
+        try:
+            provider = WebSocketTickProvider("ws://localhost:8798", reconnect_max_seconds=1)
+            return [message async for message in provider.stream(["BTC-USD"])]
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    messages = asyncio.run(asyncio.wait_for(run(), timeout=10))
+    assert len(connections) == 2
+    assert messages == [{"type": "heartbeat", "t": 1}]
@@ -43,7 +43,7 @@ def test_fetch_coin50_tickers(mock_get, agent):
 @patch("os.makedirs")
 @patch("agents.ticker_updater.ticker_updater_agent.TickerUpdaterAgent.fetch_sp500_tickers")
 @patch("agents.ticker_updater.ticker_updater_agent.TickerUpdaterAgent.fetch_coin50_tickers")
-@patch("agents.ticker_updater.ticker_updater_agent.RedisStream.publish")
+@patch("core.redis_bus.redis_stream.RedisStream.publish")
 def test_update_tickers(mock_publish, mock_fetch_coin50, mock_fetch_sp500, mock_makedirs, mock_open, agent):
     """Test the update_tickers method."""
     mock_fetch_sp500.return_value = ["AAPL", "MSFT"]
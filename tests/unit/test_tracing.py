@@ -0,0 +1,22 @@
+from prometheus_client import REGISTRY
+from core.observability import tracing
+
+def observed(stage):
+    return REGISTRY.get_sample_value("pipeline_stage_latency_seconds_sum", {"stage": stage}) or 0.0
+
+def test_trace_survives_the_stream_and_times_each_stage():
+    before_ta, before_tracking = observed("ta"), observed("tracking")
+    total_before = REGISTRY.get_sample_value("pipeline_end_to_end_latency_seconds_sum") or 0.0
+
+    trace = tracing.mark(tracing.new_trace(bar_close=1000.0), "ingest", at=1002.0)
+    message = tracing.inject({"ticker": "AAPL"}, trace)
+    received = tracing.extract(message)
+    signal = tracing.mark(received, "ta", at=1005.0)
+    tracked = tracing.mark(signal, "tracking", at=1011.0)  # pm/execution missing: timed from "ta"
+
+    assert received == trace and "ta" not in received["stages"]
+    assert observed("ta") - before_ta == 3.0
+    assert observed("tracking") - before_tracking == 6.0
+    assert REGISTRY.get_sample_value("pipeline_end_to_end_latency_seconds_sum") - total_before == 11.0
+    assert tracked["id"] == trace["id"]
+    assert tracing.extract({"ticker": "AAPL"}) is None and tracing.mark(None, "ta") is None
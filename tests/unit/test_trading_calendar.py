@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+from datetime import date, time
+from core.calendar.trading_calendar import get_calendar, calendar_for
+from agents.technical_analysis.utils.validation import is_session_time, session_mask
+
+def test_nyse_sessions_holidays_and_early_closes():
+    """Weekends and holidays have no session; the day after Thanksgiving closes at 13:00 ET."""
+    nyse = get_calendar("NYSE")
+
+    assert nyse.is_trading_day(date(2024, 7, 5))
+    assert not nyse.is_trading_day(date(2024, 7, 4))   # Independence Day
+    assert not nyse.is_trading_day(date(2024, 7, 6))   # Saturday
+    assert nyse.next_close("2024-11-29 15:00Z") == pd.Timestamp("2024-11-29 18:00", tz="UTC")
+    assert nyse.next_open("2024-07-03 21:00Z") == pd.Timestamp("2024-07-05 13:30", tz="UTC")
+
+def test_session_mask_vectorized():
+    """session_mask agrees with is_open, handles DST and never-closing markets."""
+    nyse = get_calendar("NYSE")
+    timestamps = pd.to_datetime([
+        "2024-01-08 14:29", "2024-01-08 14:30", "2024-01-08 20:59", "2024-01-08 21:00",  # EST: 14:30-21:00 UTC
+        "2024-07-08 13:30", "2024-07-08 20:30",                                          # EDT: 13:30-20:00 UTC
+    ], utc=True)
+
+    mask = nyse.session_mask(timestamps)
+
+    assert mask.tolist() == [False, True, True, False, True, False]
+    assert mask.tolist() == [nyse.is_open(ts) for ts in timestamps]
+    assert calendar_for("BTC-USD").session_mask(timestamps).all()
+    assert calendar_for("AAPL") is nyse
+
+def test_ta_session_windows():
+    """The TA session check keeps its London/NY windows, inclusive of the window end."""
+    timestamps = pd.to_datetime(["2024-03-05 08:00", "2024-03-05 11:00", "2024-03-05 12:00", "2024-03-05 14:00"], utc=True)
+
+    assert session_mask(timestamps).tolist() == [True, True, False, True]
+    assert is_session_time(timestamps[1])
+    assert not is_session_time(timestamps[3], sessions=[(time(8, 0), time(11, 0))])